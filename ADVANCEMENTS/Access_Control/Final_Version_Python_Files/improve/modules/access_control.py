@@ -0,0 +1,248 @@
+import time
+from collections import Counter, deque
+
+class AccessControl:
+    """
+    Gate gesture commands behind face recognition & session management.
+
+    Recognition results are votes in a small ring buffer; a session is
+    granted once min_votes results within vote_window agree. While that
+    consensus is settled on the session user, recognition is skipped and
+    only re-confirmed every settled_recheck seconds. Frames that give
+    recognition nothing to work with are bridged for grace_period
+    seconds, but a face recognised as someone else - or as nobody -
+    ends the session at once, as a lost track does.
+    """
+
+    def __init__(self, face_recognizer, face_tracker=None):
+        self.recognizer = face_recognizer
+        self.tracker    = face_tracker   # Optional FaceTracker - see check_tracked()
+        self.active_session = {
+            'user'         : None,
+            'start_time'   : None,
+            'last_seen'    : None,
+            'confidence'   : 0,
+            'gesture_count': 0,
+            'last_match'   : 0.0
+        }
+        self.session_timeout      = 30   # seconds before session expires
+        self.confidence_threshold = 0.65
+        self.detection_buffer_size = 3
+        self.detection_history    = deque(maxlen=self.detection_buffer_size)
+
+        # Time-windowed voting over recognition results: (time, user|None, confidence)
+        self.vote_window          = 2.0  # seconds a recognition result keeps its vote
+        self.min_votes            = 2    # agreeing votes needed to grant a session
+        self.settled_votes        = 3    # agreeing votes after which recognition is skipped ...
+        self.settled_recheck      = 1.0  # ... until this long after the last vote
+        self.grace_period         = 1.5  # seconds a session survives frames without a usable match
+        self.votes                = deque(maxlen=8)
+
+        self.recognitions_run     = 0
+        self.recognitions_skipped = 0
+
+    def check_authorization(self, detected_face, confidence, force=False):
+        """
+        Buffer recent detections and decide whether to grant/continue a session.
+
+        Args:
+            detected_face : dict with keys 'bbox', 'confidence' (from FaceDetector)
+            confidence    : float avg confidence for the frame
+            force         : always run recognition, even if the consensus is settled
+
+        Returns:
+            (authorized: bool, username: str|None, message: str)
+        """
+        now = time.time()
+        self._remember(detected_face, confidence, now)
+
+        user, count, vote_conf = self._consensus(now)
+        session_user = self.active_session['user']
+        if (not force and session_user is not None and user == session_user
+                and count >= self.settled_votes and now - self.votes[-1][0] < self.settled_recheck):
+            # Consensus already settled on the session user - no need to ask again
+            self.active_session['last_seen'] = now
+            self.recognitions_skipped += 1
+            return True, user, f"Authorized: {user}"
+
+        # Pick the highest-confidence recent detection for recognition - or,
+        # when forced, the face that has to be re-checked
+        if force:
+            best = self.detection_history[-1]
+        else:
+            best = max(self.detection_history, key=lambda x: x['confidence'])
+
+        # face_recognition.recognize expects (face_roi, face_detection_obj)
+        # best['face'] here is the dict from FaceDetector, not the MP object.
+        # Access the raw MediaPipe object stored under key 'mp_detection' if
+        # available, else fall back to the dict itself (backward compat).
+        mp_obj = best['face'].get('mp_detection') if isinstance(best['face'], dict) else best['face']
+        # Set by FaceEmbedder.embed_detections() when embedding recognition is on
+        embedding = best['face'].get('embedding') if isinstance(best['face'], dict) else None
+
+        usable = mp_obj is not None or embedding is not None
+        if usable:
+            recog_user, recog_conf = self.recognizer.recognize(None, mp_obj, embedding)
+            self.recognitions_run += 1
+            if recog_user is None or recog_conf < self.confidence_threshold:
+                recog_user = None
+            if session_user is not None and recog_user != session_user:
+                # Not the session user's face - end the session like a lost
+                # track instead of letting it act for grace_period
+                self._drop_votes()
+                self.active_session['user'] = None
+            self.votes.append((now, recog_user, recog_conf))
+        else:
+            # Nothing to recognise from - no vote either way
+            recog_user, recog_conf = None, 0.0
+        session_user = self.active_session['user']
+
+        user, count, vote_conf = self._consensus(now)
+        if user is not None and count >= self.min_votes:
+            if session_user != user:
+                # New user starting a session
+                self.active_session = {
+                    'user'         : user,
+                    'start_time'   : now,
+                    'last_seen'    : now,
+                    'confidence'   : vote_conf,
+                    'gesture_count': 0,
+                    'last_match'   : now
+                }
+                message = f"Welcome {user}!"
+            else:
+                # Existing session refresh
+                self.active_session['last_seen']  = now
+                if recog_user == user:
+                    # Only an actual match restarts the grace window
+                    self.active_session['last_match'] = now
+                self.active_session['confidence'] = vote_conf
+                message = f"Authorized: {user}"
+            return True, user, message
+
+        if session_user is not None and (not usable or recog_user == session_user) \
+                and now - self.active_session['last_match'] <= self.grace_period:
+            # Short-lived gap (or a match still short of min_votes) - keep the
+            # session while the votes recover
+            self.active_session['last_seen'] = now
+            return True, session_user, f"Authorized: {session_user} (re-checking)"
+
+        if session_user is None and recog_user is not None and count < self.min_votes:
+            return False, None, "Scanning face..."
+
+        message = (
+            "Unknown user - Access denied"
+            if recog_user is None
+            else f"Low confidence - Retry ({recog_conf:.0%})"
+        )
+        self.active_session['user'] = None
+        return False, None, message
+
+    def _consensus(self, now):
+        """
+        Majority user among the votes inside vote_window.
+
+        Returns:
+            (user|None, agreeing votes, mean confidence of those votes)
+        """
+        recent = [(user, conf) for t, user, conf in self.votes if now - t <= self.vote_window]
+        if not recent:
+            return None, 0, 0.0
+        user, count = Counter(user for user, _ in recent).most_common(1)[0]
+        if user is None or count * 2 <= len(recent):
+            return None, 0, 0.0
+        confs = [conf for u, conf in recent if u == user]
+        return user, count, sum(confs) / len(confs)
+
+    def check_tracked(self, detections, confidence):
+        """
+        Session mode: like check_authorization(), but once a user is
+        confirmed the face tracker keeps the identity alive and recognition
+        only re-runs periodically, when the track is lost or when a second
+        face appears.
+
+        Args:
+            detections : non-empty list of FaceDetector dicts for this frame
+            confidence : float avg confidence for the frame
+
+        Returns:
+            (authorized: bool, username: str|None, message: str)
+        """
+        if self.tracker is None:
+            return self.check_authorization(detections[0], confidence)
+
+        now          = time.time()
+        reason, face = self.tracker.update(detections, now)
+
+        if reason is None and self.active_session['user'] == self.tracker.user:
+            # Same face, same place - keep the history fresh, skip recognition
+            self._remember(face, confidence)
+            self.active_session['last_seen'] = now
+            self.recognitions_skipped += 1
+            return True, self.tracker.user, f"Authorized: {self.tracker.user}"
+
+        if reason == 'lost':
+            # Possibly a different person - don't vote with the old face's
+            # frames, and no grace window for a face we can't follow
+            self._drop_votes()
+
+        # The tracker asked for this recheck (periodic, second face, lost or
+        # unconfirmed) - it must really run, not reuse the settled consensus
+        authorized, user, message = self.check_authorization(face, confidence, force=True)
+        if authorized:
+            self.tracker.confirm(face['bbox'], user, len(detections), now)
+        else:
+            self.tracker.clear()
+        return authorized, user, message
+
+    def face_missing(self):
+        """Face detection ran and found nobody."""
+        if self.tracker is not None:
+            self.tracker.mark_missing()
+
+    def is_authorized(self):
+        """
+        Check whether the current session is still valid (not timed out).
+
+        Returns:
+            (authorized: bool, username: str|None, message: str)
+        """
+        if self.active_session['user'] is None:
+            return False, None, "No active session"
+
+        elapsed = time.time() - self.active_session['last_seen']
+        if elapsed > self.session_timeout:
+            self.active_session['user'] = None
+            return False, None, "Session timeout"
+
+        return True, self.active_session['user'], "Authorized"
+
+    def _drop_votes(self):
+        """Forget the votes and detections of a face that is gone; no grace window."""
+        self.detection_history.clear()
+        self.votes.clear()
+        self.active_session['last_match'] = 0.0
+
+    def _remember(self, detected_face, confidence, now=None):
+        # Ring buffer - the oldest detection drops out on its own
+        self.detection_history.append({
+            'face'      : detected_face,
+            'confidence': confidence,
+            'timestamp' : time.time() if now is None else now
+        })
+
+    def log_gesture(self, gesture_name, success=True):
+        """Increment gesture counter for the active session."""
+        if self.active_session['user']:
+            self.active_session['gesture_count'] += 1
+
+    def get_session_info(self):
+        """Return a snapshot of the active session."""
+        user = self.active_session['user']
+        return {
+            'user'           : user,
+            'active'         : user is not None,
+            'uptime_seconds' : (time.time() - self.active_session['start_time']) if user else 0,
+            'gesture_count'  : self.active_session['gesture_count'],
+            'confidence'     : self.active_session['confidence']
+        }
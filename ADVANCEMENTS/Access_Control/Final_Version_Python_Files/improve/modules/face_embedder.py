@@ -0,0 +1,193 @@
+import importlib.util
+import os
+import time
+
+import cv2
+import numpy as np
+
+from .face_tracker import bbox_iou
+
+
+def load_interpreter_class():
+    """Standalone tflite_runtime if installed (light), else tensorflow's tf.lite."""
+    if importlib.util.find_spec('tflite_runtime') is not None:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class FaceEmbedder:
+    """
+    Optional embedding stage: a small TFLite face-embedding model (e.g. a
+    MobileFaceNet-style 112x112 RGB -> 128-d network) run on the face ROIs
+    from FaceDetector.get_face_roi().
+
+    All faces of a frame go through one invoke. Embeddings are cached per
+    FaceTracker track: while the same confirmed track is the only face in
+    view, a detection that overlaps a cached box (IoU) within cache_ttl
+    seconds reuses its embedding instead of running the model. A new or
+    lost track, a second face or an empty frame drops the cache, so one
+    person's embedding is never reused for someone who takes their place.
+    Output vectors are L2-normalised, so cosine similarity is a dot product.
+    """
+
+    def __init__(self, model_path, max_batch=4, num_threads=2,
+                 cache_iou=0.6, cache_ttl=1.0, mean=127.5, std=128.0):
+        self.model_path  = model_path
+        self.max_batch   = max_batch
+        self.num_threads = num_threads
+        self.cache_iou   = cache_iou    # Min overlap with a cached box to reuse its embedding
+        self.cache_ttl   = cache_ttl    # Seconds a cached embedding stays valid
+        self.mean        = mean         # Pixel normalisation: (x - mean) / std
+        self.std         = std
+
+        self.interpreter_class = load_interpreter_class()
+        self.interpreters = {}         # batch size -> (interpreter, input_index, output_index)
+
+        interpreter    = self._new_interpreter()
+        input_details  = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        self.input_height, self.input_width = (int(v) for v in input_details['shape'][1:3])
+        self.dim = int(output_details['shape'][-1])
+
+        # Integer models: real = scale * (q - zero_point)
+        self.input_dtype  = input_details['dtype']
+        self.output_dtype = output_details['dtype']
+        self.input_scale, self.input_zero_point   = input_details['quantization']
+        self.output_scale, self.output_zero_point = output_details['quantization']
+        self._prepare(interpreter, 1)
+
+        self.cache = []                # [(bbox, embedding, time)] of the current track's face
+        self.cache_track = None        # FaceTracker.track_id the cache belongs to
+        self.faces_embedded = 0
+        self.cache_hits     = 0
+        self.invokes        = 0
+        self.invoke_time    = 0.0
+
+    # ---------------------------------------------------------- interpreter --
+    def _new_interpreter(self):
+        try:
+            return self.interpreter_class(model_path=self.model_path, num_threads=self.num_threads)
+        except TypeError:
+            # Older runtimes have no num_threads argument
+            return self.interpreter_class(model_path=self.model_path)
+
+    def _prepare(self, interpreter, batch_size):
+        # Resized once per batch size, so 1 vs 2 faces never reallocates per frame
+        input_details = interpreter.get_input_details()[0]
+        if input_details['shape'][0] != batch_size:
+            interpreter.resize_tensor_input(
+                input_details['index'], [batch_size, self.input_height, self.input_width, 3])
+        interpreter.allocate_tensors()
+
+        entry = (interpreter, input_details['index'], interpreter.get_output_details()[0]['index'])
+        self.interpreters[batch_size] = entry
+        return entry
+
+    def _get(self, batch_size):
+        entry = self.interpreters.get(batch_size)
+        if entry is None:
+            entry = self._prepare(self._new_interpreter(), batch_size)
+        return entry
+
+    # ------------------------------------------------------------ embedding --
+    def preprocess(self, face_roi, rgb=False):
+        """Resize one ROI to the model input and normalise it (float32, HWC RGB)."""
+        face = cv2.resize(face_roi, (self.input_width, self.input_height),
+                          interpolation=cv2.INTER_AREA)
+        if not rgb:
+            face = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
+        return (face.astype(np.float32) - self.mean) / self.std
+
+    def embed(self, face_rois, rgb=False):
+        """(N, dim) L2-normalised embeddings, one invoke per max_batch faces."""
+        if len(face_rois) == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        batch = np.stack([self.preprocess(roi, rgb) for roi in face_rois])
+        out   = []
+        for i in range(0, len(batch), self.max_batch):
+            out.append(self._invoke(batch[i:i + self.max_batch]))
+        embeddings = np.concatenate(out)
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def _invoke(self, batch):
+        if np.issubdtype(self.input_dtype, np.integer):
+            info  = np.iinfo(self.input_dtype)
+            batch = np.clip(np.round(batch / self.input_scale + self.input_zero_point),
+                            info.min, info.max).astype(self.input_dtype)
+
+        start = time.time()
+        interpreter, input_index, output_index = self._get(len(batch))
+        interpreter.set_tensor(input_index, batch)
+        interpreter.invoke()
+        output = interpreter.get_tensor(output_index).reshape(len(batch), -1)
+        self.invoke_time += time.time() - start
+        self.invokes     += 1
+
+        if np.issubdtype(self.output_dtype, np.integer):
+            output = (output.astype(np.float32) - self.output_zero_point) * self.output_scale
+        return output.astype(np.float32)
+
+    def clear_cache(self):
+        self.cache       = []
+        self.cache_track = None
+
+    def embed_detections(self, frame, detections, face_detector, rgb=False, now=None,
+                         track_id=None):
+        """
+        Attach an 'embedding' to every FaceDetector dict in detections.
+        track_id is the FaceTracker's current track (None = unconfirmed,
+        nothing is reused). With exactly one face on the same track, a
+        face still matching a cached box reuses it; the rest are cropped
+        with face_detector.get_face_roi() and embedded in one batch.
+        Call it for every detector run, including ones with no faces.
+        """
+        now = time.time() if now is None else now
+        if track_id is None or track_id != self.cache_track or len(detections) != 1:
+            self.clear_cache()
+        self.cache_track = track_id
+        self.cache       = [entry for entry in self.cache if now - entry[2] <= self.cache_ttl]
+
+        misses = []
+        for det in detections:
+            cached = max(self.cache, key=lambda e: bbox_iou(e[0], det['bbox']), default=None)
+            if cached is not None and bbox_iou(cached[0], det['bbox']) >= self.cache_iou:
+                det['embedding'] = cached[1]
+                self.cache_hits += 1
+            else:
+                misses.append(det)
+
+        if misses:
+            rois = [face_detector.get_face_roi(frame, det)[0] for det in misses]
+            for det, embedding in zip(misses, self.embed(rois, rgb)):
+                det['embedding'] = embedding
+            if track_id is not None and len(detections) == 1:
+                self.cache.append((misses[0]['bbox'], misses[0]['embedding'], now))
+            self.faces_embedded += len(misses)
+        return detections
+
+    # ---------------------------------------------------------------- stats --
+    def avg_invoke_ms(self):
+        return self.invoke_time / self.invokes * 1000 if self.invokes else 0.0
+
+    def cache_hit_rate(self):
+        total = self.cache_hits + self.faces_embedded
+        return self.cache_hits / total if total else 0.0
+
+
+def load_embedder(model_path, **kwargs):
+    """FaceEmbedder if the model file and a TFLite runtime are there, else None."""
+    if not model_path or not os.path.exists(model_path):
+        return None
+    try:
+        embedder = FaceEmbedder(model_path, **kwargs)
+    except (ImportError, ValueError, RuntimeError) as e:
+        print(f"[!] Face embedding disabled: {e}")
+        return None
+    print(f"[+] Face embedding model loaded ({embedder.dim}-d, "
+          f"{embedder.input_width}x{embedder.input_height} input)")
+    return embedder
@@ -0,0 +1,266 @@
+import numpy as np
+import json
+import os
+
+from .user_store import UserStore
+from .template_index import TemplateIndex
+
+class FaceRecognizer:
+    """
+    Recognizes enrolled users from MediaPipe face landmark data, or - when
+    a FaceEmbedder is given - from face embeddings of the face ROI. Users
+    enrolled before embeddings were available keep being matched by their
+    landmark templates until they re-enrol.
+    """
+
+    def __init__(self, database_path="data/enrolled_users",
+                 legacy_path="data/enrolled_users.json",
+                 embedder=None, embedding_path="data/enrolled_embeddings"):
+        self.database_path = database_path
+        self.legacy_path   = legacy_path      # Old single-file JSON database, imported once
+        self.store         = None
+        self.enrolled_users = {}              # username -> metadata (templates live in the store)
+        self.confidence_threshold = 0.65
+        self.max_templates    = 5      # Templates kept per user (pose / lighting variants)
+        self.template_spacing = 0.15   # Samples closer than this to a kept one are duplicates
+
+        # Live template rows of the store - several per user, refreshed on change
+        self.template_matrix = np.zeros((0, 0), dtype=np.float32)
+        self.template_names  = np.array([], dtype=object)
+        self.index           = TemplateIndex()
+
+        # Optional embedding path - its own store, since vectors differ in length
+        self.embedder            = embedder
+        self.embedding_path      = embedding_path
+        self.embedding_store     = None
+        self.embedding_index     = TemplateIndex()
+        self.legacy_index        = TemplateIndex()   # Landmark templates of users without embeddings
+        self.embedding_threshold = 0.65    # Min cosine similarity to accept a match
+        self.embedding_spacing   = 0.3     # Template de-duplication distance for embeddings
+
+        self.load_database()
+
+    # ------------------------------------------------------------------ I/O --
+    def load_database(self):
+        """Open the enrolled-user store (templates are memory-mapped, not parsed)."""
+        self.store = UserStore(self.database_path)
+        if not self.store.exists() and self.legacy_path and os.path.exists(self.legacy_path):
+            self.import_legacy_database(self.legacy_path)
+
+        self.enrolled_users = self.store.users
+        if self.enrolled_users:
+            print(f"[+] Loaded {len(self.enrolled_users)} enrolled user(s)")
+        else:
+            print("[!] No database found - will be created on first enrollment")
+
+        if self.embedder is not None:
+            self.embedding_store = UserStore(self.embedding_path)
+            missing = [u for u in self.enrolled_users if u not in self.embedding_store]
+            if missing:
+                print(f"[!] No face embeddings for: {', '.join(missing)} - "
+                      f"matched by landmarks until re-enrolled")
+        self.rebuild_index()
+
+    def import_legacy_database(self, path):
+        """One-off migration of the old enrolled_users.json into the store."""
+        with open(path, 'r') as f:
+            legacy = json.load(f)
+        for username, data in legacy.items():
+            try:
+                self.store.add_user(username, data['face_landmarks'],
+                                    enrolled_time=data.get('enrolled_time'),
+                                    num_samples=data.get('num_samples'),
+                                    status=data.get('status', 'active'))
+            except ValueError as e:
+                print(f"[!] Skipping '{username}': {e}")
+        print(f"[+] Imported {len(self.store)} user(s) from {path}")
+
+    def rebuild_index(self):
+        """
+        Pick up the store's live template rows plus a parallel name array
+        and index them for nearest-neighbour search. Called on load, enrol
+        and delete - never per frame.
+        """
+        self.template_names, self.template_matrix = self.store.matrix()
+        self.index.build(self.template_names, self.template_matrix)
+        if self.embedding_store is not None:
+            self.embedding_index.build(*self.embedding_store.matrix())
+            legacy = np.array([name not in self.embedding_store for name in self.template_names],
+                              dtype=bool)
+            self.legacy_index.build(self.template_names[legacy], self.template_matrix[legacy])
+
+    # ---------------------------------------------------------- landmarks ----
+    def extract_landmarks(self, face_detection):
+        """
+        Extract normalised landmark vector from a MediaPipe detection object.
+        Returns a 1-D numpy array.
+        """
+        keypoints = face_detection.location_data.relative_keypoints
+        landmarks = np.array([[kp.x, kp.y] for kp in keypoints], dtype=np.float32)
+
+        # Normalise: centre + scale
+        center = landmarks.mean(axis=0)
+        landmarks -= center
+        std = landmarks.std()
+        if std > 0:
+            landmarks /= std
+
+        return landmarks.flatten()
+
+    # ------------------------------------------------------- recognition ----
+    def recognize(self, face_roi, face_detection, embedding=None):
+        """
+        Identify which enrolled user a face belongs to.
+
+        Args:
+            face_roi       : cropped BGR face image - embedded when an embedder
+                             is configured and no embedding is passed in
+            face_detection : MediaPipe detection object
+            embedding      : precomputed FaceEmbedder vector for this face
+
+        Returns:
+            (username, confidence)  or  (None, score) if below threshold
+        """
+        index = self.index
+        if self.embedder is not None and len(self.embedding_index):
+            if embedding is None and face_roi is not None:
+                embedding = self.embedder.embed([face_roi])[0]
+            if embedding is not None:
+                user, similarity = self.match_embedding(embedding)
+                if user is not None or len(self.legacy_index) == 0:
+                    return user, similarity
+                # Not an embedding user - may be one enrolled before embeddings,
+                # so compare landmarks against those users only
+                index = self.legacy_index
+
+        matches = index.search(self.extract_landmarks(face_detection), k=1) if len(index) else []
+        if not matches:
+            return None, 0.0
+        user, distance = matches[0]
+
+        # Map distance → [0, 1] confidence  (0 distance = 1.0 confidence)
+        best_score = max(0.0, 1.0 - distance / 2.0)
+
+        if best_score >= self.confidence_threshold:
+            return user, best_score
+        return None, best_score
+
+    def match_embedding(self, embedding):
+        """
+        Cosine-similarity match of an L2-normalised embedding. For unit
+        vectors |a - b|^2 = 2 - 2 cos, so the L2 index ranks by cosine.
+        """
+        matches = self.embedding_index.search(embedding, k=1)
+        if not matches:
+            return None, 0.0
+        user, distance = matches[0]
+        similarity = 1.0 - distance ** 2 / 2.0
+
+        if similarity >= self.embedding_threshold:
+            return user, similarity
+        return None, max(0.0, similarity)
+
+    def identify(self, face_detection, k=3):
+        """
+        Top-k enrolled users for a face, nearest first.
+
+        Returns:
+            [(username, distance), ...]  - distance to the user's closest template
+        """
+        if len(self.index) == 0:
+            return []
+        return self.index.search(self.extract_landmarks(face_detection), k)
+
+    # --------------------------------------------------------- enrolment ----
+    def enroll_user(self, username, face_samples):
+        """
+        Enrol a new user using multiple face samples.
+
+        Args:
+            username     : string identifier for the user
+            face_samples : list of (face_detection, face_roi) tuples
+
+        Returns:
+            True on success, False otherwise
+        """
+        if username in self.enrolled_users:
+            print(f"[!] User '{username}' already exists!")
+            return False
+
+        if len(face_samples) < 3:
+            print("[!] Need at least 3 face samples for enrolment")
+            return False
+
+        all_landmarks = []
+        for face_detection, face_roi in face_samples:
+            try:
+                lm = self.extract_landmarks(face_detection)
+                all_landmarks.append(lm)
+            except Exception as e:
+                print(f"[!] Skipping bad sample: {e}")
+
+        if len(all_landmarks) < 3:
+            print("[!] Too many bad samples - enrolment failed")
+            return False
+
+        templates = self.select_templates(np.stack(all_landmarks))
+
+        try:
+            if self.embedder is not None:
+                rois = [face_roi for _, face_roi in face_samples if face_roi is not None]
+                if not rois:
+                    raise ValueError("no face images to embed")
+                embeddings = self.select_templates(self.embedder.embed(rois), self.embedding_spacing)
+                if username in self.embedding_store:
+                    # Left over from an enrolment that failed half-way
+                    self.embedding_store.delete_user(username)
+                self.embedding_store.add_user(username, embeddings, num_templates=len(embeddings))
+            self.store.add_user(username, templates,
+                                enrolled_time=str(np.datetime64('now')),
+                                num_samples=len(face_samples),
+                                num_templates=len(templates),
+                                status='active')
+        except ValueError as e:
+            print(f"[!] Enrolment failed: {e}")
+            return False
+
+        self.rebuild_index()
+        print(f"[+] User '{username}' enrolled successfully with {len(face_samples)} samples "
+              f"({len(templates)} templates)!")
+        return True
+
+    def select_templates(self, samples, spacing=None):
+        """
+        Pick up to max_templates samples that cover the captured poses and
+        lighting: start from the sample nearest the mean, then repeatedly
+        add the one farthest from everything kept so far. Stops early once
+        the remaining samples are near-duplicates of kept ones.
+        """
+        centre  = samples.mean(axis=0)
+        kept    = [int(np.argmin(np.linalg.norm(samples - centre, axis=1)))]
+        nearest = np.linalg.norm(samples - samples[kept[0]], axis=1)
+
+        while len(kept) < min(self.max_templates, len(samples)):
+            far = int(np.argmax(nearest))
+            if nearest[far] < (self.template_spacing if spacing is None else spacing):
+                break
+            kept.append(far)
+            nearest = np.minimum(nearest, np.linalg.norm(samples - samples[far], axis=1))
+
+        return samples[kept]
+
+    # ------------------------------------------------------------ utils ----
+    def list_users(self):
+        """Return list of enrolled usernames."""
+        return list(self.enrolled_users.keys())
+
+    def delete_user(self, username):
+        """Remove an enrolled user from the database."""
+        if self.store.delete_user(username):
+            if self.embedding_store is not None:
+                self.embedding_store.delete_user(username)
+            self.rebuild_index()
+            print(f"[+] User '{username}' deleted")
+            return True
+        print(f"[!] User '{username}' not found")
+        return False
@@ -0,0 +1,94 @@
+import time
+
+
+def bbox_iou(a, b):
+    """Intersection-over-union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    """
+    Keeps a confirmed identity attached to one face via bounding-box IoU,
+    so recognition only has to run occasionally instead of every frame.
+
+    update() picks the detection that is the tracked face and says
+    whether recognition has to run on it: None while the confirmed face
+    is still close to where it was, otherwise 'unconfirmed', 'periodic',
+    'lost' or 'second face'.
+
+    track_id names the current confirmed track and changes whenever a new
+    one starts, so per-face caches (FaceEmbedder) can be tied to it.
+    """
+
+    def __init__(self, iou_threshold=0.3, recheck_interval=2.0, miss_tolerance=0.5):
+        self.iou_threshold    = iou_threshold     # Min overlap with last box to count as the same face
+        self.recheck_interval = recheck_interval  # Seconds between confirming re-recognitions
+        self.miss_tolerance   = miss_tolerance    # Seconds without a face before the track is dropped
+
+        self.bbox           = None
+        self.user           = None
+        self.face_count     = 0
+        self.confirmed_time = 0.0
+        self.last_seen      = 0.0
+        self.track_id       = None   # New id per confirmed track, None while unconfirmed
+        self.tracks         = 0
+
+    def update(self, detections, now=None):
+        """
+        Feed this frame's face detections (FaceDetector dicts, non-empty).
+        Returns (reason, face) - face is the detection to authorise.
+        """
+        now = time.time() if now is None else now
+
+        if self.user is None:
+            return 'unconfirmed', detections[0]
+
+        ious = [bbox_iou(self.bbox, d['bbox']) for d in detections]
+        best = max(range(len(detections)), key=ious.__getitem__)
+        if ious[best] < self.iou_threshold:
+            self.clear()
+            return 'lost', detections[0]
+
+        face = detections[best]
+        self.bbox      = face['bbox']
+        self.last_seen = now
+
+        if len(detections) > self.face_count:
+            # Someone else stepped in - re-check the tracked face once
+            self.face_count = len(detections)
+            return 'second face', face
+        self.face_count = len(detections)
+
+        if now - self.confirmed_time >= self.recheck_interval:
+            return 'periodic', face
+        return None, face
+
+    def mark_missing(self, now=None):
+        """Detector ran but found no face - drop the track after miss_tolerance."""
+        now = time.time() if now is None else now
+        if self.user is not None and now - self.last_seen > self.miss_tolerance:
+            self.clear()
+
+    def confirm(self, bbox, user, face_count=1, now=None):
+        """Recognition accepted this face as `user`."""
+        now = time.time() if now is None else now
+        if self.track_id is None or user != self.user:
+            self.tracks  += 1
+            self.track_id = self.tracks
+        self.bbox           = bbox
+        self.user           = user
+        self.face_count     = face_count
+        self.confirmed_time = now
+        self.last_seen      = now
+
+    def clear(self):
+        self.bbox       = None
+        self.user       = None
+        self.face_count = 0
+        self.track_id   = None
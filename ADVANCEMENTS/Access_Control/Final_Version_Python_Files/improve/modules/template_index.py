@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class TemplateIndex:
+    """
+    Nearest-neighbour search over enrolled face templates (several rows
+    per user), returning the top-k users with their best distance.
+
+    A flat L2 index: squared norms of the templates are computed once at
+    build time, so a query is a single matrix-vector product
+    (|t|^2 - 2 t.q + |q|^2) instead of a subtract-square-sum over the
+    whole matrix. The closest candidate rows are then re-scored exactly,
+    so distances match search_exact(), the brute-force reference.
+    """
+
+    def __init__(self, candidates=32):
+        self.candidates = candidates   # Rows re-scored exactly per query (at least)
+
+        self.names        = np.array([], dtype=object)
+        self.matrix       = np.zeros((0, 0), dtype=np.float32)
+        self.sq_norms     = np.zeros(0, dtype=np.float32)
+        self.user_ids     = np.zeros(0, dtype=np.int32)   # Row -> index into self.users
+        self.users        = []
+        self.max_per_user = 0
+
+    # ---------------------------------------------------------------- build --
+    def build(self, names, matrix):
+        """Index template rows; names[i] is the user of matrix[i]. Called on change only."""
+        self.names    = np.asarray(names, dtype=object)
+        self.matrix   = matrix
+        self.sq_norms = np.einsum('ij,ij->i', matrix, matrix).astype(np.float32)
+
+        lookup        = {}
+        self.user_ids = np.array([lookup.setdefault(name, len(lookup)) for name in self.names],
+                                 dtype=np.int32)
+        self.users        = list(lookup)
+        self.max_per_user = int(np.bincount(self.user_ids).max()) if len(self.user_ids) else 0
+
+    def __len__(self):
+        return len(self.names)
+
+    # --------------------------------------------------------------- search --
+    def search(self, query, k=1):
+        """[(username, distance)] for the k closest users, nearest first."""
+        query = self._check(query)
+        if query is None:
+            return []
+
+        sq_dists = self.sq_norms - 2.0 * (self.matrix @ query) + float(query @ query)
+
+        # Enough candidate rows to still hold k distinct users
+        n_cand = min(len(sq_dists), max(self.candidates, k * self.max_per_user))
+        if n_cand < len(sq_dists):
+            cand = np.argpartition(sq_dists, n_cand - 1)[:n_cand]
+        else:
+            cand = np.arange(len(sq_dists))
+        diff  = self.matrix[cand] - query
+        dists = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        return self._top_users(self.user_ids[cand], dists, k)
+
+    def search_exact(self, query, k=1):
+        """Brute-force scan of every template - the reference for search()."""
+        query = self._check(query)
+        if query is None:
+            return []
+        diff  = self.matrix - query
+        dists = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        return self._top_users(self.user_ids, dists, k)
+
+    def _check(self, query):
+        if len(self.names) == 0:
+            return None
+        query = np.asarray(query, dtype=np.float32).ravel()
+        # Guard: query must have the templates' length
+        if query.shape[0] != self.matrix.shape[1]:
+            return None
+        return query
+
+    def _top_users(self, user_ids, dists, k):
+        """Reduce per-template distances to each user's best, then take the k nearest."""
+        best = np.full(len(self.users), np.inf, dtype=np.float32)
+        np.minimum.at(best, user_ids, dists)
+        k     = min(k, int(np.isfinite(best).sum()))
+        order = np.argpartition(best, k - 1)[:k]
+        order = order[np.argsort(best[order])]
+        return [(self.users[i], float(best[i])) for i in order]
@@ -0,0 +1,228 @@
+import json
+import os
+
+import numpy as np
+
+INDEX_FILE   = "index.jsonl"
+STORE_FORMAT = 1
+
+
+class UserStore:
+    """
+    Enrolled-user database: a binary float32 template matrix plus a small
+    append-only metadata index, in one directory:
+
+        templates-<gen>.f32   raw float32 rows, one template per row
+        index.jsonl           header line, then one 'add'/'delete' record per line
+
+    Enrolling appends the template rows (fsync) and then one index line
+    (fsync) - the index line is the commit. Deleting appends a tombstone
+    record. A crash can only leave unreferenced template bytes or a torn
+    last index line, and both are ignored on open. Once tombstoned rows
+    outweigh live ones the store is compacted into a new generation and
+    the new index is swapped in with os.replace().
+
+    Templates are memory-mapped on open, so startup cost doesn't grow with
+    the number of users.
+    """
+
+    def __init__(self, directory="data/enrolled_users", compact_ratio=0.5, compact_min_rows=8):
+        self.directory        = directory
+        self.index_path       = os.path.join(directory, INDEX_FILE)
+        self.compact_ratio    = compact_ratio     # Dead/total rows that triggers compaction
+        self.compact_min_rows = compact_min_rows  # Don't bother compacting tiny stores
+
+        self.dim        = 0
+        self.generation = 0
+        self.rows       = 0      # Committed template rows (live + tombstoned)
+        self.dead_rows  = 0
+        self.users      = {}     # username -> metadata incl. 'rows': [first, count]
+        self.templates  = np.zeros((0, 0), dtype=np.float32)
+
+        self._open()
+
+    # ------------------------------------------------------------------ open --
+    @property
+    def templates_path(self):
+        return os.path.join(self.directory, f"templates-{self.generation}.f32")
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    def _open(self):
+        self.users, self.rows, self.dead_rows = {}, 0, 0
+        if not self.exists():
+            self.templates = np.zeros((0, 0), dtype=np.float32)
+            return
+
+        with open(self.index_path, 'rb') as f:
+            lines = f.read().split(b'\n')
+
+        header = json.loads(lines[0])
+        if header.get('format') != STORE_FORMAT:
+            raise ValueError(f"Unsupported user store format: {header.get('format')}")
+        self.dim        = header['dim']
+        self.generation = header['generation']
+
+        # Only newline-terminated lines are committed; the last chunk is
+        # either empty or a torn write from a crash
+        for line in lines[1:-1]:
+            record = json.loads(line)
+            if record['op'] == 'add':
+                first, count = record['rows']
+                self.users[record['user']] = record['meta']
+                self.users[record['user']]['rows'] = [first, count]
+                self.rows = max(self.rows, first + count)
+            elif record['op'] == 'delete':
+                meta = self.users.pop(record['user'], None)
+                if meta is not None:
+                    self.dead_rows += meta['rows'][1]
+
+        if lines[-1]:
+            # Cut the torn line off so the next record starts on a fresh line
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(f.seek(0, os.SEEK_END) - len(lines[-1]))
+
+        self._map()
+        self._remove_stale_files()
+
+    def _map(self):
+        """Memory-map the committed rows (bytes past them are an interrupted append)."""
+        if self.rows == 0 or self.dim == 0:
+            self.templates = np.zeros((0, self.dim), dtype=np.float32)
+            return
+        self.templates = np.memmap(self.templates_path, dtype=np.float32, mode='r',
+                                   shape=(self.rows, self.dim))
+
+    def _remove_stale_files(self):
+        """Leftovers of an interrupted compaction or older generations."""
+        keep = {INDEX_FILE, os.path.basename(self.templates_path)}
+        for name in os.listdir(self.directory):
+            if name not in keep and (name.startswith('templates-') or name.endswith('.tmp')):
+                os.remove(os.path.join(self.directory, name))
+
+    # --------------------------------------------------------------- queries --
+    def list_users(self):
+        return list(self.users.keys())
+
+    def __contains__(self, username):
+        return username in self.users
+
+    def __len__(self):
+        return len(self.users)
+
+    def matrix(self):
+        """
+        (names, templates): every live template row and the user it belongs
+        to. Without tombstones this is the memory map itself, no copy.
+        """
+        names = []
+        for username, meta in self.users.items():
+            names.extend([username] * meta['rows'][1])
+        if self.dead_rows == 0:
+            return np.array(names, dtype=object), self.templates
+
+        rows = [r for meta in self.users.values()
+                for r in range(meta['rows'][0], meta['rows'][0] + meta['rows'][1])]
+        return np.array(names, dtype=object), np.ascontiguousarray(self.templates[rows])
+
+    # ---------------------------------------------------------------- writes --
+    def add_user(self, username, templates, **meta):
+        """Append a user's template row(s) and commit them with one index record."""
+        templates = np.atleast_2d(np.asarray(templates, dtype=np.float32))
+        if username in self.users:
+            raise ValueError(f"User '{username}' already exists")
+        if not self.exists():
+            self._create(templates.shape[1])
+        if templates.shape[1] != self.dim:
+            raise ValueError(f"Template length {templates.shape[1]} != store dimension {self.dim}")
+
+        first = self.rows
+        with open(self.templates_path, 'r+b' if os.path.exists(self.templates_path) else 'wb') as f:
+            # Drop any bytes an interrupted append left past the committed rows
+            f.truncate(first * self.dim * 4)
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(templates).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        meta = dict(meta)
+        self._append_record({'op': 'add', 'user': username,
+                             'rows': [first, len(templates)], 'meta': meta})
+        meta['rows']         = [first, len(templates)]
+        self.users[username] = meta
+        self.rows            = first + len(templates)
+        self._map()
+
+    def delete_user(self, username):
+        """Tombstone a user; the rows are reclaimed at the next compaction."""
+        if username not in self.users:
+            return False
+        self._append_record({'op': 'delete', 'user': username})
+        self.dead_rows += self.users.pop(username)['rows'][1]
+        if self.dead_rows >= self.compact_min_rows and self.dead_rows > self.compact_ratio * self.rows:
+            self.compact()
+        return True
+
+    def compact(self):
+        """
+        Rewrite live rows into a new generation. The new index is written to
+        a temp file and swapped in with os.replace(), so a crash leaves either
+        the old store or the new one - never a mix.
+        """
+        _, live     = self.matrix()
+        generation  = self.generation + 1
+        templates   = os.path.join(self.directory, f"templates-{generation}.f32")
+        self._write_file(templates, np.ascontiguousarray(live, dtype=np.float32).tobytes())
+
+        lines, row = [self._header(self.dim, generation)], 0
+        for username, meta in self.users.items():
+            count = meta['rows'][1]
+            lines.append({'op': 'add', 'user': username, 'rows': [row, count],
+                          'meta': {k: v for k, v in meta.items() if k != 'rows'}})
+            meta['rows'] = [row, count]
+            row += count
+        self._replace_index(lines)
+
+        self.generation, self.rows, self.dead_rows = generation, row, 0
+        self._map()
+        self._remove_stale_files()
+
+    # --------------------------------------------------------------- helpers --
+    def _header(self, dim, generation):
+        return {'format': STORE_FORMAT, 'dim': int(dim), 'generation': generation}
+
+    def _create(self, dim):
+        os.makedirs(self.directory, exist_ok=True)
+        self.dim, self.generation = int(dim), 0
+        self._replace_index([self._header(dim, 0)])
+
+    def _append_record(self, record):
+        with open(self.index_path, 'ab') as f:
+            f.write(json.dumps(record).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replace_index(self, records):
+        data = b''.join(json.dumps(r).encode('utf-8') + b'\n' for r in records)
+        tmp  = self.index_path + '.tmp'
+        self._write_file(tmp, data)
+        os.replace(tmp, self.index_path)
+        self._sync_directory()
+
+    def _write_file(self, path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _sync_directory(self):
+        """Make the rename itself durable (no-op where directories can't be opened)."""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,92 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Tests live in ~/improve/tests; modules/ is a sibling directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.face_recognition import FaceRecognizer
+
+EMBED_DIM = 16
+
+
+class VectorEmbedder:
+    """Stands in for FaceEmbedder: a face 'ROI' here is already its embedding."""
+
+    def embed(self, face_rois, rgb=False):
+        vectors = np.asarray(face_rois, dtype=np.float32).reshape(len(face_rois), -1)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def detection(points):
+    """MediaPipe-shaped detection with the given (x, y) keypoints."""
+    keypoints = [SimpleNamespace(x=float(x), y=float(y)) for x, y in points]
+    return SimpleNamespace(location_data=SimpleNamespace(relative_keypoints=keypoints))
+
+
+def face(rng, seed_points, embedding, jitter=0.002):
+    return detection(seed_points + jitter * rng.normal(size=seed_points.shape)), embedding
+
+
+@pytest.fixture
+def faces():
+    rng = np.random.default_rng(0)
+    layouts    = {name: rng.random((6, 2)) for name in ('alice', 'bob', 'stranger')}
+    embeddings = {name: VectorEmbedder().embed([rng.normal(size=EMBED_DIM)])[0]
+                  for name in ('alice', 'bob', 'stranger')}
+    return rng, layouts, embeddings
+
+
+@pytest.fixture
+def mixed(tmp_path, faces):
+    """alice enrolled before embeddings (landmarks only), bob with embeddings."""
+    rng, layouts, embeddings = faces
+    paths = dict(database_path=str(tmp_path / 'users'), legacy_path=None,
+                 embedding_path=str(tmp_path / 'embeddings'))
+
+    legacy = FaceRecognizer(**paths)
+    assert legacy.enroll_user('alice', [face(rng, layouts['alice'], None) for _ in range(4)])
+
+    recognizer = FaceRecognizer(embedder=VectorEmbedder(), **paths)
+    assert recognizer.enroll_user('bob', [face(rng, layouts['bob'], embeddings['bob'])
+                                          for _ in range(4)])
+    return recognizer
+
+
+def recognize(recognizer, faces, layout, embedding):
+    rng, layouts, embeddings = faces
+    det, emb = face(rng, layouts[layout], embeddings[embedding])
+    return recognizer.recognize(None, det, emb)
+
+
+def test_embedding_user_matched_by_embedding(mixed, faces):
+    user, score = recognize(mixed, faces, 'bob', 'bob')
+    assert user == 'bob' and score > 0.99
+
+
+def test_landmark_only_user_still_recognised(mixed, faces):
+    assert 'alice' not in mixed.embedding_store
+    user, _ = recognize(mixed, faces, 'alice', 'alice')
+    assert user == 'alice'
+
+
+def test_unknown_face_rejected(mixed, faces):
+    user, _ = recognize(mixed, faces, 'stranger', 'stranger')
+    assert user is None
+
+
+def test_embedding_user_not_matched_by_landmarks_alone(mixed, faces):
+    # bob's keypoints with someone else's embedding: the landmark fallback
+    # only covers users without embeddings, so this must not become 'bob'
+    user, _ = recognize(mixed, faces, 'bob', 'stranger')
+    assert user is None
+
+
+def test_no_fallback_once_every_user_has_embeddings(mixed, faces):
+    mixed.delete_user('alice')
+    assert len(mixed.legacy_index) == 0
+    assert recognize(mixed, faces, 'bob', 'bob')[0] == 'bob'
+    assert recognize(mixed, faces, 'alice', 'alice')[0] is None
@@ -0,0 +1,137 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Tests live in ~/improve/tests; modules/ is a sibling directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.template_index import TemplateIndex
+from modules.user_store     import UserStore
+
+DIM = 64
+
+
+def make_templates(rng, n_users, per_user, dim=DIM, spread=0.3):
+    """Several templates per user scattered around a per-user centre."""
+    names, rows = [], []
+    for u in range(n_users):
+        centre = rng.normal(size=dim)
+        for _ in range(per_user):
+            names.append(f"user{u}")
+            rows.append(centre + spread * rng.normal(size=dim))
+    return names, np.asarray(rows, dtype=np.float32)
+
+
+def build(names, matrix, candidates=32):
+    index = TemplateIndex(candidates=candidates)
+    index.build(names, matrix)
+    return index
+
+
+def assert_same(result, expected):
+    assert [user for user, _ in result] == [user for user, _ in expected]
+    np.testing.assert_allclose([d for _, d in result], [d for _, d in expected], rtol=1e-5)
+
+
+# ---------------------------------------------------------------- search --
+@pytest.mark.parametrize('k', [1, 3, 10])
+def test_search_matches_exact(k):
+    rng = np.random.default_rng(0)
+    names, matrix = make_templates(rng, n_users=40, per_user=5)
+    index = build(names, matrix, candidates=8)   # Fewer candidates than rows -> re-scoring path
+
+    for _ in range(50):
+        query = rng.normal(size=DIM).astype(np.float32)
+        result = index.search(query, k)
+        assert len(result) == k
+        assert_same(result, index.search_exact(query, k))
+
+
+def test_search_finds_own_template():
+    rng = np.random.default_rng(1)
+    names, matrix = make_templates(rng, n_users=20, per_user=4)
+    index = build(names, matrix)
+
+    for row in range(0, len(names), 3):
+        (user, dist), = index.search(matrix[row], 1)
+        assert user == names[row]
+        assert dist == pytest.approx(0.0, abs=1e-3)
+
+
+def test_results_are_distinct_users_sorted_by_distance():
+    rng = np.random.default_rng(2)
+    names, matrix = make_templates(rng, n_users=15, per_user=6)
+    index = build(names, matrix, candidates=4)
+
+    result = index.search(rng.normal(size=DIM), 5)
+    users = [user for user, _ in result]
+    dists = [d for _, d in result]
+    assert len(set(users)) == len(users)
+    assert dists == sorted(dists)
+
+
+def test_k_larger_than_user_count():
+    rng = np.random.default_rng(3)
+    names, matrix = make_templates(rng, n_users=3, per_user=4)
+    index = build(names, matrix)
+
+    query = rng.normal(size=DIM)
+    result = index.search(query, 10)
+    assert sorted(user for user, _ in result) == ['user0', 'user1', 'user2']
+    assert_same(result, index.search_exact(query, 10))
+
+
+# ----------------------------------------------------------------- edges --
+def test_empty_index():
+    index = TemplateIndex()
+    assert len(index) == 0
+    assert index.search(np.zeros(DIM), 1) == []
+    assert index.search_exact(np.zeros(DIM), 3) == []
+
+    index.build([], np.zeros((0, DIM), dtype=np.float32))
+    assert len(index) == 0
+    assert index.search(np.zeros(DIM), 1) == []
+
+
+def test_wrong_query_length():
+    rng = np.random.default_rng(4)
+    index = build(*make_templates(rng, n_users=2, per_user=2))
+    assert index.search(np.zeros(DIM + 1), 1) == []
+    assert index.search_exact(np.zeros(DIM - 1), 1) == []
+
+
+def test_deleted_users_are_never_returned(tmp_path):
+    rng = np.random.default_rng(5)
+    names, matrix = make_templates(rng, n_users=6, per_user=3)
+    store = UserStore(str(tmp_path / 'users'))
+    for u in range(6):
+        store.add_user(f"user{u}", matrix[u * 3:(u + 1) * 3])
+
+    deleted = {'user1', 'user4'}
+    for username in deleted:
+        store.delete_user(username)
+    index = build(*store.matrix(), candidates=2)
+    assert len(index) == 4 * 3
+
+    for row in range(len(names)):
+        query = matrix[row]
+        result = index.search(query, 6)
+        assert deleted.isdisjoint(user for user, _ in result)
+        assert len(result) == 4
+        assert_same(result, index.search_exact(query, 6))
+
+
+def test_deleting_every_user_empties_the_index(tmp_path):
+    rng = np.random.default_rng(6)
+    names, matrix = make_templates(rng, n_users=2, per_user=2)
+    store = UserStore(str(tmp_path / 'users'))
+    store.add_user('user0', matrix[:2])
+    store.add_user('user1', matrix[2:])
+    store.delete_user('user0')
+    store.delete_user('user1')
+
+    index = build(*store.matrix())
+    assert len(index) == 0
+    assert index.search(matrix[0], 1) == []
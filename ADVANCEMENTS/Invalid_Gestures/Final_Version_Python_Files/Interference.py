@@ -15,17 +15,33 @@ Improvements:
 import cv2
 import mediapipe as mp
 import numpy as np
-import tensorflow as tf
-import socket
-import json
 import time
 from collections import deque
 import os
+import sys
+
+# Shared runtime helpers live in Final_Versions_pythonfiles/ (or next to this
+# script when deployed to the Jetson)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..', 'Final_Versions_pythonfiles'))
+for _path in (SHARED_DIR, SCRIPT_DIR):
+    if os.path.isdir(_path) and _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from mpv_ipc import MPVConnection
+from landmark_features import LandmarkExtractor, load_feature_config
+from gesture_classifier import TFLiteClassifier
+from gesture_stabilizer import GestureStabilizer
+from display import Display
+from overlay import OverlayCompositor
+from tracing import Tracer
+from metrics_server import MetricsServer, add_tracer
 
 # ==================== OPTIMIZED CONFIGURATION ====================
 # Model paths
 MODEL_PATH = 'gesture_model_v2.tflite'
 LABELS_PATH = 'gesture_labels.txt'
+MODEL_INFO_PATH = 'model_info.json'
 MPV_SOCKET = '/tmp/mpvsocket'
 
 # Camera settings
@@ -33,6 +49,16 @@ FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 CAMERA_INDEX = 0
 
+# Headless mode: no drawing or window, shutdown via SIGINT/SIGTERM
+HEADLESS = False
+PREVIEW_FPS = 0  # >0 keeps a low-rate preview window in headless mode (e.g. 5 for debugging)
+HISTORY_LINES = 5  # Recent actions shown on screen
+
+# Live metrics: Prometheus text at /metrics, JSON at /stats (local only)
+# Off by default - set e.g. METRICS_PORT = 9108 and scrape http://127.0.0.1:9108/metrics
+METRICS_PORT = None
+METRICS_SOCKET = None  # e.g. '/tmp/gesture_metrics.sock' to serve on a Unix socket instead
+
 # MediaPipe settings - 0.5 is faster than 0.6 on Jetson Nano
 MIN_DETECTION_CONFIDENCE = 0.5
 MIN_TRACKING_CONFIDENCE  = 0.5
@@ -122,9 +148,10 @@ class SmartCooldownManager:
     def get_stats(self):
         """Get execution statistics per gesture"""
         stats = {}
-        for gesture in self.gesture_counts:
+        # Snapshot the keys - the metrics endpoint calls this from its own thread
+        for gesture in list(self.gesture_counts):
             executed = self.gesture_counts[gesture]
-            attempted = self.total_attempts[gesture]
+            attempted = self.total_attempts.get(gesture, 0)
             stats[gesture] = {
                 'executed': executed,
                 'attempted': attempted,
@@ -136,41 +163,44 @@ class SmartCooldownManager:
 class MPVController:
     """Handle MPV IPC communication"""
     
-    def __init__(self, socket_path):
+    def __init__(self, socket_path, metrics=None):
         self.socket_path = socket_path
+        self.metrics = metrics
         self.command_count = 0
         self.failed_commands = 0
-        self.command_times = deque(maxlen=100)
+        self.command_times = deque(maxlen=100)  # Round-trip times (ms) from mpv replies
         self.commands_by_gesture = {}
+        self.connection = MPVConnection(socket_path, on_reply=self._on_reply)
         
-    def send_command(self, command):
-        """Send JSON command to MPV"""
-        start_time = time.time()
-        
-        try:
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            sock.connect(self.socket_path)
-            
-            cmd_json = json.dumps(command) + '\n'
-            sock.sendall(cmd_json.encode('utf-8'))
-            
-            sock.settimeout(0.05)
-            try:
-                response = sock.recv(4096).decode('utf-8')
-            except socket.timeout:
-                response = None
-            
-            sock.close()
-            
-            execution_time = (time.time() - start_time) * 1000
-            self.command_times.append(execution_time)
+    def _on_reply(self, success, response, rtt):
+        """Called from the IPC reader thread when mpv answers (or times out)"""
+        if success:
+            self.command_times.append(rtt)
             self.command_count += 1
-            
-            return True, response, execution_time
-            
-        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.update_command_rtt(rtt / 1000.0)
+        else:
             self.failed_commands += 1
-            return False, str(e), 0
+    
+    def check_connection(self, timeout=0.5):
+        """Blocking round-trip used once at startup"""
+        success, _, _ = self.connection.request(
+            {'command': ['get_property', 'pause']}, timeout=timeout)
+        return success
+    
+    def send_command(self, command):
+        """
+        Queue JSON command for MPV without waiting for the reply.
+        Returns (queued, request_id); the round trip is timed when mpv's
+        reply arrives (see _on_reply).
+        """
+        queued, request_id = self.connection.send(command)
+        if not queued:
+            self.failed_commands += 1
+        return queued, request_id
+    
+    def close(self):
+        self.connection.close()
     
     def execute_gesture(self, gesture):
         """Map gesture to MPV command"""
@@ -195,15 +225,15 @@ class MPVController:
         }
         
         if gesture in commands_map:
-            success, response, exec_time = self.send_command(commands_map[gesture])
+            success, request_id = self.send_command(commands_map[gesture])
             
             if gesture not in self.commands_by_gesture:
                 self.commands_by_gesture[gesture] = 0
             self.commands_by_gesture[gesture] += 1
             
-            return success, descriptions.get(gesture, gesture), exec_time
+            return success, descriptions.get(gesture, gesture), request_id
         
-        return False, "Unknown", 0
+        return False, "Unknown", None
     
     def get_avg_command_time(self):
         if len(self.command_times) > 0:
@@ -219,23 +249,40 @@ class PerformanceMetrics:
         self.inference_times = deque(maxlen=window_size)
         self.hand_detection_times = deque(maxlen=window_size)
         self.frame_times = deque(maxlen=window_size)
+        # Whole-session latency histograms for the metrics endpoint; 'ipc_rtt' is
+        # recorded from the IPC reader thread, so it must exist before serving
+        self.tracer = Tracer(spans=('detect', 'infer', 'frame', 'ipc_rtt'))
         self.total_predictions = 0
         self.correct_predictions = 0
         self.invalid_gesture_count = 0
+        self.frames_detected = 0
+        self.frames_with_hands = 0
         self.start_time = time.time()
         self.gesture_executions = {}
         
     def update_frame_time(self, duration):
         self.frame_times.append(duration)
+        self.tracer.record('frame', duration)
         
     def update_fps(self):
         self.fps_times.append(time.time())
         
     def update_inference(self, duration):
         self.inference_times.append(duration)
+        self.tracer.record('infer', duration)
         
     def update_hand_detection(self, duration):
         self.hand_detection_times.append(duration)
+        self.tracer.record('detect', duration)
+    
+    def update_command_rtt(self, duration):
+        # Called from the IPC reader thread
+        self.tracer.record('ipc_rtt', duration)
+    
+    def record_detection(self, found):
+        self.frames_detected += 1
+        if found:
+            self.frames_with_hands += 1
     
     def record_prediction(self):
         self.total_predictions += 1
@@ -271,79 +318,161 @@ class PerformanceMetrics:
         if self.total_predictions == 0:
             return 0.0
         return (self.correct_predictions / self.total_predictions) * 100
+    
+    def get_detection_rate(self):
+        """Share of frames with a hand"""
+        return self.frames_with_hands / self.frames_detected if self.frames_detected else 0.0
+
+# ==================== METRICS ENDPOINT ====================
+def collect_metrics(exposition, metrics, mpv, cooldown_manager):
+    """Scrape callback - runs on the metrics server thread, reads only"""
+    exposition.gauge('gesture_uptime_seconds', time.time() - metrics.start_time, 'Seconds since start')
+    exposition.gauge('gesture_fps', metrics.get_fps(), 'Frames per second (rolling)')
+    exposition.counter('gesture_frames_total', metrics.frames_detected, 'Frames through hand detection')
+    exposition.counter('gesture_hand_frames_total', metrics.frames_with_hands, 'Frames with a hand detected')
+    exposition.gauge('gesture_detection_rate', metrics.get_detection_rate(), 'Share of frames with a hand')
+    exposition.counter('gesture_predictions_total', metrics.total_predictions, 'Classifier predictions')
+    exposition.counter('gesture_invalid_total', metrics.invalid_gesture_count,
+                       'Low-confidence gestures that opened the help screen')
+    
+    stats = cooldown_manager.get_stats()
+    for gesture in sorted(stats):
+        exposition.counter('gesture_executions_total', stats[gesture]['executed'],
+                           'Gestures executed after cooldown', {'gesture': gesture})
+    for gesture in sorted(stats):
+        exposition.counter('gesture_attempts_total', stats[gesture]['attempted'],
+                           'Stable gestures offered to the cooldown manager', {'gesture': gesture})
+    
+    exposition.counter('mpv_commands_total', mpv.command_count, 'MPV commands by outcome',
+                       {'result': 'success'})
+    exposition.counter('mpv_commands_total', mpv.failed_commands, labels={'result': 'failed'})
+    
+    add_tracer(exposition, metrics.tracer)
+
+def start_metrics_server(metrics, mpv, cooldown_manager):
+    if METRICS_PORT is None and not METRICS_SOCKET:
+        return None
+    server = MetricsServer(
+        lambda exposition: collect_metrics(exposition, metrics, mpv, cooldown_manager),
+        port=METRICS_PORT, unix_socket=METRICS_SOCKET)
+    try:
+        server.start()
+    except OSError as e:
+        print("[!] Metrics endpoint not started: {}".format(e))
+        return None
+    print("[+] Metrics: {}".format(server.address))
+    return server
 
 # ==================== HELP DISPLAY ====================
-def draw_help_overlay(frame, invalid_count, phase):
-    """
-    Draw help overlay with gesture table.
-    phase = 'table'   -> show gesture reference table
-    phase = 'resume'  -> show "Let's continue" message
-    """
-    h, w, _ = frame.shape
+GESTURE_COLORS = {
+    'VOLUME_UP': (0, 255, 0), 'VOLUME_DOWN': (0, 165, 255),
+    'PLAY': (255, 100, 0), 'PAUSE': (0, 0, 255),
+    'NEXT': (255, 0, 255), 'PREVIOUS': (255, 255, 0),
+    'STOP': (0, 0, 200), 'SKIP_LEFT': (150, 150, 0),
+    'SKIP_RIGHT': (0, 150, 150)
+}
 
-    # Semi-transparent dark background
-    overlay = frame.copy()
-    cv2.rectangle(overlay, (15, 95), (w - 15, h - 15), (15, 15, 15), -1)
-    cv2.addWeighted(overlay, 0.87, frame, 0.13, 0, frame)
+HELP_FOOTER_Y = 160 + 32 + 28 * len(GESTURE_HELP)
 
-    if phase == 'resume':
+def build_overlay(w, h):
+    """
+    Pre-render every static part of the UI once for the frame size:
+    header bar, the gesture help table and the "Let's continue" screen.
+    """
+    overlay = OverlayCompositor(w, h)
+    
+    def header(layer):
+        layer.rectangle((0, 0), (w, 120), (30, 30, 30), -1)
+        layer.text("MPV Control v1.0 - No Mirror", (10, 30), 0.7, (255, 255, 255), 2)
+    
+    def help_background(layer, border_color):
+        # Semi-transparent dark background (87% opaque)
+        layer.rectangle((15, 95), (w - 15, h - 15), (15, 15, 15), -1, alpha=222)
+        layer.rectangle((15, 95), (w - 15, h - 15), border_color, 3)
+    
+    def help_resume(layer):
         # ---- "Let's continue" screen ----
-        cv2.rectangle(frame, (15, 95), (w - 15, h - 15), (0, 200, 0), 3)
+        help_background(layer, (0, 200, 0))
         cy = h // 2 - 30
-        cv2.putText(frame, "Great! Let's continue...",
-                    (60, cy), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-        cv2.putText(frame, "Show a valid gesture to control MPV",
-                    (40, cy + 45), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
-        return
-
-    # ---- Gesture table screen ----
-    cv2.rectangle(frame, (15, 95), (w - 15, h - 15), (0, 0, 220), 3)
-
-    # Title
-    cv2.putText(frame, "PLEASE USE THESE GESTURES TO CONTROL",
-                (30, 130), cv2.FONT_HERSHEY_SIMPLEX, 0.68, (0, 220, 255), 2)
-
-    # Table header
-    hdr_y = 160
-    cv2.rectangle(frame, (20, hdr_y - 18), (w - 20, hdr_y + 6), (50, 50, 50), -1)
-    cv2.putText(frame, " #  Gesture        Hand Position                 Hand Required",
-                (25, hdr_y), cv2.FONT_HERSHEY_SIMPLEX, 0.42, (180, 180, 180), 1)
-
-    # Divider
-    cv2.line(frame, (20, hdr_y + 10), (w - 20, hdr_y + 10), (80, 80, 80), 1)
-
-    # Table rows
-    row_y = hdr_y + 32
-    for i, (gesture, hand_pos, hand_req) in enumerate(GESTURE_HELP):
-        # Alternate row shading
-        if i % 2 == 0:
-            cv2.rectangle(frame, (20, row_y - 16), (w - 20, row_y + 8), (30, 30, 30), -1)
-
-        # Number
-        cv2.putText(frame, "{:d}".format(i + 1),
-                    (28, row_y), cv2.FONT_HERSHEY_SIMPLEX, 0.44, (150, 150, 150), 1)
-
-        # Gesture name  (green)
-        cv2.putText(frame, "{:<12}".format(gesture),
-                    (50, row_y), cv2.FONT_HERSHEY_SIMPLEX, 0.44, (0, 255, 80), 2)
-
-        # Hand position  (white)
-        cv2.putText(frame, hand_pos,
-                    (190, row_y), cv2.FONT_HERSHEY_SIMPLEX, 0.42, (220, 220, 220), 1)
-
-        # Hand required  (yellow for specific hand, grey for either)
-        req_color = (0, 220, 255) if 'hand' in hand_req.lower() and 'either' not in hand_req.lower() else (160, 160, 160)
-        cv2.putText(frame, hand_req.strip(),
-                    (480, row_y), cv2.FONT_HERSHEY_SIMPLEX, 0.42, req_color, 1)
-
-        row_y += 28
+        layer.text("Great! Let's continue...", (60, cy), 0.9, (0, 255, 0), 2)
+        layer.text("Show a valid gesture to control MPV", (40, cy + 45), 0.6, (200, 200, 200), 1)
+    
+    def help_table(layer):
+        # ---- Gesture table screen ----
+        help_background(layer, (0, 0, 220))
+        
+        # Title
+        layer.text("PLEASE USE THESE GESTURES TO CONTROL", (30, 130), 0.68, (0, 220, 255), 2)
+        
+        # Table header
+        hdr_y = 160
+        layer.rectangle((20, hdr_y - 18), (w - 20, hdr_y + 6), (50, 50, 50), -1)
+        layer.text(" #  Gesture        Hand Position                 Hand Required",
+                   (25, hdr_y), 0.42, (180, 180, 180), 1)
+        
+        # Divider
+        layer.line((20, hdr_y + 10), (w - 20, hdr_y + 10), (80, 80, 80), 1)
+        
+        # Table rows
+        row_y = hdr_y + 32
+        for i, (gesture, hand_pos, hand_req) in enumerate(GESTURE_HELP):
+            # Alternate row shading
+            if i % 2 == 0:
+                layer.rectangle((20, row_y - 16), (w - 20, row_y + 8), (30, 30, 30), -1)
+            
+            # Number
+            layer.text("{:d}".format(i + 1), (28, row_y), 0.44, (150, 150, 150), 1)
+            
+            # Gesture name  (green)
+            layer.text("{:<12}".format(gesture), (50, row_y), 0.44, (0, 255, 80), 2)
+            
+            # Hand position  (white)
+            layer.text(hand_pos, (190, row_y), 0.42, (220, 220, 220), 1)
+            
+            # Hand required  (yellow for specific hand, grey for either)
+            req_color = (0, 220, 255) if 'hand' in hand_req.lower() and 'either' not in hand_req.lower() else (160, 160, 160)
+            layer.text(hand_req.strip(), (480, row_y), 0.42, req_color, 1)
+            
+            row_y += 28
+        
+        # Footer (the invalid count is dynamic - see show_help_overlay)
+        layer.line((20, row_y + 2), (w - 20, row_y + 2), (80, 80, 80), 1)
+        layer.text("Make a valid gesture to continue...", (210, row_y + 22), 0.48, (255, 255, 0), 2)
+    
+    overlay.add_layer('header', header)
+    overlay.add_layer('help_table', help_table, visible=False)
+    overlay.add_layer('help_resume', help_resume, visible=False)
+    overlay.add_layer('recent', lambda layer: layer.text(
+        "Recent:", (w - 220, h - 140), 0.4, (200, 200, 200), 1), visible=False)
+    return overlay
+
+def show_help_overlay(overlay, visible, invalid_count, phase):
+    """
+    Toggle the cached help layers.
+    phase = 'table'   -> show gesture reference table
+    phase = 'resume'  -> show "Let's continue" message
+    """
+    overlay.show_layer('help_table', visible and phase == 'table')
+    overlay.show_layer('help_resume', visible and phase == 'resume')
+    if visible and phase == 'table':
+        overlay.set_text('invalid_count', "Invalid gestures: {}".format(invalid_count),
+                         (28, HELP_FOOTER_Y + 22), 0.42, (255, 100, 0), 1)
+    else:
+        overlay.remove_item('invalid_count')
 
-    # Footer
-    cv2.line(frame, (20, row_y + 2), (w - 20, row_y + 2), (80, 80, 80), 1)
-    cv2.putText(frame, "Invalid gestures: {}".format(invalid_count),
-                (28, row_y + 22), cv2.FONT_HERSHEY_SIMPLEX, 0.42, (255, 100, 0), 1)
-    cv2.putText(frame, "Make a valid gesture to continue...",
-                (210, row_y + 22), cv2.FONT_HERSHEY_SIMPLEX, 0.48, (255, 255, 0), 2)
+def set_gesture_box(overlay, gesture, confidence, w):
+    """Current gesture box - re-rendered only when its text changes"""
+    color = GESTURE_COLORS.get(gesture, (255, 255, 255))
+    box_w = min(int(260 + len(gesture) * 8), w - 20)
+    info = "{:.0f}% | CD:{:.1f}s".format(confidence * 100, ACTION_COOLDOWNS.get(gesture, 1.0))
+    
+    def draw(layer):
+        layer.rectangle((10, 140), (box_w, 240), color, -1)
+        layer.rectangle((10, 140), (box_w, 240), (255, 255, 255), 2)
+        layer.text(gesture, (20, 185), 1.2, (255, 255, 255), 2)
+        layer.text(info, (20, 220), 0.5, (255, 255, 255), 1)
+    
+    overlay.set_item('gesture', (gesture, info), (9, 139, box_w + 2, 242), draw)
 
 # ==================== MAIN APPLICATION ====================
 def main():
@@ -359,9 +488,9 @@ def main():
         print("[!] Start: mpv --input-ipc-server=/tmp/mpvsocket --loop=inf video.mp4")
         return
     
-    mpv = MPVController(MPV_SOCKET)
-    success, _, _ = mpv.send_command({'command': ['get_property', 'pause']})
-    if success:
+    metrics = PerformanceMetrics()
+    mpv = MPVController(MPV_SOCKET, metrics)
+    if mpv.check_connection():
         print("[+] MPV connected!")
     else:
         print("[!] MPV not responding")
@@ -369,13 +498,11 @@ def main():
     # Load TFLite Model
     print("\n[STEP 2] Loading TFLite model...")
     try:
-        interpreter = tf.lite.Interpreter(model_path=MODEL_PATH)
-        interpreter.allocate_tensors()
+        # Handles float and full-integer (int8) models alike
+        classifier = TFLiteClassifier(MODEL_PATH, max_batch=1)
         
-        input_details = interpreter.get_input_details()
-        output_details = interpreter.get_output_details()
-        
-        print("[+] TFLite model loaded!")
+        print("[+] TFLite model loaded! ({})".format(
+            'int8' if classifier.quantized else 'float'))
     except Exception as e:
         print("[-] Error: {}".format(e))
         return
@@ -424,6 +551,7 @@ def main():
     print("[+] Camera ready! (No mirror mode)")
     print("[*] Camera FPS: {:.0f} | Resolution: {}x{}".format(
         actual_fps, FRAME_WIDTH, FRAME_HEIGHT))
+    metrics_server = start_metrics_server(metrics, mpv, cooldown_manager)
     
     print("\n" + "=" * 70)
     print("SYSTEM READY - VERSION 1.0 (Enhanced)")
@@ -433,13 +561,16 @@ def main():
     print("  - Invalid gesture detection with help")
     print("  - No mirror image (natural view)")
     print("  - Fast volume/skip controls")
-    print("\n[*] Press 'q' to quit")
+    if HEADLESS:
+        print("\n[*] Headless mode - stop with Ctrl+C or SIGTERM")
+    else:
+        print("\n[*] Press 'q' to quit")
     print("=" * 70 + "\n")
     
     # Initialize tracking
-    metrics = PerformanceMetrics()
-    prediction_buffer = deque(maxlen=5)
-    confidence_buffer = deque(maxlen=5)
+    extractor = LandmarkExtractor(1, load_feature_config(MODEL_INFO_PATH)['normalize'])
+    stabilizer = GestureStabilizer(len(GESTURES), window=5, min_count=STABLE_FRAMES,
+                                   threshold=CONFIDENCE_THRESHOLD)
     action_history = deque(maxlen=10)
     
     current_gesture = None
@@ -450,8 +581,12 @@ def main():
     
     frame_count = 0
     
+    overlay = None  # Built from the first rendered frame's size
+    display = Display('MPV Gesture Control v1.0', HEADLESS, PREVIEW_FPS)
+    display.install_signal_handlers()
+    
     try:
-        while cap.isOpened():
+        while cap.isOpened() and not display.shutdown.is_set():
             frame_start = time.time()
             
             ret, frame = cap.read()
@@ -465,6 +600,7 @@ def main():
             # frame = cv2.flip(frame, 1)  # REMOVED!
             
             h, w, _ = frame.shape
+            render = display.should_render()   # Headless frames skip all drawing
             
             # Hand detection
             hand_detect_start = time.time()
@@ -472,6 +608,7 @@ def main():
             results = hands.process(rgb_frame)
             hand_detect_time = time.time() - hand_detect_start
             metrics.update_hand_detection(hand_detect_time)
+            metrics.record_detection(bool(results.multi_hand_landmarks))
             
             # Two-phase help display: table -> resume -> off
             if show_help:
@@ -483,50 +620,46 @@ def main():
                     show_help = False
                     help_phase = 'table'
             
-            # Draw UI Header
-            cv2.rectangle(frame, (0, 0), (w, 120), (30, 30, 30), -1)
-            cv2.putText(frame, "MPV Control v1.0 - No Mirror", 
-                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            # Performance metrics
-            fps = metrics.get_fps()
-            latency = metrics.get_total_latency_ms()
-            accuracy = metrics.get_accuracy()
-            avg_cmd_time = mpv.get_avg_command_time()
-            
-            met1 = "FPS:{:.1f} Lat:{:.0f}ms Cmd:{:.0f}ms".format(fps, latency, avg_cmd_time)
-            cv2.putText(frame, met1, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 255, 100), 2)
-            
-            met2 = "Hand:{:.0f}ms Inf:{:.0f}ms Acc:{:.0f}% Invalid:{:d}".format(
-                metrics.get_avg_hand_detection_ms(),
-                metrics.get_avg_inference_ms(),
-                accuracy,
-                metrics.invalid_gesture_count
-            )
-            cv2.putText(frame, met2, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1)
+            if render:
+                # Header bar and help screens are cached layers
+                if overlay is None:
+                    overlay = build_overlay(w, h)
+                
+                # Performance metrics
+                fps = metrics.get_fps()
+                latency = metrics.get_total_latency_ms()
+                accuracy = metrics.get_accuracy()
+                avg_cmd_time = mpv.get_avg_command_time()
+                
+                met1 = "FPS:{:.1f} Lat:{:.0f}ms Cmd:{:.0f}ms".format(fps, latency, avg_cmd_time)
+                overlay.set_text('met1', met1, (10, 60), 0.5, (100, 255, 100), 2)
+                
+                met2 = "Hand:{:.0f}ms Inf:{:.0f}ms Acc:{:.0f}% Invalid:{:d}".format(
+                    metrics.get_avg_hand_detection_ms(),
+                    metrics.get_avg_inference_ms(),
+                    accuracy,
+                    metrics.invalid_gesture_count
+                )
+                overlay.set_text('met2', met2, (10, 90), 0.45, (200, 200, 200), 1)
             
             # Process hand
             if results.multi_hand_landmarks and len(results.multi_hand_landmarks) == 1:
                 hand_landmarks = results.multi_hand_landmarks[0]
                 
-                # Draw landmarks
-                mp_drawing.draw_landmarks(
-                    frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
-                    mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=1),
-                    mp_drawing.DrawingSpec(color=(255, 100, 0), thickness=1)
-                )
+                if render:
+                    # Draw landmarks
+                    mp_drawing.draw_landmarks(
+                        frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
+                        mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=1),
+                        mp_drawing.DrawingSpec(color=(255, 100, 0), thickness=1)
+                    )
                 
-                # Extract landmarks
-                landmarks = []
-                for lm in hand_landmarks.landmark:
-                    landmarks.extend([lm.x, lm.y])
-                landmarks = np.array(landmarks, dtype=np.float32).reshape(1, -1)
+                # Extract landmarks (shared with training)
+                landmarks = extractor.extract_one(hand_landmarks)
                 
                 # TFLite inference
                 inference_start = time.time()
-                interpreter.set_tensor(input_details[0]['index'], landmarks)
-                interpreter.invoke()
-                prediction = interpreter.get_tensor(output_details[0]['index'])[0]
+                prediction = classifier.classify(landmarks)[0]
                 inference_time = time.time() - inference_start
                 metrics.update_inference(inference_time)
                 
@@ -546,113 +679,88 @@ def main():
                         print("[WARNING] Invalid gesture! Confidence: {:.1f}%".format(confidence * 100))
                     
                     # Clear buffers
-                    prediction_buffer.clear()
-                    confidence_buffer.clear()
+                    stabilizer.reset()
                     current_gesture = None
                 else:
                     # Valid gesture
-                    prediction_buffer.append(gesture_idx)
-                    confidence_buffer.append(confidence)
-                    
                     # Stable gesture check
-                    if len(prediction_buffer) >= STABLE_FRAMES:
-                        unique, counts = np.unique(list(prediction_buffer), return_counts=True)
-                        most_common_idx = unique[np.argmax(counts)]
-                        most_common_count = np.max(counts)
-                        
-                        relevant_confidences = [
-                            conf for pred, conf in zip(prediction_buffer, confidence_buffer)
-                            if pred == most_common_idx
-                        ]
-                        avg_confidence = np.mean(relevant_confidences)
+                    stable = stabilizer.update(gesture_idx, confidence)
+                    if stable is not None:
+                        most_common_idx, avg_confidence = stable
+                        gesture = GESTURES[most_common_idx]
+                        current_gesture = gesture
+                        current_confidence = avg_confidence
                         
-                        if most_common_count >= STABLE_FRAMES and avg_confidence > CONFIDENCE_THRESHOLD:
-                            gesture = GESTURES[most_common_idx]
-                            current_gesture = gesture
-                            current_confidence = avg_confidence
+                        # Execute with SMART COOLDOWN
+                        if cooldown_manager.can_execute(gesture, avg_confidence):
+                            success, description, request_id = mpv.execute_gesture(gesture)
                             
-                            # Execute with SMART COOLDOWN
-                            if cooldown_manager.can_execute(gesture, avg_confidence):
-                                success, description, exec_time = mpv.execute_gesture(gesture)
+                            if success:
+                                action_history.append({
+                                    'gesture': gesture,
+                                    'time': time.time(),
+                                    'conf': avg_confidence,
+                                    'request_id': request_id
+                                })
+                                metrics.record_execution(gesture)
                                 
-                                if success:
-                                    action_history.append({
-                                        'gesture': gesture,
-                                        'time': time.time(),
-                                        'conf': avg_confidence,
-                                        'exec': exec_time
-                                    })
-                                    metrics.record_execution(gesture)
-                                    
-                                    cooldown_used = ACTION_COOLDOWNS.get(gesture, 1.0)
-                                    if avg_confidence > 0.95:
-                                        cooldown_used *= 0.9
-                                    elif avg_confidence < 0.80:
-                                        cooldown_used *= 1.1
-                                    
-                                    print("[ACTION] {:<12} | {:.0f}% | {:.1f}ms | {:.2f}s CD | {}".format(
-                                        gesture, avg_confidence * 100, exec_time, cooldown_used, description))
+                                cooldown_used = ACTION_COOLDOWNS.get(gesture, 1.0)
+                                if avg_confidence > 0.95:
+                                    cooldown_used *= 0.9
+                                elif avg_confidence < 0.80:
+                                    cooldown_used *= 1.1
+                                
+                                print("[ACTION] {:<12} | {:.0f}% | req #{} | {:.2f}s CD | {}".format(
+                                    gesture, avg_confidence * 100, request_id, cooldown_used, description))
                 
-                # Display help overlay if invalid gesture
-                if show_help:
-                    draw_help_overlay(frame, metrics.invalid_gesture_count, help_phase)
-                else:
+                if render:
+                    overlay.remove_item('hand_msg')
                     # Display current gesture (only if valid)
-                    if current_gesture:
-                        colors = {
-                            'VOLUME_UP': (0, 255, 0), 'VOLUME_DOWN': (0, 165, 255),
-                            'PLAY': (255, 100, 0), 'PAUSE': (0, 0, 255),
-                            'NEXT': (255, 0, 255), 'PREVIOUS': (255, 255, 0),
-                            'STOP': (0, 0, 200), 'SKIP_LEFT': (150, 150, 0),
-                            'SKIP_RIGHT': (0, 150, 150)
-                        }
-                        color = colors.get(current_gesture, (255, 255, 255))
-                        
-                        box_w = min(int(260 + len(current_gesture) * 8), w - 20)
-                        cv2.rectangle(frame, (10, 140), (box_w, 240), color, -1)
-                        cv2.rectangle(frame, (10, 140), (box_w, 240), (255, 255, 255), 2)
-                        
-                        cv2.putText(frame, current_gesture,
-                                   (20, 185), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
-                        
-                        gesture_cd = ACTION_COOLDOWNS.get(current_gesture, 1.0)
-                        cv2.putText(frame, "{:.0f}% | CD:{:.1f}s".format(
-                            current_confidence * 100, gesture_cd),
-                                   (20, 220), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    if current_gesture and not show_help:
+                        set_gesture_box(overlay, current_gesture, current_confidence, w)
+                    else:
+                        overlay.remove_item('gesture')
             
             else:
-                prediction_buffer.clear()
-                confidence_buffer.clear()
+                stabilizer.reset()
                 
-                if not show_help:
-                    msg = "No hand" if not results.multi_hand_landmarks else "Multiple hands"
-                    cv2.putText(frame, msg, (10, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                else:
-                    draw_help_overlay(frame, metrics.invalid_gesture_count, help_phase)
-            
-            # Action history (only if not showing help)
-            if action_history and not show_help:
-                hy = h - 140
-                cv2.putText(frame, "Recent:", (w - 220, hy), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
-                for act in list(action_history)[-5:]:
-                    hy += 22
-                    cv2.putText(frame, "{} ({:.0f}s)".format(
-                        act['gesture'][:8], time.time() - act['time']),
-                               (w - 220, hy), cv2.FONT_HERSHEY_SIMPLEX, 0.35, (150, 150, 150), 1)
-            
-            # MPV status
-            st = "MPV: {}/{}".format(mpv.command_count, mpv.failed_commands)
-            cv2.putText(frame, st, (w - 150, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+                if render:
+                    overlay.remove_item('gesture')
+                    if not show_help:
+                        msg = "No hand" if not results.multi_hand_landmarks else "Multiple hands"
+                        overlay.set_text('hand_msg', msg, (10, h - 20), 0.6, (0, 0, 255), 2)
+                    else:
+                        overlay.remove_item('hand_msg')
             
-            # Display
-            cv2.imshow('MPV Gesture Control v1.0', frame)
+            if render:
+                # Display help overlay if invalid gesture
+                show_help_overlay(overlay, show_help, metrics.invalid_gesture_count, help_phase)
+                
+                # Action history (only if not showing help)
+                recent = list(action_history)[-HISTORY_LINES:] if not show_help else []
+                overlay.show_layer('recent', bool(recent))
+                for i in range(HISTORY_LINES):
+                    if i < len(recent):
+                        act = recent[i]
+                        overlay.set_text('history{}'.format(i), "{} ({:.0f}s)".format(
+                            act['gesture'][:8], time.time() - act['time']),
+                                         (w - 220, h - 118 + i * 22), 0.35, (150, 150, 150), 1)
+                    else:
+                        overlay.remove_item('history{}'.format(i))
+                
+                # MPV status
+                st = "MPV: {}/{}".format(mpv.command_count, mpv.failed_commands)
+                overlay.set_text('mpv', st, (w - 150, 25), 0.4, (0, 255, 0), 1)
+                
+                # One blend for the whole overlay, then display
+                overlay.blend(frame)
+                display.show(frame)
             
             # Frame time
             frame_time = time.time() - frame_start
             metrics.update_frame_time(frame_time)
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if display.quit_pressed():
                 print("\n\n[*] Shutting down...")
                 break
     
@@ -660,9 +768,14 @@ def main():
         print("\n\n[*] Interrupted...")
     
     finally:
+        if display.signal_name:
+            print("\n\n[*] {} received, shutting down...".format(display.signal_name))
+        if metrics_server is not None:
+            metrics_server.stop()
         cap.release()
-        cv2.destroyAllWindows()
+        display.close()
         hands.close()
+        mpv.close()
         
         # Final report
         print("\n" + "=" * 70)
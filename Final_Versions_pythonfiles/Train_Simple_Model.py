@@ -4,17 +4,18 @@ Train gesture recognition model optimized for Jetson Nano
 """
 
 import numpy as np
-import cv2
-import mediapipe as mp
 import os
 from sklearn.model_selection import train_test_split
-from sklearn.utils import shuffle
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers, regularizers
 from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, ModelCheckpoint
 import json
 
+from landmark_dataset import iter_landmarks, make_settings, LandmarkDataset, LandmarkDatasetWriter
+from landmark_features import NUM_FEATURES
+from gesture_classifier import TFLiteClassifier
+
 print(f"TensorFlow version: {tf.__version__}")
 print(f"GPU Available: {tf.config.list_physical_devices('GPU')}")
 
@@ -25,44 +26,35 @@ RAW_IMAGES_DIR = 'dataset/raw_images'
 MODEL_DIR = 'models'
 MODEL_NAME = 'gesture_model_v2.h5'
 TFLITE_NAME = 'gesture_model_v2.tflite'
+WEIGHTS_NAME = 'gesture_model_v2_weights.npz'  # Raw weights for the NumPy inference backend
+FEATURE_NORMALIZE = 'none'  # 'none' | 'wrist' | 'scale' - see landmark_features.py
+LANDMARK_CACHE_PATH = 'dataset/landmark_cache.json'
+DATASET_DIR = 'dataset/landmarks'     # Binary float32/uint8 dataset, memory-mapped for training
+BATCH_SIZE = 32
 
-os.makedirs(MODEL_DIR, exist_ok=True)
+# TFLite export: 'float16' or 'int8' (full-integer, calibrated on training landmarks)
+TFLITE_QUANTIZATION = 'int8'
+INT8_CALIBRATION_SAMPLES = 500
+INT8_MAX_ACCURACY_DROP = 0.01        # Max overall accuracy loss vs float model
+INT8_MAX_CLASS_ACCURACY_DROP = 0.03  # Max loss for any single gesture
+EXTRACT_WORKERS = max(1, (os.cpu_count() or 1) - 1)
 
-# Initialize MediaPipe
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
+EXTRACTOR_SETTINGS = make_settings(
+    normalize=FEATURE_NORMALIZE,
     static_image_mode=True,
     max_num_hands=1,
     min_detection_confidence=0.5
 )
 
-def extract_hand_landmarks(image_path):
-    """Extract hand landmarks from image"""
-    image = cv2.imread(image_path)
-    if image is None:
-        return None
-    
-    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb_image)
-    
-    if not results.multi_hand_landmarks:
-        return None
-    
-    hand_landmarks = results.multi_hand_landmarks[0]
-    landmarks = []
-    for lm in hand_landmarks.landmark:
-        landmarks.extend([lm.x, lm.y])
-    
-    return np.array(landmarks)
+os.makedirs(MODEL_DIR, exist_ok=True)
 
 def load_dataset():
-    """Load and process dataset"""
-    X = []
-    y = []
-    
+    """Extract landmarks and write them to the memory-mapped binary dataset"""
     print("\n📦 Loading dataset...")
     print("-" * 60)
     
+    # Collect image paths per gesture
+    labels = {}
     for gesture_idx, gesture in enumerate(GESTURES):
         gesture_dir = os.path.join(RAW_IMAGES_DIR, gesture.lower())
         
@@ -70,39 +62,43 @@ def load_dataset():
             print(f"⚠️  {gesture}: Directory not found")
             continue
         
-        image_files = [f for f in os.listdir(gesture_dir) if f.endswith('.jpg')]
-        successful = 0
-        failed = 0
-        
-        for img_file in image_files:
-            img_path = os.path.join(gesture_dir, img_file)
-            landmarks = extract_hand_landmarks(img_path)
-            
-            if landmarks is not None:
-                X.append(landmarks)
-                y.append(gesture_idx)
-                successful += 1
-            else:
-                failed += 1
-        
-        print(f"{'✅' if successful > 0 else '❌'} {gesture:15} : {successful:4} samples ({failed} failed)")
+        for f in os.listdir(gesture_dir):
+            if f.endswith('.jpg'):
+                labels[os.path.join(gesture_dir, f)] = gesture_idx
+    
+    # Extract landmarks in parallel (cached results reused) and write each
+    # sample to disk as it arrives - only paths and counters stay in memory
+    successful = [0] * len(GESTURES)
+    failed = [0] * len(GESTURES)
+    stats = {}
+    writer = LandmarkDatasetWriter(DATASET_DIR, NUM_FEATURES, GESTURES, EXTRACTOR_SETTINGS)
+    for img_path, sample in iter_landmarks(list(labels), EXTRACTOR_SETTINGS, LANDMARK_CACHE_PATH,
+                                           EXTRACT_WORKERS, stats):
+        gesture_idx = labels[img_path]
+        if sample is not None:
+            writer.add(sample['landmarks'], gesture_idx, img_path,
+                       sample['handedness'], sample['score'])
+            successful[gesture_idx] += 1
+        else:
+            failed[gesture_idx] += 1
+    writer.close()
+    
+    for gesture_idx, gesture in enumerate(GESTURES):
+        print(f"{'✅' if successful[gesture_idx] > 0 else '❌'} {gesture:15} : "
+              f"{successful[gesture_idx]:4} samples ({failed[gesture_idx]} failed)")
     
     print("-" * 60)
+    print(f"Landmarks: {stats['cached']} cached, {stats['processed']} extracted ({EXTRACT_WORKERS} workers)")
     
-    if len(X) == 0:
+    dataset = LandmarkDataset(DATASET_DIR)
+    if len(dataset) == 0:
         raise ValueError("No valid samples found!")
     
-    X = np.array(X)
-    y = np.array(y)
-    
-    # Shuffle data
-    X, y = shuffle(X, y, random_state=42)
-    
-    print(f"Total samples: {len(X)}")
-    print(f"Feature shape: {X.shape}")
+    print(f"Total samples: {len(dataset)}")
+    print(f"Feature shape: {dataset.landmarks.shape} (memory-mapped from {DATASET_DIR}/)")
     print(f"Classes: {len(GESTURES)}\n")
     
-    return X, y
+    return dataset
 
 def create_model(input_shape, num_classes):
     """Create optimized model for Jetson Nano"""
@@ -136,11 +132,11 @@ def create_model(input_shape, num_classes):
     
     return model
 
-def train_model(X_train, y_train, X_val, y_val, num_classes):
-    """Train the model"""
+def train_model(dataset, train_idx, val_idx, num_classes):
+    """Train the model, streaming batches from the memory-mapped dataset"""
     
     print("🏗️  Building model...")
-    model = create_model((X_train.shape[1],), num_classes)
+    model = create_model((dataset.num_features,), num_classes)
     
     # Compile with proper optimizer
     optimizer = keras.optimizers.Adam(learning_rate=0.001)
@@ -178,11 +174,13 @@ def train_model(X_train, y_train, X_val, y_val, num_classes):
     print("\n🚀 Training model...")
     print("=" * 60)
     
+    train_ds = dataset.to_tf_dataset(train_idx, batch_size=BATCH_SIZE, shuffle=True)
+    val_ds = dataset.to_tf_dataset(val_idx, batch_size=BATCH_SIZE, shuffle=False)
+    
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
+        train_ds,
+        validation_data=val_ds,
         epochs=100,
-        batch_size=32,
         callbacks=callbacks,
         verbose=1
     )
@@ -212,28 +210,133 @@ def evaluate_model(model, X_test, y_test):
     
     return test_acc
 
-def convert_to_tflite(model):
-    """Convert model to TFLite for Jetson Nano"""
-    print("\n🔄 Converting to TFLite...")
+def per_class_accuracy(pred_classes, y_true):
+    """Accuracy per gesture index (None for classes absent from y_true)"""
+    accuracies = []
+    for i in range(len(GESTURES)):
+        mask = y_true == i
+        accuracies.append(float(np.mean(pred_classes[mask] == y_true[mask])) if np.sum(mask) > 0 else None)
+    return accuracies
+
+def representative_dataset(X_calib):
+    """Calibration samples for full-integer quantisation"""
+    def generator():
+        for row in X_calib:
+            yield [row.reshape(1, -1).astype(np.float32)]
+    return generator
+
+def check_int8_accuracy(model, tflite_model, X_test, y_test):
+    """
+    Compare the int8 TFLite model against the float Keras model on X_test.
+    Returns True if neither overall nor any per-class accuracy drops too far.
+    """
+    float_pred = np.argmax(model.predict(X_test, verbose=0), axis=1)
+    
+    classifier = TFLiteClassifier(model_content=tflite_model, max_batch=BATCH_SIZE)
+    int8_pred = np.concatenate([
+        np.argmax(classifier.classify(X_test[i:i + BATCH_SIZE]), axis=1)
+        for i in range(0, len(X_test), BATCH_SIZE)
+    ])
     
-    # Convert with optimization
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    float_acc = np.mean(float_pred == y_test)
+    int8_acc = np.mean(int8_pred == y_test)
+    print(f"Float accuracy: {float_acc*100:.2f}% | INT8 accuracy: {int8_acc*100:.2f}%")
     
-    # For Jetson Nano, we can use float16 for better performance
-    converter.target_spec.supported_types = [tf.float16]
+    passed = (float_acc - int8_acc) <= INT8_MAX_ACCURACY_DROP
     
-    tflite_model = converter.convert()
+    print("\nPer-Class Accuracy (float -> int8):")
+    print("-" * 40)
+    for gesture, f_acc, q_acc in zip(GESTURES, per_class_accuracy(float_pred, y_test),
+                                     per_class_accuracy(int8_pred, y_test)):
+        if f_acc is None:
+            continue
+        drop = f_acc - q_acc
+        flag = ""
+        if drop > INT8_MAX_CLASS_ACCURACY_DROP:
+            passed = False
+            flag = "  ❌ drop too large"
+        print(f"{gesture:15} : {f_acc*100:6.2f}% -> {q_acc*100:6.2f}%{flag}")
+    
+    return passed
+
+def convert_to_tflite(model, X_calib=None, X_test=None, y_test=None):
+    """Convert model to TFLite for Jetson Nano"""
+    print("\n🔄 Converting to TFLite...")
+    
+    tflite_model = None
+    quantization = TFLITE_QUANTIZATION
+    
+    if quantization == 'int8':
+        # Full-integer model: int8 weights, activations and input/output.
+        # float16 weights would just be dequantised back to float32 on the Nano's CPU
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(X_calib)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+        
+        int8_model = converter.convert()
+        
+        print("\n📏 Checking INT8 accuracy against float model...")
+        if check_int8_accuracy(model, int8_model, X_test, y_test):
+            tflite_model = int8_model
+        else:
+            print(f"⚠️  INT8 accuracy drop exceeds margin "
+                  f"({INT8_MAX_ACCURACY_DROP*100:.1f}% overall / {INT8_MAX_CLASS_ACCURACY_DROP*100:.1f}% per class)")
+            print("   Not writing INT8 model - falling back to float16")
+            quantization = 'float16'
+    
+    if tflite_model is None:
+        # Convert with optimization
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        
+        # For Jetson Nano, we can use float16 for better performance
+        converter.target_spec.supported_types = [tf.float16]
+        
+        tflite_model = converter.convert()
     
     # Save TFLite model
     tflite_path = os.path.join(MODEL_DIR, TFLITE_NAME)
     with open(tflite_path, 'wb') as f:
         f.write(tflite_model)
     
-    print(f"✅ TFLite model saved: {tflite_path}")
+    print(f"✅ TFLite model saved: {tflite_path} ({quantization})")
     print(f"   Size: {len(tflite_model) / 1024:.2f} KB")
     
-    return tflite_path
+    return tflite_path, quantization
+
+def export_numpy_weights(model):
+    """Export layer weights for the NumPy backend (gesture_classifier.NumpyMLPClassifier)"""
+    arrays = {}
+    specs = []
+    for layer in model.layers:
+        i = len(specs)
+        if isinstance(layer, layers.Dense):
+            kernel, bias = layer.get_weights()
+            specs.append('dense:' + layer.activation.__name__)
+            arrays[f'{i}_kernel'] = kernel
+            arrays[f'{i}_bias'] = bias
+        elif isinstance(layer, layers.BatchNormalization):
+            gamma, beta, mean, variance = layer.get_weights()
+            specs.append('batchnorm')
+            arrays[f'{i}_gamma'] = gamma
+            arrays[f'{i}_beta'] = beta
+            arrays[f'{i}_mean'] = mean
+            arrays[f'{i}_variance'] = variance
+            arrays[f'{i}_epsilon'] = np.float32(layer.epsilon)
+        elif isinstance(layer, layers.Activation):
+            specs.append('activation:' + layer.activation.__name__)
+        elif isinstance(layer, (layers.Dropout, layers.InputLayer)):
+            continue   # No-ops at inference time
+        else:
+            raise ValueError(f"Layer {layer.name} not supported by the NumPy backend")
+    
+    weights_path = os.path.join(MODEL_DIR, WEIGHTS_NAME)
+    np.savez(weights_path, layers=np.array(specs), **arrays)
+    print(f"✅ NumPy weights saved: {weights_path}")
+    return weights_path
 
 def save_gesture_labels():
     """Save gesture labels"""
@@ -249,22 +352,26 @@ def main():
     print("=" * 60)
     
     # Load dataset
-    X, y = load_dataset()
+    dataset = load_dataset()
+    y = np.asarray(dataset.labels)   # 1 byte per sample - fine to hold in memory
     
-    # Split dataset: 70% train, 15% validation, 15% test
-    X_train, X_temp, y_train, y_temp = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
+    # Split indices (not data): 70% train, 15% validation, 15% test
+    train_idx, temp_idx = train_test_split(
+        np.arange(len(y)), test_size=0.3, random_state=42, stratify=y
     )
-    X_val, X_test, y_val, y_test = train_test_split(
-        X_temp, y_temp, test_size=0.5, random_state=42, stratify=y_temp
+    val_idx, test_idx = train_test_split(
+        temp_idx, test_size=0.5, random_state=42, stratify=y[temp_idx]
     )
     
-    print(f"Training samples: {len(X_train)}")
-    print(f"Validation samples: {len(X_val)}")
-    print(f"Test samples: {len(X_test)}\n")
+    print(f"Training samples: {len(train_idx)}")
+    print(f"Validation samples: {len(val_idx)}")
+    print(f"Test samples: {len(test_idx)}\n")
     
     # Train model
-    model, history = train_model(X_train, y_train, X_val, y_val, len(GESTURES))
+    model, history = train_model(dataset, train_idx, val_idx, len(GESTURES))
+    
+    # Evaluation needs the test split in memory
+    X_test, y_test = dataset.take(test_idx)
     
     # Evaluate
     test_acc = evaluate_model(model, X_test, y_test)
@@ -274,8 +381,17 @@ def main():
     model.save(h5_path)
     print(f"\n✅ H5 model saved: {h5_path}")
     
-    # Convert to TFLite
-    tflite_path = convert_to_tflite(model)
+    # Convert to TFLite (INT8 is calibrated on a stratified sample of the training landmarks)
+    calib_idx = train_idx
+    if len(train_idx) > INT8_CALIBRATION_SAMPLES:
+        calib_idx, _ = train_test_split(
+            train_idx, train_size=INT8_CALIBRATION_SAMPLES, random_state=42, stratify=y[train_idx]
+        )
+    X_calib, _ = dataset.take(calib_idx)
+    tflite_path, quantization = convert_to_tflite(model, X_calib, X_test, y_test)
+    
+    # Weights for the TensorFlow-free NumPy backend
+    export_numpy_weights(model)
     
     # Save labels
     save_gesture_labels()
@@ -284,9 +400,14 @@ def main():
     info = {
         'gestures': GESTURES,
         'test_accuracy': float(test_acc),
-        'total_samples': int(len(X)),
-        'input_shape': [int(x) for x in X.shape[1:]],
-        'num_classes': len(GESTURES)
+        'total_samples': int(len(dataset)),
+        'input_shape': [int(dataset.num_features)],
+        'num_classes': len(GESTURES),
+        'tflite_quantization': quantization,
+        'features': {
+            'num_features': int(dataset.num_features),
+            'normalize': FEATURE_NORMALIZE
+        }
     }
     
     info_path = os.path.join(MODEL_DIR, 'model_info.json')
@@ -299,10 +420,10 @@ def main():
     print(f"📁 Models directory: {MODEL_DIR}/")
     print(f"   - {MODEL_NAME} (H5 format)")
     print(f"   - {TFLITE_NAME} (TFLite format for Jetson)")
+    print(f"   - {WEIGHTS_NAME} (NumPy backend weights)")
     print(f"   - gesture_labels.txt")
     print(f"   - model_info.json")
     print("=" * 60 + "\n")
 
 if __name__ == "__main__":
     main()
-    hands.close()
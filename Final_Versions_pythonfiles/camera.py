@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latest-frame camera grabber
+A background thread keeps draining the V4L2 queue so consumers always
+get the newest frame (with its capture timestamp) instead of whatever
+stale frame the driver buffered while detection was busy.
+"""
+
+import cv2
+import time
+import threading
+
+
+# ==================== LATEST FRAME CAMERA ====================
+class LatestFrameCamera:
+    """Background grabber that only ever hands out the newest frame"""
+
+    def __init__(self, index, width, height, fps=30, metrics=None):
+        self.cap = cv2.VideoCapture(index)
+        if self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # Not honoured by every driver - we drain anyway
+
+        self.metrics = metrics
+        self.cond = threading.Condition()
+        self.latest = None           # (frame_id, capture_time, frame, grab_span)
+        self.last_read_id = 0
+        self.frames_grabbed = 0
+        self.frames_dropped = 0      # Grabbed but replaced before anyone read them
+        self.running = False
+        self.thread = None
+
+    # ---------------------------------------------------------- public ----
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def get_resolution(self):
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._grab_loop, name='camera-grab', daemon=True)
+        self.thread.start()
+        return self
+
+    def read(self, timeout=0.1):
+        """
+        Wait for a frame newer than the last one returned.
+        Returns (frame, capture_time, frame_id) or None on timeout/stop.
+        """
+        latest = self._take(timeout)
+        if latest is None:
+            return None
+        frame_id, capture_time, frame, _ = latest
+        return frame, capture_time, frame_id
+
+    def get(self, timeout=0.1):
+        """Queue-style access so the camera can feed a pipeline stage directly"""
+        latest = self._take(timeout)
+        if latest is None:
+            return None
+        frame_id, capture_time, frame, grab_span = latest
+        return {
+            'frame_id': frame_id,
+            'capture_time': capture_time,
+            'grab_span': grab_span,    # (grab start, retrieve end) for tracing
+            'frame': frame
+        }
+
+    def qsize(self):
+        with self.cond:
+            return int(self.latest is not None and self.latest[0] != self.last_read_id)
+
+    @property
+    def dropped(self):
+        return self.frames_dropped
+
+    def release(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.cap.release()
+
+    # -------------------------------------------------------- internal ----
+    def _take(self, timeout):
+        with self.cond:
+            if self.latest is None or self.latest[0] == self.last_read_id:
+                self.cond.wait(timeout)
+            if self.latest is None or self.latest[0] == self.last_read_id:
+                return None
+            self.last_read_id = self.latest[0]
+            return self.latest
+
+    def _grab_loop(self):
+        while self.running:
+            grab_start = time.time()
+            if not self.cap.grab():
+                break
+            # Timestamp as soon as the driver hands the frame over, before decode
+            capture_time = time.time()
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                break
+
+            grab_end = time.time()
+            if self.metrics is not None:
+                self.metrics.update_stage('capture', grab_end - grab_start)
+
+            with self.cond:
+                self.frames_grabbed += 1
+                if self.latest is not None and self.latest[0] != self.last_read_id:
+                    self.frames_dropped += 1
+                self.latest = (self.frames_grabbed, capture_time, frame, (grab_start, grab_end))
+                self.cond.notify_all()
+
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared-frame detector scheduler
+Each camera frame is converted to RGB exactly once into a read-only
+buffer that every detector reads (MediaPipe passes read-only images by
+reference instead of copying them). Each detector - e.g. the face and
+hand MediaPipe graphs - runs on its own worker thread at its own target
+rate, so the graphs overlap instead of running back to back, and their
+results are merged per frame by capture timestamp.
+"""
+
+import cv2
+import time
+import threading
+from collections import OrderedDict, namedtuple
+
+# ==================== CONFIGURATION ====================
+RATE_SLACK = 0.1             # A detector may run up to 10% of its interval early
+COLLECT_TIMEOUT = 1.0        # Seconds collect() waits for a blocking detector
+
+
+# One detector's output, tagged with the frame it was computed on.
+# fresh is True only the first time a result is collected.
+DetectorResult = namedtuple('DetectorResult',
+                            ['name', 'frame_id', 'timestamp', 'value', 'duration', 'fresh'])
+
+
+# ==================== SHARED FRAME ====================
+class SharedFrame:
+    """One captured frame: the original BGR image plus its RGB copy (read-only)"""
+
+    __slots__ = ('frame_id', 'timestamp', 'bgr', 'rgb', 'dispatched')
+
+    def __init__(self, frame_id, timestamp, bgr, rgb):
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.bgr = bgr
+        self.rgb = rgb
+        self.dispatched = ()     # Names of the detectors this frame was handed to
+
+
+# ==================== DETECTOR WORKER ====================
+class DetectorWorker:
+    """
+    Runs detect(rgb) on its own thread for frames handed to it by the
+    scheduler. There is a single input slot: a detector that is still
+    busy is simply not given the next frame, so it never falls behind.
+    """
+
+    def __init__(self, name, detect, rate_hz=None, blocking=True, empty=None):
+        self.name = name
+        self.detect = detect
+        self.interval = 1.0 / rate_hz if rate_hz else 0.0
+        self.blocking = blocking     # collect() waits for this detector's result
+        self.empty = empty           # Value reported before the first result
+
+        self.cond = threading.Condition()
+        self.pending = None
+        self.busy = False
+        self.result = None
+        self.collected_id = -1
+        self.next_due = 0.0
+        self.error = None
+        self.stop_event = None
+        self.thread = None
+
+        self.runs = 0
+        self.busy_skips = 0
+        self.busy_time = 0.0
+
+    def start(self, stop_event):
+        self.stop_event = stop_event
+        self.thread = threading.Thread(target=self._run, name='detect-' + self.name, daemon=True)
+        self.thread.start()
+
+    def is_due(self, timestamp):
+        return timestamp >= self.next_due - self.interval * RATE_SLACK
+
+    def offer(self, shared):
+        """Hand over a frame if the detector is due and idle; returns True if taken"""
+        if not self.is_due(shared.timestamp):
+            return False
+        with self.cond:
+            if self.busy:
+                self.busy_skips += 1
+                return False
+            self.pending = shared
+            self.busy = True
+            self.cond.notify()
+        # Keep the phase so the average rate matches rate_hz, but never bank a backlog
+        self.next_due = max(self.next_due + self.interval, shared.timestamp)
+        return True
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            with self.cond:
+                if self.pending is None:
+                    self.cond.wait(0.1)
+                    continue
+                shared = self.pending
+                self.pending = None
+
+            start = time.time()
+            try:
+                value = self.detect(shared.rgb)
+            except Exception as e:
+                # Surface the failure on the main thread at the next collect()
+                value = self.empty
+                self.error = e
+            duration = time.time() - start
+
+            with self.cond:
+                self.result = DetectorResult(self.name, shared.frame_id, shared.timestamp,
+                                             value, duration, True)
+                self.busy = False
+                self.runs += 1
+                self.busy_time += duration
+                self.cond.notify_all()
+
+    def wait_for(self, frame_id, timeout):
+        """Block until the result for frame_id (or a later one) is in"""
+        deadline = time.time() + timeout
+        with self.cond:
+            while self.result is None or self.result.frame_id < frame_id:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self.error is not None:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+    def latest(self, timestamp):
+        """Newest result computed on a frame no later than timestamp"""
+        with self.cond:
+            result = self.result
+        if result is None or result.timestamp > timestamp:
+            return DetectorResult(self.name, -1, 0.0, self.empty, 0.0, False)
+        fresh = result.frame_id > self.collected_id
+        self.collected_id = max(self.collected_id, result.frame_id)
+        return result._replace(fresh=fresh)
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+
+# ==================== SCHEDULER ====================
+class DetectorScheduler:
+    """
+    add() each detector, start(), then per frame:
+
+        shared = scheduler.submit(frame, capture_time, wanted={'face', 'hands'})
+        results = scheduler.collect(shared)
+        faces = results['face'].value
+
+    submit() does the one BGR->RGB conversion and hands the frame to
+    every wanted detector that is due at its rate. collect() waits only
+    for the blocking detectors given this frame; the rest report their
+    newest result from this frame or an earlier one (fresh=False if it
+    was already collected).
+    """
+
+    def __init__(self, collect_timeout=COLLECT_TIMEOUT):
+        self.collect_timeout = collect_timeout
+        self.workers = OrderedDict()
+        self.stop_event = threading.Event()
+        self.frames = 0
+        self.color_time = 0.0
+
+    def add(self, name, detect, rate_hz=None, blocking=True, empty=None):
+        """
+        detect(rgb) -> value runs on the detector's thread; rgb is read-only.
+        rate_hz=None runs it on every frame it is offered.
+        """
+        worker = DetectorWorker(name, detect, rate_hz, blocking, empty)
+        self.workers[name] = worker
+        return worker
+
+    def start(self):
+        for worker in self.workers.values():
+            worker.start(self.stop_event)
+        return self
+
+    def submit(self, frame, timestamp=None, wanted=None):
+        """Convert frame once and dispatch it; wanted limits which detectors may run"""
+        timestamp = time.time() if timestamp is None else timestamp
+
+        start = time.time()
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb.flags.writeable = False   # Shared by every worker - nobody may draw on it
+        self.color_time += time.time() - start
+
+        shared = SharedFrame(self.frames, timestamp, frame, rgb)
+        self.frames += 1
+        shared.dispatched = tuple(
+            name for name, worker in self.workers.items()
+            if (wanted is None or name in wanted) and worker.offer(shared))
+        return shared
+
+    def collect(self, shared):
+        """{name: DetectorResult} for this frame, merged by capture timestamp"""
+        for name in shared.dispatched:
+            worker = self.workers[name]
+            if worker.blocking:
+                worker.wait_for(shared.frame_id, self.collect_timeout)
+
+        results = OrderedDict()
+        for name, worker in self.workers.items():
+            if worker.error is not None:
+                error, worker.error = worker.error, None
+                raise RuntimeError("Detector '{}' failed: {}".format(name, error)) from error
+            results[name] = worker.latest(shared.timestamp)
+        return results
+
+    def stats(self):
+        """Per-detector runs, busy skips and average run time (ms)"""
+        return OrderedDict(
+            (name, {'runs': w.runs,
+                    'busy_skips': w.busy_skips,
+                    'avg_ms': w.busy_time / w.runs * 1000 if w.runs else 0.0})
+            for name, w in self.workers.items())
+
+    def avg_color_ms(self):
+        return self.color_time / self.frames * 1000 if self.frames else 0.0
+
+    def stop(self):
+        self.stop_event.set()
+        for worker in self.workers.values():
+            worker.join(timeout=1.0)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Display / headless run mode
+Windowed: every frame is drawn and shown, 'q' quits.
+Headless: nothing is drawn or shown; SIGINT/SIGTERM request shutdown.
+An optional low-rate preview (e.g. 5 FPS) can be kept in headless mode
+for debugging - only those frames pay the drawing cost.
+"""
+
+import cv2
+import time
+import signal
+import threading
+
+
+# ==================== DISPLAY ====================
+class Display:
+    """Decides which frames get rendered and owns the shutdown signal"""
+
+    def __init__(self, window_name, headless=False, preview_fps=0):
+        self.window_name = window_name
+        self.headless = headless
+        self.preview_interval = 1.0 / preview_fps if preview_fps > 0 else None
+        self.last_preview = 0.0
+        self.window_open = False
+        self.shutdown = threading.Event()
+        self.signal_name = None
+
+    def install_signal_handlers(self):
+        """Must be called from the main thread"""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+        self.signal_name = signal.Signals(signum).name
+        self.shutdown.set()
+
+    def should_render(self):
+        """True if the current frame will be shown - skip all drawing otherwise"""
+        if not self.headless:
+            return True
+        if self.preview_interval is None:
+            return False
+        return time.time() - self.last_preview >= self.preview_interval
+
+    def show(self, frame):
+        cv2.imshow(self.window_name, frame)
+        self.window_open = True
+        self.last_preview = time.time()
+
+    def quit_pressed(self):
+        """Poll the window for 'q' - also lets HighGUI process its events"""
+        return self.window_open and cv2.waitKey(1) & 0xFF == ord('q')
+
+    def close(self):
+        if self.window_open:
+            cv2.destroyAllWindows()
+            self.window_open = False
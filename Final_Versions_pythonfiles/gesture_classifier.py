@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched gesture classifier backends
+All hands found in a frame are stacked into one (N, 42) batch and
+scored in a single call. Three interchangeable backends:
+  'tflite'         - tf.lite.Interpreter (needs the full tensorflow package)
+  'tflite_runtime' - the standalone tflite_runtime interpreter
+  'numpy'          - plain matmuls over weights exported from the .h5,
+                     with BatchNorm folded into the Dense layers
+Every backend exposes num_features, num_classes, max_batch, name and
+classify(batch) -> (N, num_classes) float32 probabilities.
+"""
+
+import os
+import time
+import importlib.util
+import numpy as np
+
+# ==================== CONFIGURATION ====================
+MAX_BATCH = 4   # Largest number of hands scored in one invoke
+BACKENDS = ('auto', 'numpy', 'tflite_runtime', 'tflite')
+DEFAULT_BACKEND = 'auto'
+BENCHMARK_ITERATIONS = 200   # classify() calls per candidate when 'auto' picks a backend
+
+
+# ==================== TFLITE BACKEND ====================
+class TFLiteClassifier:
+    """TFLite classifier with one input-resized interpreter per batch size"""
+
+    def __init__(self, model_path=None, max_batch=MAX_BATCH, model_content=None, runtime='tflite'):
+        # model_content lets the trainer check a converted model before writing it
+        self.model_path = model_path
+        self.model_content = model_content
+        self.max_batch = max_batch
+        self.name = runtime
+        self.interpreters = {}   # batch size -> (interpreter, input_index, output_index)
+
+        if runtime == 'tflite_runtime':
+            from tflite_runtime.interpreter import Interpreter
+        elif runtime == 'tflite':
+            import tensorflow as tf   # Multi-second import - only paid when this backend is used
+            Interpreter = tf.lite.Interpreter
+        else:
+            raise ValueError("Unknown TFLite runtime '{}'".format(runtime))
+        self.interpreter_class = Interpreter
+
+        interpreter = self._new_interpreter()
+        input_details = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        self.num_features = int(input_details['shape'][-1])
+        self.num_classes = int(output_details['shape'][-1])
+        self.input_shape = input_details['shape']
+
+        # Integer models: real = scale * (q - zero_point)
+        self.input_dtype = input_details['dtype']
+        self.output_dtype = output_details['dtype']
+        self.input_scale, self.input_zero_point = input_details['quantization']
+        self.output_scale, self.output_zero_point = output_details['quantization']
+        self.quantized = np.issubdtype(self.input_dtype, np.integer)
+
+        self._prepare(interpreter, 1)
+
+    def _new_interpreter(self):
+        if self.model_content is not None:
+            return self.interpreter_class(model_content=self.model_content)
+        return self.interpreter_class(model_path=self.model_path)
+
+    def _prepare(self, interpreter, batch_size):
+        # Resizing is only done once per batch size - switching between
+        # 1 and 2 hands must not reallocate tensors every frame
+        input_details = interpreter.get_input_details()[0]
+        if input_details['shape'][0] != batch_size:
+            interpreter.resize_tensor_input(input_details['index'], [batch_size, self.num_features])
+        interpreter.allocate_tensors()
+
+        entry = (interpreter, input_details['index'], interpreter.get_output_details()[0]['index'])
+        self.interpreters[batch_size] = entry
+        return entry
+
+    def _get(self, batch_size):
+        entry = self.interpreters.get(batch_size)
+        if entry is None:
+            entry = self._prepare(self._new_interpreter(), batch_size)
+        return entry
+
+    def quantize_input(self, batch):
+        info = np.iinfo(self.input_dtype)
+        q = np.round(batch / self.input_scale + self.input_zero_point)
+        return np.clip(q, info.min, info.max).astype(self.input_dtype)
+
+    def dequantize_output(self, output):
+        if not np.issubdtype(self.output_dtype, np.integer):
+            return output
+        return (output.astype(np.float32) - self.output_zero_point) * self.output_scale
+
+    def classify(self, batch):
+        """
+        Score a (N, num_features) float32 batch.
+        Returns an (N, num_classes) float32 array of class probabilities.
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        if len(batch) > self.max_batch:
+            batch = batch[:self.max_batch]
+        if self.quantized:
+            batch = self.quantize_input(batch)
+
+        interpreter, input_index, output_index = self._get(len(batch))
+        interpreter.set_tensor(input_index, batch)
+        interpreter.invoke()
+        return self.dequantize_output(interpreter.get_tensor(output_index))
+
+
+# ==================== NUMPY MLP BACKEND ====================
+# Weights file written by Train_Simple_Model.export_numpy_weights():
+#   'layers'        array of layer specs in model order: 'dense:<activation>',
+#                   'batchnorm' or 'activation:<name>'
+#   '<i>_kernel', '<i>_bias'                            for dense layer i
+#   '<i>_gamma', '<i>_beta', '<i>_mean', '<i>_variance', '<i>_epsilon'  for batchnorm i
+ACTIVATIONS = ('linear', 'relu', 'softmax')
+
+
+def fold_layers(weights):
+    """
+    Turn the exported layer list into [(W, b, activation), ...].
+    Inference-time BatchNorm is an affine x * s + t, so it is merged into
+    the Dense layer before it (or after it, for a BatchNorm on the input).
+    """
+    dense = []
+    pending = None   # (s, t) of a BatchNorm not yet preceded by a Dense layer
+
+    for i, spec in enumerate(weights['layers']):
+        kind, _, arg = str(spec).partition(':')
+
+        if kind == 'dense':
+            W = weights['{}_kernel'.format(i)].astype(np.float64)
+            b = weights['{}_bias'.format(i)].astype(np.float64)
+            if pending is not None:
+                s, t = pending
+                b = t.dot(W) + b
+                W = s[:, None] * W
+                pending = None
+            dense.append([W, b, arg or 'linear'])
+
+        elif kind == 'batchnorm':
+            s = weights['{}_gamma'.format(i)] / np.sqrt(
+                weights['{}_variance'.format(i)] + float(weights['{}_epsilon'.format(i)]))
+            t = weights['{}_beta'.format(i)] - weights['{}_mean'.format(i)] * s
+            s, t = s.astype(np.float64), t.astype(np.float64)
+            if not dense:
+                if pending is not None:
+                    s, t = pending[0] * s, pending[1] * s + t
+                pending = (s, t)
+            elif dense[-1][2] == 'linear':
+                dense[-1][0] = dense[-1][0] * s
+                dense[-1][1] = dense[-1][1] * s + t
+            else:
+                raise ValueError("Cannot fold BatchNorm that follows a non-linear activation")
+
+        elif kind == 'activation':
+            if not dense or dense[-1][2] != 'linear':
+                raise ValueError("Activation '{}' has no Dense layer to attach to".format(arg))
+            dense[-1][2] = arg
+
+        else:
+            raise ValueError("Unsupported layer '{}' in weights file".format(spec))
+
+    if pending is not None or not dense:
+        raise ValueError("Weights file has no Dense layer")
+    for _, _, activation in dense:
+        if activation not in ACTIVATIONS:
+            raise ValueError("Unsupported activation '{}'".format(activation))
+
+    return [(W.astype(np.float32), b.astype(np.float32), activation) for W, b, activation in dense]
+
+
+class NumpyMLPClassifier:
+    """Dense forward pass in NumPy - no TensorFlow import at all"""
+
+    def __init__(self, weights_path, max_batch=MAX_BATCH):
+        self.weights_path = weights_path
+        self.max_batch = max_batch
+        self.name = 'numpy'
+
+        with np.load(weights_path) as weights:
+            self.layers = fold_layers(weights)
+        self.num_features = self.layers[0][0].shape[0]
+        self.num_classes = self.layers[-1][0].shape[1]
+        self.input_shape = np.array([1, self.num_features])
+
+    def classify(self, batch):
+        """
+        Score a (N, num_features) float32 batch.
+        Returns an (N, num_classes) float32 array of class probabilities.
+        """
+        x = np.asarray(batch, dtype=np.float32)
+        if len(x) > self.max_batch:
+            x = x[:self.max_batch]
+
+        for W, b, activation in self.layers:
+            x = x.dot(W)
+            x += b
+            if activation == 'relu':
+                np.maximum(x, 0, out=x)
+            elif activation == 'softmax':
+                x -= x.max(axis=1, keepdims=True)
+                np.exp(x, out=x)
+                x /= x.sum(axis=1, keepdims=True)
+        return x
+
+
+# ==================== BACKEND SELECTION ====================
+def tflite_runtime_available():
+    return importlib.util.find_spec('tflite_runtime') is not None
+
+
+def benchmark(classifier, batch_size=1, iterations=BENCHMARK_ITERATIONS):
+    """Mean classify() time in ms on a dummy batch"""
+    batch = np.random.RandomState(0).rand(batch_size, classifier.num_features).astype(np.float32)
+    classifier.classify(batch)   # Warm-up (allocations, caches)
+    start = time.time()
+    for _ in range(iterations):
+        classifier.classify(batch)
+    return (time.time() - start) * 1000 / iterations
+
+
+def load_classifier(backend=DEFAULT_BACKEND, model_path=None, weights_path=None, max_batch=MAX_BATCH):
+    """
+    Build the requested backend. 'auto' benchmarks the backends that do not
+    need the full tensorflow package and keeps the fastest; tf.lite is only
+    the fallback when neither numpy weights nor tflite_runtime are available.
+    """
+    if backend == 'numpy':
+        return NumpyMLPClassifier(weights_path, max_batch)
+    if backend in ('tflite', 'tflite_runtime'):
+        return TFLiteClassifier(model_path, max_batch, runtime=backend)
+    if backend != 'auto':
+        raise ValueError("Unknown backend '{}' (use one of {})".format(backend, ', '.join(BACKENDS)))
+
+    candidates = []
+    if weights_path and os.path.exists(weights_path):
+        candidates.append(NumpyMLPClassifier(weights_path, max_batch))
+    if model_path and os.path.exists(model_path) and tflite_runtime_available():
+        candidates.append(TFLiteClassifier(model_path, max_batch, runtime='tflite_runtime'))
+
+    if not candidates:
+        return TFLiteClassifier(model_path, max_batch, runtime='tflite')
+    if len(candidates) == 1:
+        return candidates[0]
+    return min(candidates, key=benchmark)
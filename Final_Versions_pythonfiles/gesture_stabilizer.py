@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental gesture stability voter
+Replaces the per-frame np.unique over the prediction buffer: per-class
+counts and confidence sums are updated as predictions enter and leave
+the window, so each frame costs O(1) whatever the window or class count.
+
+Policies:
+  'majority'   - most frequent gesture in the window, if seen at least
+                 min_count times with mean confidence above threshold
+                 (what the main loop always did)
+  'ema'        - exponential moving average of each gesture's confidence;
+                 the top gesture is stable once its average passes threshold
+  'hysteresis' - majority to enter, but an active gesture is only dropped
+                 when it falls below the lower release thresholds
+"""
+
+from collections import deque
+
+# ==================== CONFIGURATION ====================
+POLICIES = ('majority', 'ema', 'hysteresis')
+DEFAULT_POLICY = 'majority'
+WINDOW = 5
+MIN_COUNT = 3
+THRESHOLD = 0.70
+EMA_ALPHA = 0.5
+RELEASE_COUNT = 2           # Hysteresis: votes an active gesture needs to stay active
+RELEASE_THRESHOLD = 0.55    # Hysteresis: confidence an active gesture needs to stay active
+RESCALE_BELOW = 1e-30       # EMA: fold the shared decay back into the scores below this
+
+
+# ==================== GESTURE STABILIZER ====================
+class GestureStabilizer:
+    """
+    update(gesture_idx, confidence) -> (gesture_idx, avg_confidence) of the
+    stable gesture, or None while nothing is stable.
+    """
+
+    def __init__(self, num_classes, policy=DEFAULT_POLICY, window=WINDOW, min_count=MIN_COUNT,
+                 threshold=THRESHOLD, ema_alpha=EMA_ALPHA,
+                 release_count=RELEASE_COUNT, release_threshold=RELEASE_THRESHOLD):
+        if policy not in POLICIES:
+            raise ValueError("Unknown policy '{}' (use one of {})".format(policy, ', '.join(POLICIES)))
+        if not 0.0 < ema_alpha < 1.0:
+            raise ValueError("ema_alpha must be between 0 and 1")
+        self.num_classes = num_classes
+        self.policy = policy
+        self.window = window
+        self.min_count = min_count
+        self.threshold = threshold
+        self.ema_alpha = ema_alpha
+        self.release_count = release_count
+        self.release_threshold = release_threshold
+
+        self.votes = deque()
+        self.counts = [0] * num_classes
+        self.conf_sums = [0.0] * num_classes
+        # buckets[c] = classes currently seen c times; the top non-empty
+        # bucket gives the most common gesture without scanning every class
+        self.buckets = [set(range(num_classes))] + [set() for _ in range(window)]
+        self.max_count = 0
+        self.leader = None
+
+        # EMA scores are stored divided by a shared decay factor, so decaying
+        # every class is one multiply instead of a pass over all of them
+        self.ema_raw = [0.0] * num_classes
+        self.ema_scale = 1.0
+        self.ema_leader = None
+
+        self.active = None   # Hysteresis: gesture currently held
+
+    def __len__(self):
+        return len(self.votes)
+
+    def reset(self):
+        """Forget all votes (hand lost / invalid gesture)"""
+        while self.votes:
+            self._remove(*self.votes.popleft())
+        self.leader = None
+        self.ema_raw = [0.0] * self.num_classes
+        self.ema_scale = 1.0
+        self.ema_leader = None
+        self.active = None
+
+    def update(self, gesture_idx, confidence):
+        gesture_idx = int(gesture_idx)
+        confidence = float(confidence)
+
+        if self.policy == 'ema':
+            return self._update_ema(gesture_idx, confidence)
+
+        if len(self.votes) == self.window:
+            self._remove(*self.votes.popleft())
+        self.votes.append((gesture_idx, confidence))
+        self._add(gesture_idx, confidence)
+
+        if self.policy == 'hysteresis':
+            return self._hysteresis()
+        return self._majority(self.min_count, self.threshold)
+
+    # ------------------------------------------------------- counting ----
+    def _add(self, idx, confidence):
+        count = self.counts[idx]
+        self.buckets[count].discard(idx)
+        self.buckets[count + 1].add(idx)
+        self.counts[idx] = count + 1
+        self.conf_sums[idx] += confidence
+
+        if count + 1 >= self.max_count:
+            self.max_count = count + 1
+            self.leader = idx   # Ties go to the gesture seen most recently
+
+    def _remove(self, idx, confidence):
+        count = self.counts[idx]
+        self.buckets[count].discard(idx)
+        self.buckets[count - 1].add(idx)
+        self.counts[idx] = count - 1
+        if count == 1:
+            self.conf_sums[idx] = 0.0   # Also drops accumulated float error
+        else:
+            self.conf_sums[idx] -= confidence
+
+        if count == self.max_count and not self.buckets[count]:
+            self.max_count = count - 1
+        if idx == self.leader and self.counts[idx] < self.max_count:
+            self.leader = next(iter(self.buckets[self.max_count]))
+
+    def _majority(self, min_count, threshold):
+        idx = self.leader
+        if idx is None or self.counts[idx] < min_count:
+            return None
+        avg_confidence = self.conf_sums[idx] / self.counts[idx]
+        if avg_confidence <= threshold:
+            return None
+        return idx, avg_confidence
+
+    # -------------------------------------------------------- policies ----
+    def _hysteresis(self):
+        if self.active is not None:
+            held = self.counts[self.active]
+            if held >= self.release_count and \
+               self.conf_sums[self.active] / held > self.release_threshold:
+                return self.active, self.conf_sums[self.active] / held
+            self.active = None
+
+        stable = self._majority(self.min_count, self.threshold)
+        if stable is not None:
+            self.active = stable[0]
+        return stable
+
+    def _update_ema(self, idx, confidence):
+        # score_k <- (1 - a) * score_k + a * (confidence if k == idx else 0)
+        a = self.ema_alpha
+        self.ema_scale *= (1.0 - a)
+        if self.ema_scale < RESCALE_BELOW:
+            self.ema_raw = [v * self.ema_scale for v in self.ema_raw]
+            self.ema_scale = 1.0
+        self.ema_raw[idx] += a * confidence / self.ema_scale
+
+        # Every other score decayed by the same factor, so only idx can take the lead
+        if self.ema_leader is None or self.ema_raw[idx] >= self.ema_raw[self.ema_leader]:
+            self.ema_leader = idx
+
+        score = self.ema_raw[self.ema_leader] * self.ema_scale
+        if score <= self.threshold:
+            return None
+        return self.ema_leader, score
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive hand region-of-interest tracking
+Once a hand is found, later frames only colour-convert, mirror and run
+MediaPipe on a padded square crop around the last landmark bounding box,
+resized to a fixed target size. Crops go to their own Hands instance, so
+neither graph's tracking state ever sees the other's image size.
+Landmarks are copied into full-frame (mirrored) coordinates, so
+everything downstream is unchanged.
+A full-frame scan runs every N frames (to pick up new hands) and
+whenever the crop loses the hand.
+"""
+
+import cv2
+from tracing import NULL_TRACE
+
+# ==================== CONFIGURATION ====================
+ROI_PADDING = 0.4            # Extra margin on each side, as a fraction of the hand box size
+ROI_TARGET_SIZE = 224        # Crop side (px) after resizing - every crop has this size
+ROI_MIN_SIZE = 96            # Never crop smaller than this (px) - fast hands leave small boxes
+ROI_MAX_FRACTION = 0.8       # Crops bigger than this share of the frame just use the full frame
+FULL_SCAN_INTERVAL = 15      # Frames between forced full-frame scans
+
+
+# ==================== ROI TRACKER ====================
+class HandROITracker:
+    """
+    Runs MediaPipe Hands on a tracked crop, falling back to the full frame.
+    hands only ever sees full frames and roi_hands only fixed-size crops;
+    the tracker owns roi_hands and close() releases it.
+    """
+
+    def __init__(self, hands, roi_hands, padding=ROI_PADDING, target_size=ROI_TARGET_SIZE,
+                 full_scan_interval=FULL_SCAN_INTERVAL, mirror=True):
+        self.hands = hands
+        self.roi_hands = roi_hands
+        self.padding = padding
+        self.target_size = target_size
+        self.full_scan_interval = full_scan_interval
+        self.mirror = mirror
+
+        self.roi = None              # (x0, y0, x1, y1) in mirrored full-frame pixels
+        self.frames_since_full = 0
+        self.full_scans = 0
+        self.roi_scans = 0
+        self.roi_misses = 0          # Crops that lost the hand and needed a rescan
+
+    def process(self, frame, trace=NULL_TRACE):
+        """
+        Detect hands in an un-mirrored BGR frame.
+        Returns MediaPipe results with landmarks in mirrored full-frame
+        normalised coordinates, exactly as a full-frame scan would give
+        (crop results are remapped into copies, never modified in place).
+        Colour conversion and MediaPipe time go to trace's 'color' / 'detect' spans.
+        """
+        h, w = frame.shape[:2]
+
+        if self.roi is not None and self.frames_since_full < self.full_scan_interval:
+            results = self._process_roi(frame, w, h, trace)
+            if results.multi_hand_landmarks:
+                self.frames_since_full += 1
+                self._update_roi(results, w, h)
+                return results
+            # Tracking lost - rescan this same frame rather than drop it
+            self.roi_misses += 1
+
+        results = self._process_full(frame, trace)
+        self.frames_since_full = 0
+        self._update_roi(results, w, h)
+        return results
+
+    def roi_ratio(self):
+        total = self.full_scans + self.roi_scans
+        return self.roi_scans / total if total else 0.0
+
+    def close(self):
+        self.roi_hands.close()
+
+    # -------------------------------------------------------- internal ----
+    def _process_full(self, frame, trace):
+        self.full_scans += 1
+        with trace.span('color'):
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if self.mirror:
+                rgb = cv2.flip(rgb, 1)
+        with trace.span('detect'):
+            return self.hands.process(rgb)
+
+    def _process_roi(self, frame, w, h, trace):
+        self.roi_scans += 1
+        x0, y0, x1, y1 = self.roi
+        # The mirrored crop [x0:x1] is the source region [w - x1 : w - x0] flipped
+        sx0, sx1 = (w - x1, w - x0) if self.mirror else (x0, x1)
+        crop = frame[y0:y1, sx0:sx1]
+
+        side = x1 - x0               # Crops are always square
+        with trace.span('color'):
+            # Fixed input size for roi_hands, whatever the hand's distance
+            interpolation = cv2.INTER_AREA if side > self.target_size else cv2.INTER_LINEAR
+            crop = cv2.resize(crop, (self.target_size, self.target_size),
+                              interpolation=interpolation)
+
+            rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+            if self.mirror:
+                rgb = cv2.flip(rgb, 1)
+        with trace.span('detect'):
+            results = self.roi_hands.process(rgb)
+
+        if not results.multi_hand_landmarks:
+            return results
+        # Crop-normalised -> full-frame-normalised (z is scaled like x by MediaPipe)
+        remapped = []
+        for hand_landmarks in results.multi_hand_landmarks:
+            hand = type(hand_landmarks)()
+            hand.CopyFrom(hand_landmarks)
+            for lm in hand.landmark:
+                lm.x = (x0 + lm.x * side) / w
+                lm.y = (y0 + lm.y * side) / h
+                lm.z = lm.z * side / w
+            remapped.append(hand)
+        return results._replace(multi_hand_landmarks=remapped)
+
+    def _update_roi(self, results, w, h):
+        if not results.multi_hand_landmarks:
+            self.roi = None
+            return
+
+        xs = [lm.x for hand in results.multi_hand_landmarks for lm in hand.landmark]
+        ys = [lm.y for hand in results.multi_hand_landmarks for lm in hand.landmark]
+        bx0, bx1 = min(xs) * w, max(xs) * w
+        by0, by1 = min(ys) * h, max(ys) * h
+
+        # Square box around the hand(s) plus padding
+        side = max(bx1 - bx0, by1 - by0) * (1.0 + 2.0 * self.padding)
+        side = max(side, ROI_MIN_SIZE)
+        if side >= ROI_MAX_FRACTION * min(w, h):
+            self.roi = None
+            return
+
+        # Shift (rather than clip) the box into the frame so it stays square
+        side = int(side)
+        cx, cy = (bx0 + bx1) / 2.0, (by0 + by1) / 2.0
+        x0 = int(min(max(0, cx - side / 2.0), w - side))
+        y0 = int(min(max(0, cy - side / 2.0), h - side))
+        self.roi = (x0, y0, x0 + side, y0 + side)
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel, cached landmark extraction for the training dataset
+Images are processed in a process pool (one MediaPipe Hands per worker)
+and results are cached on disk keyed by file path + mtime + extractor
+settings, so a retrain only touches new or changed images.
+
+Extracted samples are stored in a compact binary dataset
+(float32 landmark matrix + uint8 labels + per-sample metadata) that is
+memory-mapped for training and streamed through tf.data.
+"""
+
+import cv2
+import mediapipe as mp
+import numpy as np
+import json
+import os
+import multiprocessing
+
+from landmark_features import LandmarkExtractor, NUM_FEATURES, DEFAULT_NORMALIZE
+
+# ==================== CONFIGURATION ====================
+CACHE_PATH = 'dataset/landmark_cache.json'
+CACHE_VERSION = 3
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+DEFAULT_SETTINGS = {
+    'normalize': DEFAULT_NORMALIZE,
+    'static_image_mode': True,
+    'max_num_hands': 1,
+    'min_detection_confidence': 0.5,
+}
+
+
+def make_settings(**overrides):
+    """Extractor settings that decide whether cached landmarks are still valid"""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(overrides)
+    settings['mediapipe'] = getattr(mp, '__version__', 'unknown')
+    return settings
+
+
+# ==================== WORKER ====================
+_worker = {}   # Per-process MediaPipe instance and extractor
+
+
+def _init_worker(settings):
+    _worker['hands'] = mp.solutions.hands.Hands(
+        static_image_mode=settings['static_image_mode'],
+        max_num_hands=settings['max_num_hands'],
+        min_detection_confidence=settings['min_detection_confidence']
+    )
+    _worker['extractor'] = LandmarkExtractor(1, settings['normalize'])
+
+
+def _extract(image_path):
+    """Returns (image_path, sample dict or None)"""
+    image = cv2.imread(image_path)
+    if image is None:
+        return image_path, None
+
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    results = _worker['hands'].process(rgb_image)
+    if not results.multi_hand_landmarks:
+        return image_path, None
+
+    features = _worker['extractor'].extract_one(results.multi_hand_landmarks[0])[0]
+    handedness, score = None, None
+    if results.multi_handedness:
+        classification = results.multi_handedness[0].classification[0]
+        handedness, score = classification.label, float(classification.score)
+
+    return image_path, {
+        'landmarks': features.tolist(),
+        'handedness': handedness,
+        'score': score
+    }
+
+
+# ==================== FEATURE CACHE ====================
+class LandmarkCache:
+    """
+    On-disk landmark cache; entries are invalidated by mtime/size or settings changes.
+    Only per-image metadata (file key, row, handedness, score) is held in
+    memory. The landmark rows are appended to a float32 file next to the
+    JSON index and read back through a memory map.
+    """
+
+    def __init__(self, path, settings, num_features=NUM_FEATURES):
+        self.path = path
+        self.rows_path = os.path.splitext(path)[0] + '.f32'
+        self.settings = settings
+        self.num_features = num_features
+        self.row_bytes = num_features * 4
+        self.entries = {}
+        self.rows = 0           # Rows committed to the rows file by the last save()
+        self.dirty = False
+        self.rows_file = None   # Opened for appending on the first store()
+        self.rows_map = None
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except ValueError:
+                data = {}
+            if (data.get('version') == CACHE_VERSION and data.get('settings') == settings
+                    and data.get('num_features') == num_features):
+                self.entries = data.get('entries', {})
+                self.rows = data.get('rows', 0)
+
+    @staticmethod
+    def file_key(image_path):
+        stat = os.stat(image_path)
+        return [stat.st_mtime, stat.st_size]
+
+    def _row(self, row):
+        if self.rows_map is None or row >= len(self.rows_map):
+            if self.rows_file is not None:
+                self.rows_file.flush()
+            count = self.rows if self.rows_file is None else self.rows_file.tell() // self.row_bytes
+            self.rows_map = np.memmap(self.rows_path, dtype=np.float32, mode='r',
+                                      shape=(count, self.num_features))
+        return self.rows_map[row]
+
+    def lookup(self, image_path):
+        """Returns (hit, sample) - sample is None for images with no hand"""
+        entry = self.entries.get(os.path.abspath(image_path))
+        if entry is None or entry['key'] != self.file_key(image_path):
+            return False, None
+        if entry['row'] is None:
+            return True, None
+        return True, {'landmarks': self._row(entry['row']),
+                      'handedness': entry['handedness'], 'score': entry['score']}
+
+    def store(self, image_path, sample):
+        entry = {'key': self.file_key(image_path), 'row': None,
+                 'handedness': None, 'score': None}
+        if sample is not None:
+            if self.rows_file is None:
+                os.makedirs(os.path.dirname(self.rows_path) or '.', exist_ok=True)
+                mode = 'r+b' if os.path.exists(self.rows_path) else 'wb'
+                self.rows_file = open(self.rows_path, mode)
+                # Rows past the committed count belong to an interrupted run
+                self.rows_file.truncate(self.rows * self.row_bytes)
+                self.rows_file.seek(0, os.SEEK_END)
+            entry['row'] = self.rows_file.tell() // self.row_bytes
+            self.rows_file.write(np.asarray(sample['landmarks'], dtype=np.float32).tobytes())
+            entry['handedness'] = sample['handedness']
+            entry['score'] = sample['score']
+        self.entries[os.path.abspath(image_path)] = entry
+        self.dirty = True
+
+    def prune(self, image_paths):
+        """Drop entries for images that no longer exist in the dataset"""
+        keep = set(os.path.abspath(p) for p in image_paths)
+        for path in list(self.entries):
+            if path not in keep:
+                del self.entries[path]
+                self.dirty = True
+
+    def _compact(self):
+        """Rewrite only the rows still referenced, one row at a time"""
+        tmp_path = self.rows_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            new_row = 0
+            for entry in sorted((e for e in self.entries.values() if e['row'] is not None),
+                                key=lambda e: e['row']):
+                f.write(np.asarray(self._row(entry['row'])).tobytes())
+                entry['row'] = new_row
+                new_row += 1
+        self.rows_map = None
+        os.replace(tmp_path, self.rows_path)
+        self.rows = new_row
+
+    def save(self):
+        if self.rows_file is not None:
+            self.rows_file.flush()
+            os.fsync(self.rows_file.fileno())
+            self.rows = self.rows_file.tell() // self.row_bytes
+            self.rows_file.close()
+            self.rows_file = None
+        if not self.dirty:
+            return
+
+        live = sum(1 for e in self.entries.values() if e['row'] is not None)
+        if self.rows > 2 * live:
+            self._compact()   # Pruned images left more dead rows than live ones
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'settings': self.settings,
+                       'num_features': self.num_features, 'rows': self.rows,
+                       'entries': self.entries}, f)
+        os.replace(tmp_path, self.path)   # Never leave a half-written cache
+        self.dirty = False
+
+
+# ==================== EXTRACTION ====================
+def iter_landmarks(image_paths, settings=None, cache_path=CACHE_PATH, workers=DEFAULT_WORKERS,
+                   stats=None):
+    """
+    Yield (image_path, sample) for every image as soon as it is available -
+    cache hits first, then pool results in completion order - so callers
+    can stream them to disk. sample is a dict with 'landmarks' (42 floats),
+    'handedness' and 'score', or None when no hand was found.
+    stats, if given, is filled with 'cached' and 'processed' counts.
+    """
+    settings = settings or make_settings()
+    cache = LandmarkCache(cache_path, settings) if cache_path else None
+    stats = {} if stats is None else stats
+    stats['cached'] = stats['processed'] = 0
+
+    todo = []
+    try:
+        for image_path in image_paths:
+            hit, value = cache.lookup(image_path) if cache else (False, None)
+            if hit:
+                stats['cached'] += 1
+                yield image_path, value
+            else:
+                todo.append(image_path)
+
+        if todo:
+            if workers > 1 and len(todo) > 1:
+                pool = multiprocessing.Pool(min(workers, len(todo)), _init_worker, (settings,))
+                try:
+                    for image_path, value in pool.imap_unordered(_extract, todo, chunksize=16):
+                        if cache:
+                            cache.store(image_path, value)
+                        stats['processed'] += 1
+                        yield image_path, value
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                _init_worker(settings)
+                try:
+                    for image_path in todo:
+                        value = _extract(image_path)[1]
+                        if cache:
+                            cache.store(image_path, value)
+                        stats['processed'] += 1
+                        yield image_path, value
+                finally:
+                    _worker['hands'].close()
+
+        if cache:
+            cache.prune(image_paths)
+    finally:
+        if cache:
+            cache.save()
+
+
+# ==================== BINARY DATASET FORMAT ====================
+# <dir>/dataset.json   header: num_samples, num_features, gestures, feature settings
+# <dir>/landmarks.f32  contiguous float32 matrix, num_samples x num_features
+# <dir>/labels.u8      one uint8 class index per sample
+# <dir>/samples.jsonl  per-sample metadata: source path, handedness, detection score
+DATASET_DIR = 'dataset/landmarks'
+DATASET_VERSION = 1
+
+
+class LandmarkDatasetWriter:
+    """Streams samples to disk so the dataset never has to fit in memory"""
+
+    def __init__(self, path, num_features, gestures, settings=None):
+        self.path = path
+        self.num_features = num_features
+        self.gestures = gestures
+        self.settings = settings or {}
+        self.num_samples = 0
+
+        if len(gestures) > 256:
+            raise ValueError("uint8 labels support at most 256 classes")
+
+        os.makedirs(path, exist_ok=True)
+        # Write to temp names and swap in on close()
+        self.landmarks_file = open(os.path.join(path, 'landmarks.f32.tmp'), 'wb')
+        self.labels_file = open(os.path.join(path, 'labels.u8.tmp'), 'wb')
+        self.samples_file = open(os.path.join(path, 'samples.jsonl.tmp'), 'w')
+
+    def add(self, landmarks, label, source=None, handedness=None, score=None):
+        row = np.asarray(landmarks, dtype=np.float32)
+        if row.shape != (self.num_features,):
+            raise ValueError("Expected {} features, got {}".format(self.num_features, row.shape))
+
+        self.landmarks_file.write(row.tobytes())
+        self.labels_file.write(bytes([label]))
+        self.samples_file.write(json.dumps({
+            'source': source, 'handedness': handedness, 'score': score}) + '\n')
+        self.num_samples += 1
+
+    def close(self):
+        for f in (self.landmarks_file, self.labels_file, self.samples_file):
+            f.close()
+
+        # The header goes last, so an interrupted build never looks like a valid dataset
+        header_path = os.path.join(self.path, 'dataset.json')
+        if os.path.exists(header_path):
+            os.remove(header_path)
+        for name in ('landmarks.f32', 'labels.u8', 'samples.jsonl'):
+            os.replace(os.path.join(self.path, name + '.tmp'), os.path.join(self.path, name))
+
+        header = {
+            'version': DATASET_VERSION,
+            'num_samples': self.num_samples,
+            'num_features': self.num_features,
+            'gestures': list(self.gestures),
+            'settings': self.settings
+        }
+        tmp_path = os.path.join(self.path, 'dataset.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp_path, header_path)
+
+
+class LandmarkDataset:
+    """Memory-mapped view of a dataset written by LandmarkDatasetWriter"""
+
+    def __init__(self, path=DATASET_DIR):
+        self.path = path
+        with open(os.path.join(path, 'dataset.json'), 'r') as f:
+            header = json.load(f)
+        if header.get('version') != DATASET_VERSION:
+            raise ValueError("Unsupported dataset version: {}".format(header.get('version')))
+
+        self.num_samples = header['num_samples']
+        self.num_features = header['num_features']
+        self.gestures = header['gestures']
+        self.settings = header.get('settings', {})
+
+        # np.memmap refuses zero-length files
+        if self.num_samples > 0:
+            self.landmarks = np.memmap(os.path.join(path, 'landmarks.f32'), dtype=np.float32,
+                                       mode='r', shape=(self.num_samples, self.num_features))
+            self.labels = np.memmap(os.path.join(path, 'labels.u8'), dtype=np.uint8,
+                                    mode='r', shape=(self.num_samples,))
+        else:
+            self.landmarks = np.zeros((0, self.num_features), dtype=np.float32)
+            self.labels = np.zeros((0,), dtype=np.uint8)
+
+    def __len__(self):
+        return self.num_samples
+
+    def iter_metadata(self):
+        """Per-sample metadata, read lazily line by line"""
+        with open(os.path.join(self.path, 'samples.jsonl'), 'r') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def take(self, indices):
+        """Materialise a subset (e.g. the test split) as in-memory arrays"""
+        indices = np.sort(indices)
+        return np.asarray(self.landmarks[indices]), np.asarray(self.labels[indices])
+
+    def to_tf_dataset(self, indices, batch_size=32, shuffle=True, seed=42):
+        """
+        tf.data pipeline that reads batches straight from the memory map.
+        Only the index array is held in memory.
+        """
+        import tensorflow as tf   # Keep this module importable by TF-free extraction workers
+
+        indices = np.asarray(indices, dtype=np.int64)
+        rng = np.random.RandomState(seed)
+        num_features = self.num_features
+
+        def generate():
+            order = rng.permutation(indices) if shuffle else indices
+            for start in range(0, len(order), batch_size):
+                # Sorted reads keep the page cache access mostly sequential
+                batch = np.sort(order[start:start + batch_size])
+                yield (np.asarray(self.landmarks[batch]),
+                       np.asarray(self.labels[batch], dtype=np.int32))
+
+        dataset = tf.data.Dataset.from_generator(
+            generate,
+            output_types=(tf.float32, tf.int32),
+            output_shapes=(tf.TensorShape([None, num_features]), tf.TensorShape([None]))
+        )
+        return dataset.prefetch(2)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared hand-landmark feature extraction
+The one function used by both Train_Simple_Model.py and the runtime,
+so training and inference always see identical features.
+"""
+
+import json
+import os
+import numpy as np
+
+# ==================== CONFIGURATION ====================
+NUM_LANDMARKS = 21
+NUM_FEATURES = NUM_LANDMARKS * 2    # (x, y) per landmark
+
+# Feature normalisation modes
+#   'none'  - raw MediaPipe image-relative (x, y), what gesture_model_v2 was trained on
+#   'wrist' - translate so the wrist (landmark 0) is the origin
+#   'scale' - wrist-relative and divided by the wrist -> middle-finger MCP distance
+NORMALIZE_MODES = ('none', 'wrist', 'scale')
+DEFAULT_NORMALIZE = 'none'
+
+WRIST = 0
+MIDDLE_MCP = 9
+
+
+# ==================== FEATURE EXTRACTOR ====================
+class LandmarkExtractor:
+    """Writes hand landmarks straight into a preallocated float32 buffer reused every frame"""
+
+    def __init__(self, max_hands=1, normalize=DEFAULT_NORMALIZE):
+        if normalize not in NORMALIZE_MODES:
+            raise ValueError("Unknown normalisation '{}' (use one of {})".format(
+                normalize, ', '.join(NORMALIZE_MODES)))
+        self.normalize = normalize
+        self.buffer = np.zeros((max_hands, NUM_FEATURES), dtype=np.float32)
+        # (max_hands, 21, 2) view over the same memory
+        self.points = self.buffer.reshape(max_hands, NUM_LANDMARKS, 2)
+        # Flat float view for the per-frame fill - scalar stores through a
+        # memoryview are cheaper than numpy item assignment and need no temporaries
+        self.flat = memoryview(self.buffer).cast('B').cast('f')
+
+    def extract(self, hand_landmarks_list):
+        """
+        Fill the buffer from a list of MediaPipe NormalizedLandmarkList.
+        Returns an (N, 42) view into the reused buffer - copy it if it must
+        outlive the next call.
+        """
+        n = min(len(hand_landmarks_list), len(self.buffer))
+        flat = self.flat
+        for i in range(n):
+            j = i * NUM_FEATURES
+            for lm in hand_landmarks_list[i].landmark:
+                flat[j] = lm.x
+                flat[j + 1] = lm.y
+                j += 2
+
+        if self.normalize != 'none':
+            normalize_points(self.points[:n], self.normalize)
+        return self.buffer[:n]
+
+    def extract_one(self, hand_landmarks):
+        """(1, 42) features for a single hand"""
+        return self.extract((hand_landmarks,))
+
+    def config(self):
+        """Settings recorded in model_info.json so the runtime can match training"""
+        return {'num_features': NUM_FEATURES, 'normalize': self.normalize}
+
+
+def normalize_points(points, mode):
+    """In-place normalisation of an (N, 21, 2) landmark array"""
+    points -= points[:, WRIST:WRIST + 1, :]
+    if mode == 'scale':
+        scale = np.linalg.norm(points[:, MIDDLE_MCP, :], axis=1)
+        scale[scale < 1e-6] = 1.0
+        points /= scale[:, None, None]
+    return points
+
+
+def load_feature_config(model_info_path):
+    """
+    Read the feature settings a model was trained with.
+    Models trained before the setting existed used raw coordinates.
+    """
+    if not os.path.exists(model_info_path):
+        return {'num_features': NUM_FEATURES, 'normalize': DEFAULT_NORMALIZE}
+    with open(model_info_path, 'r') as f:
+        info = json.load(f)
+    features = info.get('features', {})
+    return {
+        'num_features': features.get('num_features', NUM_FEATURES),
+        'normalize': features.get('normalize', DEFAULT_NORMALIZE)
+    }
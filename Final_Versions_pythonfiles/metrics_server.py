@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live metrics endpoint
+A small HTTP server on a daemon thread (TCP on localhost, or a Unix
+socket) serving the running session's metrics:
+  /metrics  Prometheus text exposition format
+  /stats    the same values as one JSON document (latencies summarised in ms)
+Values are gathered by a collect(exposition) callback only when
+something scrapes, so the frame loop pays nothing beyond its counters.
+"""
+
+import os
+import json
+import threading
+import socketserver
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# ==================== CONFIGURATION ====================
+METRICS_HOST = '127.0.0.1'   # Local only - there is no authentication
+METRICS_PORT = 9108
+# Prometheus histogram bucket bounds (seconds) for latency histograms
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+QUANTILES = (50, 95, 99)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+# ==================== EXPOSITION ====================
+class MetricsExposition:
+    """
+    Collects one scrape: gauge()/counter()/histogram() append samples,
+    text() renders Prometheus format and as_dict() the JSON snapshot.
+    All samples of one metric name must be added together.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.types = {}
+        self.snapshot = OrderedDict()
+
+    def _declare(self, name, kind, help_text):
+        if name in self.types:
+            return
+        self.types[name] = kind
+        if help_text:
+            self.lines.append('# HELP {} {}'.format(name, help_text.replace('\n', ' ')))
+        self.lines.append('# TYPE {} {}'.format(name, kind))
+
+    def _sample(self, name, value, labels=None):
+        if labels:
+            label_text = ','.join('{}="{}"'.format(k, _escape(v)) for k, v in labels.items())
+            self.lines.append('{}{{{}}} {}'.format(name, label_text, _format_value(value)))
+        else:
+            self.lines.append('{} {}'.format(name, _format_value(value)))
+
+    def _snap(self, name, value, labels=None):
+        if not labels:
+            self.snapshot[name] = value
+            return
+        node = self.snapshot.setdefault(name, OrderedDict())
+        keys = [str(v) for v in labels.values()]
+        for key in keys[:-1]:
+            node = node.setdefault(key, OrderedDict())
+        node[keys[-1]] = value
+
+    def gauge(self, name, value, help_text='', labels=None):
+        self._declare(name, 'gauge', help_text)
+        self._sample(name, value, labels)
+        self._snap(name, value, labels)
+
+    def counter(self, name, value, help_text='', labels=None):
+        """name should end in _total"""
+        self._declare(name, 'counter', help_text)
+        self._sample(name, value, labels)
+        self._snap(name, value, labels)
+
+    def histogram(self, name, hist, help_text='', labels=None, buckets=LATENCY_BUCKETS):
+        """
+        Export a tracing.LatencyHistogram as a Prometheus histogram (seconds).
+        Bucket counts are exact to the histogram's bucket precision.
+        """
+        labels = OrderedDict(labels or ())
+        self._declare(name, 'histogram', help_text)
+        for bound, count in zip(buckets, hist.cumulative_counts(buckets)):
+            self._sample(name + '_bucket', count, OrderedDict(labels, le=repr(float(bound))))
+        self._sample(name + '_bucket', hist.total, OrderedDict(labels, le='+Inf'))
+        self._sample(name + '_sum', hist.sum_us / 1e6, labels)
+        self._sample(name + '_count', hist.total, labels)
+        self._snap(name, hist.summary(QUANTILES), labels)
+
+    def text(self):
+        return '\n'.join(self.lines) + '\n'
+
+    def as_dict(self):
+        return self.snapshot
+
+
+def add_tracer(exposition, tracer, name='gesture_stage_latency_seconds',
+               help_text='Per-frame latency of each pipeline span'):
+    """Every span histogram of a tracing.Tracer, labelled by stage"""
+    for stage, hist in list(tracer.histograms.items()):
+        if hist.total:
+            exposition.histogram(name, hist, help_text, OrderedDict(stage=stage))
+
+
+# ==================== HTTP SERVER ====================
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path not in ('/metrics', '/stats', '/stats.json'):
+            self._reply(404, 'text/plain', 'Not found - try /metrics or /stats\n')
+            return
+        try:
+            exposition = MetricsExposition()
+            self.server.collect(exposition)
+        except Exception as e:
+            self._reply(500, 'text/plain', 'collect failed: {}\n'.format(e))
+            return
+        if path == '/metrics':
+            self._reply(200, 'text/plain; version=0.0.4; charset=utf-8', exposition.text())
+        else:
+            self._reply(200, 'application/json', json.dumps(exposition.as_dict(), indent=1))
+
+    def _reply(self, code, content_type, body):
+        data = body.encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _TCPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """
+    MetricsServer(collect).start() serves on METRICS_HOST:METRICS_PORT,
+    or on unix_socket if given. collect(exposition) runs on the server
+    thread for each request, so it must only read shared state.
+    """
+
+    def __init__(self, collect, host=METRICS_HOST, port=METRICS_PORT, unix_socket=None):
+        self.collect = collect
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        if self.unix_socket:
+            if os.path.exists(self.unix_socket):
+                os.unlink(self.unix_socket)   # Stale socket from a previous run
+            self.server = _UnixServer(self.unix_socket, _Handler)
+        else:
+            self.server = _TCPServer((self.host, self.port), _Handler)
+            self.port = self.server.server_address[1]   # Resolves port 0
+        self.server.collect = self.collect
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       name='metrics-server', daemon=True)
+        self.thread.start()
+        return self
+
+    @property
+    def address(self):
+        if self.unix_socket:
+            return 'unix:{}'.format(self.unix_socket)
+        return 'http://{}:{}/metrics'.format(self.host, self.port)
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+        self.server = None
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motion-gated detection
+A tiny grayscale thumbnail of each frame is diffed against the previous
+one. While the scene is static the expensive detectors (MediaPipe hands,
+face detection) only run at a low idle rate; any motion - or a detector
+still seeing a hand/face - puts them back on every frame immediately.
+"""
+
+import cv2
+import time
+import numpy as np
+
+# ==================== CONFIGURATION ====================
+THUMB_SIZE = (32, 24)        # (width, height) of the motion thumbnail
+PIXEL_THRESHOLD = 12         # Grey-level change that counts a thumbnail pixel as moving
+MOTION_FRACTION = 0.02       # Share of moving pixels that counts as motion
+MOTION_HOLD_TIME = 1.5       # Seconds to stay awake after the last motion/activity
+IDLE_DETECTION_FPS = 2.0     # Detector rate while idle
+
+
+# ==================== MOTION GATE ====================
+class MotionGate:
+    """
+    Call update(frame) once per frame, then should_detect(name) per
+    detector. Detectors that found something call keep_awake() - a hand
+    held still for a static gesture produces no motion but must keep
+    being classified.
+    """
+
+    def __init__(self, idle_fps=IDLE_DETECTION_FPS, hold_time=MOTION_HOLD_TIME,
+                 pixel_threshold=PIXEL_THRESHOLD, motion_fraction=MOTION_FRACTION,
+                 thumb_size=THUMB_SIZE):
+        self.idle_interval = 1.0 / idle_fps if idle_fps > 0 else float('inf')
+        self.hold_time = hold_time
+        self.pixel_threshold = pixel_threshold
+        self.min_moving = max(1, int(motion_fraction * thumb_size[0] * thumb_size[1]))
+        self.thumb_size = thumb_size
+
+        self.prev_thumb = None
+        self.last_active = 0.0
+        self.last_run = {}           # detector name -> time it last ran
+        self.frames = 0
+        self.motion_frames = 0
+        self.runs = {}
+        self.skips = {}
+
+    def update(self, frame, now=None):
+        """Diff this frame's thumbnail against the last one; returns True on motion"""
+        now = time.time() if now is None else now
+        # INTER_AREA averages blocks of pixels, which also smooths out sensor noise
+        small = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        thumb = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+        if self.prev_thumb is None:
+            moving = True
+        else:
+            diff = cv2.absdiff(thumb, self.prev_thumb)
+            moving = np.count_nonzero(diff > self.pixel_threshold) >= self.min_moving
+        self.prev_thumb = thumb
+
+        self.frames += 1
+        if moving:
+            self.motion_frames += 1
+            self.last_active = now
+        return moving
+
+    def keep_awake(self, now=None):
+        self.last_active = time.time() if now is None else now
+
+    def is_awake(self, now=None):
+        now = time.time() if now is None else now
+        return now - self.last_active < self.hold_time
+
+    def should_detect(self, name='hands', now=None):
+        """True if detector `name` should run on the current frame"""
+        now = time.time() if now is None else now
+        if self.is_awake(now) or now - self.last_run.get(name, 0.0) >= self.idle_interval:
+            self.last_run[name] = now
+            self.runs[name] = self.runs.get(name, 0) + 1
+            return True
+        self.skips[name] = self.skips.get(name, 0) + 1
+        return False
+
+    def skip_ratio(self, name='hands'):
+        total = self.runs.get(name, 0) + self.skips.get(name, 0)
+        return self.skips.get(name, 0) / total if total else 0.0
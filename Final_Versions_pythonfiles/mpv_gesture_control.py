@@ -2,72 +2,125 @@
 # -*- coding: utf-8 -*-
 """
 MPV Gesture Control - OPTIMIZED for Jetson Nano
-Uses TFLite for 10x faster inference
+Uses TFLite / tflite_runtime / NumPy inference (fastest available backend)
 Target: <150ms latency, >20 FPS
 """
 
+import time
+_IMPORT_START = time.time()
+
 import cv2
-import mediapipe as mp
 import numpy as np
-import tensorflow as tf
-import socket
-import json
-import time
 from collections import deque
+from types import SimpleNamespace
 import os
 
+from mpv_ipc import MPVConnection
+from pipeline import Pipeline
+from camera import LatestFrameCamera
+from gesture_classifier import load_classifier
+from landmark_features import LandmarkExtractor, load_feature_config, DEFAULT_NORMALIZE
+from startup import StartupTimer
+from gesture_stabilizer import GestureStabilizer
+from display import Display
+from overlay import OverlayCompositor
+from hand_roi import HandROITracker
+from motion_gate import MotionGate
+from tracing import Tracer, NULL_TRACE, SPANS
+from metrics_server import MetricsServer, add_tracer
+# mediapipe (and tensorflow, for the 'tflite' backend) are imported lazily
+# on startup worker threads - see init_hand_tracking() / load_classifier()
+
+_IMPORT_TIME = time.time() - _IMPORT_START
+
 # ==================== CONFIGURATION ====================
 MODEL_PATH = 'gesture_model_v2.tflite'  # TFLite model
+WEIGHTS_PATH = 'gesture_model_v2_weights.npz'  # Exported weights for the NumPy backend
+INFERENCE_BACKEND = 'auto'  # 'auto' | 'numpy' | 'tflite_runtime' | 'tflite'
 LABELS_PATH = 'gesture_labels.txt'
+MODEL_INFO_PATH = 'model_info.json'     # Feature settings the model was trained with
 MPV_SOCKET = '/tmp/mpvsocket'
 
 # Optimized settings for speed
 CONFIDENCE_THRESHOLD = 0.70  # Slightly lower for better accuracy metric
 STABLE_FRAMES = 3  # Reduced from 5 for faster response
+STABILITY_WINDOW = 5  # Smaller buffer for speed
+STABILITY_POLICY = 'majority'  # 'majority' | 'ema' | 'hysteresis' - see gesture_stabilizer.py
 ACTION_COOLDOWN = 1.0  # Reduced from 1.5
 
+MAX_NUM_HANDS = 2  # Every detected hand is classified in one batched invoke
+
+# Hand ROI tracking: detect on a downscaled crop around the last hand,
+# with a full-frame rescan every ROI_FULL_SCAN_INTERVAL frames or on loss
+ROI_TRACKING = True
+ROI_TARGET_SIZE = 224
+ROI_FULL_SCAN_INTERVAL = 15
+
+# Motion gate: on a static scene with no hand, run MediaPipe only IDLE_DETECTION_FPS
+# times a second; motion wakes it up on the very next frame
+MOTION_GATING = True
+IDLE_DETECTION_FPS = 2.0
+
 CAMERA_INDEX = 0
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 
+# Headless mode: no drawing or window, shutdown via SIGINT/SIGTERM
+HEADLESS = False
+PREVIEW_FPS = 0  # >0 keeps a low-rate preview window in headless mode (e.g. 5 for debugging)
+WINDOW_NAME = 'MPV Gesture Control (Optimized)'
+HISTORY_LINES = 4  # Recent actions shown on screen
+
+# Per-frame span tracing (latency percentiles are always collected)
+TRACE_PATH = None  # e.g. 'gesture_trace.json' to dump every frame's spans
+TRACE_FORMAT = 'chrome'  # 'chrome' (chrome://tracing, Perfetto) | 'jsonl'
+
+# Live metrics: Prometheus text at /metrics, JSON at /stats (local only)
+# Off by default - set e.g. METRICS_PORT = 9108 and scrape http://127.0.0.1:9108/metrics
+METRICS_PORT = None
+METRICS_SOCKET = None  # e.g. '/tmp/gesture_metrics.sock' to serve on a Unix socket instead
+
 # ==================== MPV CONTROLLER ====================
 class MPVController:
     """Handle MPV IPC communication"""
     
-    def __init__(self, socket_path):
+    def __init__(self, socket_path, metrics=None):
         self.socket_path = socket_path
+        self.metrics = metrics
         self.command_count = 0
         self.failed_commands = 0
-        self.command_times = deque(maxlen=100)
-        
-    def send_command(self, command):
-        """Send JSON command to MPV"""
-        start_time = time.time()
+        self.command_times = deque(maxlen=100)  # Round-trip times (ms) from mpv replies
+        self.connection = MPVConnection(socket_path, on_reply=self._on_reply)
         
-        try:
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            sock.connect(self.socket_path)
-            
-            cmd_json = json.dumps(command) + '\n'
-            sock.sendall(cmd_json.encode('utf-8'))
-            
-            sock.settimeout(0.05)  # Reduced timeout for speed
-            try:
-                response = sock.recv(4096).decode('utf-8')
-            except socket.timeout:
-                response = None
-            
-            sock.close()
-            
-            execution_time = (time.time() - start_time) * 1000
-            self.command_times.append(execution_time)
+    def _on_reply(self, success, response, rtt):
+        """Called from the IPC reader thread when mpv answers (or times out)"""
+        if success:
+            self.command_times.append(rtt)
             self.command_count += 1
-            
-            return True, response, execution_time
-            
-        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.update_command_rtt(rtt / 1000.0)
+        else:
             self.failed_commands += 1
-            return False, str(e), 0
+    
+    def check_connection(self, timeout=0.5):
+        """Blocking round-trip used once at startup"""
+        success, _, _ = self.connection.request(
+            {'command': ['get_property', 'pause']}, timeout=timeout)
+        return success
+    
+    def send_command(self, command):
+        """
+        Queue JSON command for MPV without waiting for the reply.
+        Returns (queued, request_id); the round trip is timed when mpv's
+        reply arrives (see _on_reply).
+        """
+        queued, request_id = self.connection.send(command)
+        if not queued:
+            self.failed_commands += 1
+        return queued, request_id
+    
+    def close(self):
+        self.connection.close()
     
     def execute_gesture(self, gesture):
         """Map gesture to MPV command"""
@@ -91,10 +144,10 @@ class MPVController:
         }
         
         if gesture in commands_map:
-            success, response, exec_time = self.send_command(commands_map[gesture])
-            return success, descriptions.get(gesture, gesture), exec_time
+            success, request_id = self.send_command(commands_map[gesture])
+            return success, descriptions.get(gesture, gesture), request_id
         
-        return False, "Unknown", 0
+        return False, "Unknown", None
     
     def get_avg_command_time(self):
         if len(self.command_times) > 0:
@@ -103,29 +156,65 @@ class MPVController:
 
 # ==================== PERFORMANCE METRICS ====================
 class PerformanceMetrics:
-    """Track performance metrics"""
+    """
+    Track performance metrics.
+    Latencies go into fixed-memory histograms (see tracing.py) fed by the
+    per-frame spans, so the report can show tail latency, not just means.
+    FPS and stage throughput still use short rolling windows.
+    """
     
-    def __init__(self, window_size=30):
+    def __init__(self, window_size=30, trace_path=None, trace_format='jsonl'):
+        self.window_size = window_size
         self.fps_times = deque(maxlen=window_size)
-        self.inference_times = deque(maxlen=window_size)
-        self.hand_detection_times = deque(maxlen=window_size)
-        self.frame_times = deque(maxlen=window_size)  # Total frame time
+        self.stage_times = {}      # stage -> deque of (timestamp, duration)
+        self.queue_depths = {}     # queue -> (depth, dropped)
+        # Every name recorded is created up front: 'ipc_rtt' comes from the IPC
+        # reader thread while the metrics server iterates the histograms
+        self.tracer = Tracer(spans=SPANS + ('frame', 'action', 'ipc_rtt'),
+                             dump_path=trace_path, dump_format=trace_format)
         self.total_predictions = 0
         self.correct_predictions = 0
+        self.frames_detected = 0   # Frames through the detect stage
+        self.frames_with_hands = 0
         self.start_time = time.time()
         self.gesture_executions = {}
-        
-    def update_frame_time(self, duration):
-        self.frame_times.append(duration)
+    
+    def begin_trace(self, packet):
+        """Start the frame's trace, seeded with the camera grab span"""
+        trace = self.tracer.begin(packet['frame_id'], packet['capture_time'])
+        if packet.get('grab_span'):
+            trace.add('capture', packet['grab_span'][0], packet['grab_span'][1], 'camera-grab')
+        packet['trace'] = trace
+        return trace
+    
+    def finish_trace(self, trace, end=None):
+        """Fold the frame's spans into the histograms; 'frame' = capture -> display"""
+        self.tracer.finish(trace, end)
         
     def update_fps(self):
         self.fps_times.append(time.time())
-        
-    def update_inference(self, duration):
-        self.inference_times.append(duration)
-        
-    def update_hand_detection(self, duration):
-        self.hand_detection_times.append(duration)
+    
+    def update_action_latency(self, duration):
+        self.tracer.record('action', duration)
+    
+    def update_command_rtt(self, duration):
+        # Called from the IPC reader thread
+        self.tracer.record('ipc_rtt', duration)
+    
+    def update_stage(self, name, duration):
+        # Called from the stage worker threads
+        times = self.stage_times.get(name)
+        if times is None:
+            times = self.stage_times.setdefault(name, deque(maxlen=self.window_size))
+        times.append((time.time(), duration))
+    
+    def update_queue_depth(self, name, depth, dropped):
+        self.queue_depths[name] = (depth, dropped)
+    
+    def record_detection(self, found):
+        self.frames_detected += 1
+        if found:
+            self.frames_with_hands += 1
     
     def record_prediction(self):
         self.total_predictions += 1
@@ -142,286 +231,517 @@ class PerformanceMetrics:
         time_diff = self.fps_times[-1] - self.fps_times[0]
         return len(self.fps_times) / time_diff if time_diff > 0 else 0.0
     
-    def get_avg_inference_ms(self):
-        return np.mean(self.inference_times) * 1000 if self.inference_times else 0.0
+    def get_percentile_ms(self, name, q=50):
+        return self.tracer.percentile_ms(name, q)
     
-    def get_avg_hand_detection_ms(self):
-        return np.mean(self.hand_detection_times) * 1000 if self.hand_detection_times else 0.0
+    def get_total_latency_ms(self, q=50):
+        """End-to-end capture -> display latency at percentile q"""
+        return self.get_percentile_ms('frame', q)
     
-    def get_avg_frame_time_ms(self):
-        return np.mean(self.frame_times) * 1000 if self.frame_times else 0.0
-    
-    def get_total_latency_ms(self):
-        return self.get_avg_hand_detection_ms() + self.get_avg_inference_ms()
+    def get_glass_to_action_ms(self, q=50):
+        """Camera capture timestamp -> MPV command sent, for executed gestures"""
+        return self.get_percentile_ms('action', q)
     
     def get_accuracy(self):
         if self.total_predictions == 0:
             return 0.0
         return (self.correct_predictions / self.total_predictions) * 100
+    
+    def get_detection_rate(self):
+        """Share of frames with at least one hand"""
+        return self.frames_with_hands / self.frames_detected if self.frames_detected else 0.0
+    
+    def get_stage_throughput(self, name):
+        times = list(self.stage_times.get(name, ()))
+        if len(times) < 2:
+            return 0.0
+        time_diff = times[-1][0] - times[0][0]
+        # N timestamps span N - 1 intervals
+        return (len(times) - 1) / time_diff if time_diff > 0 else 0.0
+    
+    def get_queue_depth(self, name):
+        return self.queue_depths.get(name, (0, 0))
+    
+    def close(self):
+        self.tracer.close()
+
+# ==================== PIPELINE STAGES ====================
+GESTURE_COLORS = {
+    'VOLUME_UP': (0, 255, 0), 'VOLUME_DOWN': (0, 165, 255),
+    'PLAY': (255, 100, 0), 'PAUSE': (0, 0, 255),
+    'NEXT': (255, 0, 255), 'PREVIOUS': (255, 255, 0),
+    'STOP': (0, 0, 200), 'SKIP_LEFT': (150, 150, 0),
+    'SKIP_RIGHT': (0, 150, 150)
+}
+
+class HandDetector:
+    """
+    Detect stage: BGR->RGB + mirror + MediaPipe hands.
+    Landmarks are in mirrored coordinates; the frame itself is left
+    un-mirrored and only flipped by the render stage when it is shown.
+    """
+    
+    NO_HANDS = SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+    
+    def __init__(self, hands, metrics, roi_tracker=None, motion_gate=None, clock=None):
+        self.hands = hands
+        self.metrics = metrics
+        self.roi_tracker = roi_tracker
+        self.motion_gate = motion_gate
+        self.clock = clock  # Time source for gating; None = capture time (replay uses stream time)
+    
+    def process(self, packet):
+        trace = self.metrics.begin_trace(packet)
+        
+        if self.motion_gate is not None:
+            now = packet['capture_time'] if self.clock is None else self.clock()
+            self.motion_gate.update(packet['frame'], now)
+            if not self.motion_gate.should_detect('hands', now):
+                # Static scene, no hand: skip MediaPipe for this frame
+                packet['results'] = self.NO_HANDS
+                self.metrics.record_detection(False)
+                return packet
+        
+        if self.roi_tracker is not None:
+            # Crop around the last hand; full-frame rescans handled by the tracker
+            packet['results'] = self.roi_tracker.process(packet['frame'], trace)
+        else:
+            with trace.span('color'):
+                rgb_frame = cv2.flip(cv2.cvtColor(packet['frame'], cv2.COLOR_BGR2RGB), 1)
+            with trace.span('detect'):
+                packet['results'] = self.hands.process(rgb_frame)
+        
+        found = bool(packet['results'].multi_hand_landmarks)
+        self.metrics.record_detection(found)
+        if self.motion_gate is not None and found:
+            self.motion_gate.keep_awake(now)
+        return packet
+
+def get_hand_keys(results):
+    """Per-hand keys that stay stable across frames: handedness, numbered left-to-right"""
+    hand_list = results.multi_hand_landmarks
+    if results.multi_handedness:
+        labels = [h.classification[0].label for h in results.multi_handedness]
+    else:
+        labels = ['Hand'] * len(hand_list)
+    
+    keys = [None] * len(hand_list)
+    seen = {}
+    for i in sorted(range(len(hand_list)), key=lambda i: hand_list[i].landmark[0].x):
+        seen[labels[i]] = seen.get(labels[i], 0) + 1
+        keys[i] = '{}{}'.format(labels[i], seen[labels[i]])
+    return keys
+
+class GestureEngine:
+    """Classify stage: landmarks -> batched TFLite -> per-hand stable gesture -> MPV command"""
+    
+    def __init__(self, classifier, gestures, mpv, metrics, normalize=DEFAULT_NORMALIZE,
+                 clock=time.time):
+        self.classifier = classifier
+        self.extractor = LandmarkExtractor(classifier.max_batch, normalize)
+        self.gestures = gestures
+        self.mpv = mpv
+        self.metrics = metrics
+        self.clock = clock  # Cooldown time source - replay passes stream time
+        
+        self.stabilizers = {}  # hand key -> GestureStabilizer
+        self.last_action_time = {}
+        self.action_history = deque(maxlen=10)
+        self.current_gesture = None
+        self.current_confidence = 0.0
+    
+    def process(self, packet):
+        results = packet['results']
+        trace = packet.get('trace', NULL_TRACE)
+        
+        if results.multi_hand_landmarks:
+            hand_list = results.multi_hand_landmarks[:self.classifier.max_batch]
+            keys = get_hand_keys(results)[:len(hand_list)]
+            
+            # Extract landmarks of every hand into one (N, 42) batch
+            with trace.span('extract'):
+                batch = self.extractor.extract(hand_list)
+            
+            # TFLite inference - one invoke for all hands
+            with trace.span('infer'):
+                predictions = self.classifier.classify(batch)
+            
+            # Forget hands that left the frame
+            for key in list(self.stabilizers):
+                if key not in keys:
+                    del self.stabilizers[key]
+            
+            vote_start = time.time()
+            stable_gestures = []
+            for key, prediction in zip(keys, predictions):
+                gesture_idx = np.argmax(prediction)
+                confidence = prediction[gesture_idx]
+                
+                self.metrics.record_prediction()
+                
+                # Vote per hand
+                stabilizer = self.stabilizers.get(key)
+                if stabilizer is None:
+                    stabilizer = self.stabilizers[key] = GestureStabilizer(
+                        len(self.gestures), STABILITY_POLICY, STABILITY_WINDOW,
+                        STABLE_FRAMES, CONFIDENCE_THRESHOLD)
+                
+                # Stable gesture check
+                stable = stabilizer.update(gesture_idx, confidence)
+                if stable is not None:
+                    stable_gestures.append(stable)
+            trace.add('vote', vote_start, time.time())
+            
+            for most_common_idx, avg_confidence in stable_gestures:
+                self.execute(self.gestures[most_common_idx], avg_confidence,
+                             packet['capture_time'], trace)
+        else:
+            self.stabilizers.clear()
+        
+        # Snapshot for the render stage (it runs on another thread)
+        packet['gesture'] = self.current_gesture
+        packet['confidence'] = self.current_confidence
+        packet['history'] = list(self.action_history)[-HISTORY_LINES:]
+        return packet
+    
+    def execute(self, gesture, avg_confidence, capture_time, trace=NULL_TRACE):
+        """Execute with cooldown"""
+        self.current_gesture = gesture
+        self.current_confidence = avg_confidence
+        
+        current_time = self.clock()
+        if gesture in self.last_action_time and \
+           (current_time - self.last_action_time[gesture]) <= ACTION_COOLDOWN:
+            return
+        
+        with trace.span('ipc'):
+            success, description, request_id = self.mpv.execute_gesture(gesture)
+        
+        if success:
+            self.last_action_time[gesture] = current_time
+            self.action_history.append({
+                'gesture': gesture,
+                'time': current_time,
+                'conf': avg_confidence,
+                'request_id': request_id
+            })
+            self.metrics.record_execution(gesture)
+            self.metrics.update_action_latency(time.time() - capture_time)
+            
+            print("[ACTION] {:<12} | {:.0f}% | req #{} | {}".format(
+                gesture, avg_confidence * 100, request_id, description))
+
+def build_overlay(w, h):
+    """Static UI layers, rendered once for the frame size"""
+    overlay = OverlayCompositor(w, h)
+    
+    def header(layer):
+        # Draw minimal UI for speed
+        layer.rectangle((0, 0), (w, 100), (30, 30, 30), -1)
+        layer.text("MPV Control (TFLite Optimized)", (10, 30), 0.7, (255, 255, 255), 2)
+    
+    overlay.add_layer('header', header)
+    overlay.add_layer('no_hand', lambda layer: layer.text(
+        "No hand", (10, h - 20), 0.6, (0, 0, 255), 2), visible=False)
+    overlay.add_layer('recent', lambda layer: layer.text(
+        "Recent:", (w - 200, h - 120), 0.4, (200, 200, 200), 1), visible=False)
+    return overlay
+
+def set_gesture_box(overlay, gesture, confidence, w):
+    """Current gesture box - re-rendered only when the gesture or shown % changes"""
+    color = GESTURE_COLORS.get(gesture, (255, 255, 255))
+    box_w = min(int(250 + len(gesture) * 8), w - 20)
+    percent = "{:.0f}%".format(confidence * 100)
+    
+    def draw(layer):
+        layer.rectangle((10, 120), (box_w, 220), color, -1)
+        layer.rectangle((10, 120), (box_w, 220), (255, 255, 255), 2)
+        layer.text(gesture, (20, 165), 1.2, (255, 255, 255), 2)
+        layer.text(percent, (20, 200), 0.6, (255, 255, 255), 1)
+    
+    overlay.set_item('gesture', (gesture, percent), (9, 119, box_w + 2, 222), draw)
+
+def draw_ui(frame, packet, metrics, mpv, mp_drawing, mp_hands, overlay):
+    """Render stage: update the cached overlay and blend it onto the frame"""
+    h, w, _ = frame.shape
+    results = packet['results']
+    
+    # Performance metrics (latencies are session p50 / p95)
+    fps = metrics.get_fps()
+    accuracy = metrics.get_accuracy()
+    
+    # Compact metrics display
+    met1 = "FPS:{:.1f} Lat:{:.0f}/{:.0f}ms G2A:{:.0f}ms".format(
+        fps, metrics.get_total_latency_ms(50), metrics.get_total_latency_ms(95),
+        metrics.get_glass_to_action_ms())
+    met2 = "Hand:{:.0f} Inf:{:.0f} Cmd:{:.0f} Acc:{:.0f}%".format(
+        metrics.get_percentile_ms('detect'),
+        metrics.get_percentile_ms('infer'),
+        metrics.get_percentile_ms('ipc_rtt'), accuracy
+    )
+    
+    overlay.set_text('met1', met1, (10, 60), 0.5, (100, 255, 100), 2)
+    overlay.set_text('met2', met2, (10, 85), 0.4, (200, 200, 200), 1)
+    
+    if results.multi_hand_landmarks:
+        # Draw landmarks (simplified for speed) - they move every frame, so straight onto the frame
+        for hand_landmarks in results.multi_hand_landmarks:
+            mp_drawing.draw_landmarks(
+                frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
+                mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=1),
+                mp_drawing.DrawingSpec(color=(255, 100, 0), thickness=1)
+            )
+    
+    # Display current gesture (minimal)
+    current_gesture = packet['gesture']
+    if results.multi_hand_landmarks and current_gesture:
+        set_gesture_box(overlay, current_gesture, packet['confidence'], w)
+    else:
+        overlay.remove_item('gesture')
+    overlay.show_layer('no_hand', not results.multi_hand_landmarks)
+    
+    # Action history (minimal)
+    history = packet['history']
+    overlay.show_layer('recent', bool(history))
+    for i in range(HISTORY_LINES):
+        if i < len(history):
+            act = history[i]
+            overlay.set_text('history{}'.format(i),
+                             "{} ({:.0f}s)".format(act['gesture'][:8], time.time() - act['time']),
+                             (w - 200, h - 100 + i * 20), 0.3, (150, 150, 150), 1)
+        else:
+            overlay.remove_item('history{}'.format(i))
+    
+    # MPV status
+    st = "MPV: {}/{}".format(mpv.command_count, mpv.failed_commands)
+    overlay.set_text('mpv', st, (w - 150, 25), 0.4, (0, 255, 0), 1)
+    
+    overlay.blend(frame)
+
+# ==================== METRICS ENDPOINT ====================
+def collect_metrics(exposition, metrics, mpv, camera=None):
+    """Scrape callback - runs on the metrics server thread, reads only"""
+    exposition.gauge('gesture_uptime_seconds', time.time() - metrics.start_time, 'Seconds since start')
+    exposition.gauge('gesture_fps', metrics.get_fps(), 'Rendered frames per second (rolling)')
+    exposition.counter('gesture_frames_total', metrics.frames_detected, 'Frames through hand detection')
+    exposition.counter('gesture_hand_frames_total', metrics.frames_with_hands, 'Frames with a hand detected')
+    exposition.gauge('gesture_detection_rate', metrics.get_detection_rate(), 'Share of frames with a hand')
+    exposition.counter('gesture_predictions_total', metrics.total_predictions, 'Classifier predictions')
+    for gesture, count in sorted(metrics.gesture_executions.items()):
+        exposition.counter('gesture_executions_total', count, 'Executed gestures',
+                           {'gesture': gesture})
+    
+    exposition.counter('mpv_commands_total', mpv.command_count, 'MPV commands by outcome',
+                       {'result': 'success'})
+    exposition.counter('mpv_commands_total', mpv.failed_commands, labels={'result': 'failed'})
+    
+    add_tracer(exposition, metrics.tracer)
+    
+    for name, (depth, dropped) in sorted(metrics.queue_depths.items()):
+        exposition.gauge('gesture_queue_depth', depth, 'Items waiting per pipeline queue', {'queue': name})
+    for name, (depth, dropped) in sorted(metrics.queue_depths.items()):
+        exposition.counter('gesture_queue_dropped_total', dropped, 'Frames replaced before use',
+                           {'queue': name})
+    if camera is not None:
+        exposition.counter('gesture_camera_frames_total', camera.frames_grabbed, 'Frames grabbed')
+
+def start_metrics_server(metrics, mpv, camera):
+    if METRICS_PORT is None and not METRICS_SOCKET:
+        return None
+    server = MetricsServer(lambda exposition: collect_metrics(exposition, metrics, mpv, camera),
+                           port=METRICS_PORT, unix_socket=METRICS_SOCKET)
+    try:
+        server.start()
+    except OSError as e:
+        print("[!] Metrics endpoint not started: {}".format(e))
+        return None
+    print("[+] Metrics: {}".format(server.address))
+    return server
+
+# ==================== STARTUP ====================
+def load_model():
+    """Classifier, its feature settings and the gesture labels"""
+    classifier = load_classifier(INFERENCE_BACKEND, MODEL_PATH, WEIGHTS_PATH, MAX_NUM_HANDS)
+    feature_config = load_feature_config(MODEL_INFO_PATH)
+    with open(LABELS_PATH, 'r') as f:
+        gestures = [line.strip().upper() for line in f.readlines()]
+    return classifier, feature_config, gestures
+
+def new_hands(mp_hands):
+    """One MediaPipe Hands graph with the app's settings"""
+    return mp_hands.Hands(
+        min_detection_confidence=0.6,  # Lowered for speed
+        min_tracking_confidence=0.6,   # Lowered for speed
+        max_num_hands=MAX_NUM_HANDS
+    )
+
+def init_hand_tracking():
+    """Import MediaPipe and build the hand graph"""
+    import mediapipe as mp
+    mp_hands = mp.solutions.hands
+    return new_hands(mp_hands), mp_hands, mp.solutions.drawing_utils
+
+def open_camera(metrics):
+    camera = LatestFrameCamera(CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT, 30, metrics)
+    if not camera.is_opened():
+        camera.release()
+        raise RuntimeError("Cannot access camera!")
+    return camera
 
 # ==================== MAIN APPLICATION ====================
 def main():
+    startup = StartupTimer()
+    startup.record('imports', _IMPORT_TIME)
+    
     print("=" * 70)
     print("MPV GESTURE CONTROL - OPTIMIZED (TFLite)")
     print("=" * 70)
     
     # Check MPV
-    print("\n[STEP 1] Checking MPV connection...")
+    print("\n[STEP 1] Checking MPV socket...")
     if not os.path.exists(MPV_SOCKET):
         print("[-] MPV socket not found!")
         print("[!] Start MPV with: mpv --input-ipc-server=/tmp/mpvsocket --loop=inf video.mp4")
         return
+    metrics = PerformanceMetrics(trace_path=TRACE_PATH, trace_format=TRACE_FORMAT)
+    mpv = MPVController(MPV_SOCKET, metrics)
     
-    mpv = MPVController(MPV_SOCKET)
-    success, _, _ = mpv.send_command({'command': ['get_property', 'pause']})
-    if success:
-        print("[+] MPV connected!")
-    else:
-        print("[!] MPV not responding")
+    # Model, MediaPipe graph, camera and the MPV handshake are independent -
+    # start them together so cold start costs the slowest one, not the sum
+    print("\n[STEP 2] Loading model, hand detection and camera in parallel...")
+    results, errors = startup.run_parallel({
+        'mpv': mpv.check_connection,
+        'model': load_model,
+        'mediapipe': init_hand_tracking,
+        'camera': lambda: open_camera(metrics),
+    })
     
-    # Load TFLite Model
-    print("\n[STEP 2] Loading TFLite model...")
-    try:
-        interpreter = tf.lite.Interpreter(model_path=MODEL_PATH)
-        interpreter.allocate_tensors()
-        
-        input_details = interpreter.get_input_details()
-        output_details = interpreter.get_output_details()
-        
-        print("[+] TFLite model loaded!")
-        print("[*] Input shape: {}".format(input_details[0]['shape']))
-    except Exception as e:
-        print("[-] Error loading TFLite model: {}".format(e))
-        print("[!] Make sure gesture_model_v2.tflite exists")
+    if errors:
+        for name, e in errors.items():
+            print("[-] {} failed: {}".format(name, e))
+        if 'model' in errors:
+            print("[!] Make sure gesture_model_v2.tflite (or gesture_model_v2_weights.npz) and {} exist".format(LABELS_PATH))
+        if 'mediapipe' in results:
+            results['mediapipe'][0].close()
+        if 'camera' in results:
+            results['camera'].release()
+        mpv.close()
+        metrics.close()
         return
     
-    # Load labels
-    print("\n[STEP 3] Loading gesture labels...")
-    try:
-        with open(LABELS_PATH, 'r') as f:
-            GESTURES = [line.strip().upper() for line in f.readlines()]
-        print("[+] Loaded {} gestures: {}".format(len(GESTURES), ', '.join(GESTURES)))
-    except Exception as e:
-        print("[-] Error loading labels: {}".format(e))
-        return
-    
-    # Initialize MediaPipe with optimized settings
-    print("\n[STEP 4] Initializing hand detection (optimized)...")
-    mp_hands = mp.solutions.hands
-    mp_drawing = mp.solutions.drawing_utils
-    hands = mp_hands.Hands(
-        min_detection_confidence=0.6,  # Lowered for speed
-        min_tracking_confidence=0.6,   # Lowered for speed
-        max_num_hands=1
-    )
-    print("[+] MediaPipe initialized!")
+    print("[+] MPV connected!" if results['mpv'] else "[!] MPV not responding")
     
-    # Initialize Camera
-    print("\n[STEP 5] Opening camera...")
-    cap = cv2.VideoCapture(CAMERA_INDEX)
-    if not cap.isOpened():
-        print("[-] Cannot access camera!")
-        return
+    classifier, feature_config, GESTURES = results['model']
+    print("[+] Model loaded! Backend: {}".format(classifier.name))
+    print("[*] Input shape: {} | Features: {}".format(
+        classifier.input_shape, feature_config['normalize']))
+    print("[+] Loaded {} gestures: {}".format(len(GESTURES), ', '.join(GESTURES)))
     
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
-    cap.set(cv2.CAP_PROP_FPS, 30)
+    hands, mp_hands, mp_drawing = results['mediapipe']
+    print("[+] MediaPipe initialized!")
     
-    actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    camera = results['camera']
+    actual_width, actual_height = camera.get_resolution()
     print("[+] Camera ready! Resolution: {}x{}".format(actual_width, actual_height))
+    metrics_server = start_metrics_server(metrics, mpv, camera)
     
     print("\n" + "=" * 70)
     print("SYSTEM READY - OPTIMIZED FOR SPEED")
     print("=" * 70)
     print("\n[TARGET PERFORMANCE]")
     print("  FPS: >20 | Latency: <150ms | Accuracy: >80%")
-    print("\n[*] Press 'q' to quit")
+    if HEADLESS:
+        print("\n[*] Headless mode (preview: {}) - stop with Ctrl+C or SIGTERM".format(
+            "{} FPS".format(PREVIEW_FPS) if PREVIEW_FPS > 0 else "off"))
+    else:
+        print("\n[*] Press 'q' to quit")
     print("=" * 70 + "\n")
     
-    # Initialize tracking
-    metrics = PerformanceMetrics()
-    prediction_buffer = deque(maxlen=5)  # Smaller buffer for speed
-    confidence_buffer = deque(maxlen=5)
-    last_action_time = {}
-    action_history = deque(maxlen=10)
+    display = Display(WINDOW_NAME, HEADLESS, PREVIEW_FPS)
+    display.install_signal_handlers()
+    
+    # Build the pipeline: camera -> detect -> classify -> render (main thread)
+    # The camera grabs on its own thread and only ever yields the newest frame
+    pipeline = Pipeline(metrics)
+    pipeline.register_queue('camera', camera)
+    classify_queue = pipeline.add_queue('classify')
+    render_queue = pipeline.add_queue('render')
     
-    current_gesture = None
-    current_confidence = 0.0
+    roi_tracker = None
+    if ROI_TRACKING:
+        # Crops get their own graph - one video-mode graph fed two image sizes mis-tracks
+        roi_tracker = HandROITracker(hands, new_hands(mp_hands), target_size=ROI_TARGET_SIZE,
+                                     full_scan_interval=ROI_FULL_SCAN_INTERVAL)
+    motion_gate = MotionGate(IDLE_DETECTION_FPS) if MOTION_GATING else None
+    detector = HandDetector(hands, metrics, roi_tracker, motion_gate)
+    engine = GestureEngine(classifier, GESTURES, mpv, metrics, feature_config['normalize'])
+    
+    pipeline.add_stage('detect', detector.process, camera, classify_queue)
+    pipeline.add_stage('classify', engine.process, classify_queue, render_queue)
     
     frame_count = 0
+    overlay = None  # Built from the first rendered frame's size
     
     try:
-        while cap.isOpened():
-            frame_start = time.time()
-            
-            ret, frame = cap.read()
-            if not ret:
-                break
+        camera.start()
+        pipeline.start()
+        
+        # cv2.imshow must stay on the main thread
+        while pipeline.is_running() and not display.shutdown.is_set():
+            packet = render_queue.get()
+            if packet is None:
+                if not camera.running:
+                    break
+                continue
             
+            render_start = time.time()
             frame_count += 1
+            if frame_count == 1:
+                startup.mark('first frame')
+                startup.report()
             metrics.update_fps()
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-            
-            # Hand detection
-            hand_detect_start = time.time()
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb_frame)
-            hand_detect_time = time.time() - hand_detect_start
-            metrics.update_hand_detection(hand_detect_time)
-            
-            # Draw minimal UI for speed
-            cv2.rectangle(frame, (0, 0), (w, 100), (30, 30, 30), -1)
-            cv2.putText(frame, "MPV Control (TFLite Optimized)", 
-                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            # Performance metrics
-            fps = metrics.get_fps()
-            latency = metrics.get_total_latency_ms()
-            accuracy = metrics.get_accuracy()
-            avg_cmd_time = mpv.get_avg_command_time()
-            
-            # Compact metrics display
-            met1 = "FPS:{:.1f} Lat:{:.0f}ms".format(fps, latency)
-            met2 = "Hand:{:.0f} Inf:{:.0f} Cmd:{:.0f} Acc:{:.0f}%".format(
-                metrics.get_avg_hand_detection_ms(),
-                metrics.get_avg_inference_ms(),
-                avg_cmd_time, accuracy
-            )
-            
-            cv2.putText(frame, met1, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 255, 100), 2)
-            cv2.putText(frame, met2, (10, 85), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
-            
-            # Process hand
-            if results.multi_hand_landmarks and len(results.multi_hand_landmarks) == 1:
-                hand_landmarks = results.multi_hand_landmarks[0]
-                
-                # Draw landmarks (simplified for speed)
-                mp_drawing.draw_landmarks(
-                    frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
-                    mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=1),
-                    mp_drawing.DrawingSpec(color=(255, 100, 0), thickness=1)
-                )
-                
-                # Extract landmarks
-                landmarks = []
-                for lm in hand_landmarks.landmark:
-                    landmarks.extend([lm.x, lm.y])
-                landmarks = np.array(landmarks, dtype=np.float32).reshape(1, -1)
-                
-                # TFLite inference
-                inference_start = time.time()
-                interpreter.set_tensor(input_details[0]['index'], landmarks)
-                interpreter.invoke()
-                prediction = interpreter.get_tensor(output_details[0]['index'])[0]
-                inference_time = time.time() - inference_start
-                metrics.update_inference(inference_time)
-                
-                gesture_idx = np.argmax(prediction)
-                confidence = prediction[gesture_idx]
-                
-                metrics.record_prediction()
-                
-                # Buffer predictions
-                prediction_buffer.append(gesture_idx)
-                confidence_buffer.append(confidence)
-                
-                # Stable gesture check
-                if len(prediction_buffer) >= STABLE_FRAMES:
-                    unique, counts = np.unique(list(prediction_buffer), return_counts=True)
-                    most_common_idx = unique[np.argmax(counts)]
-                    most_common_count = np.max(counts)
-                    
-                    relevant_confidences = [
-                        conf for pred, conf in zip(prediction_buffer, confidence_buffer)
-                        if pred == most_common_idx
-                    ]
-                    avg_confidence = np.mean(relevant_confidences)
-                    
-                    if most_common_count >= STABLE_FRAMES and avg_confidence > CONFIDENCE_THRESHOLD:
-                        gesture = GESTURES[most_common_idx]
-                        current_gesture = gesture
-                        current_confidence = avg_confidence
-                        
-                        # Execute with cooldown
-                        current_time = time.time()
-                        if gesture not in last_action_time or \
-                           (current_time - last_action_time[gesture]) > ACTION_COOLDOWN:
-                            
-                            success, description, exec_time = mpv.execute_gesture(gesture)
-                            
-                            if success:
-                                last_action_time[gesture] = current_time
-                                action_history.append({
-                                    'gesture': gesture,
-                                    'time': current_time,
-                                    'conf': avg_confidence,
-                                    'exec': exec_time
-                                })
-                                metrics.record_execution(gesture)
-                                
-                                print("[ACTION] {:<12} | {:.0f}% | {:.1f}ms | {}".format(
-                                    gesture, avg_confidence * 100, exec_time, description))
-                
-                # Display current gesture (minimal)
-                if current_gesture:
-                    colors = {
-                        'VOLUME_UP': (0, 255, 0), 'VOLUME_DOWN': (0, 165, 255),
-                        'PLAY': (255, 100, 0), 'PAUSE': (0, 0, 255),
-                        'NEXT': (255, 0, 255), 'PREVIOUS': (255, 255, 0),
-                        'STOP': (0, 0, 200), 'SKIP_LEFT': (150, 150, 0),
-                        'SKIP_RIGHT': (0, 150, 150)
-                    }
-                    color = colors.get(current_gesture, (255, 255, 255))
-                    
-                    box_w = min(int(250 + len(current_gesture) * 8), w - 20)
-                    cv2.rectangle(frame, (10, 120), (box_w, 220), color, -1)
-                    cv2.rectangle(frame, (10, 120), (box_w, 220), (255, 255, 255), 2)
-                    
-                    cv2.putText(frame, current_gesture,
-                               (20, 165), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
-                    cv2.putText(frame, "{:.0f}%".format(current_confidence * 100),
-                               (20, 200), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-            
-            else:
-                prediction_buffer.clear()
-                confidence_buffer.clear()
-                
-                msg = "No hand" if not results.multi_hand_landmarks else "Multiple hands"
-                cv2.putText(frame, msg, (10, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-            
-            # Action history (minimal)
-            if action_history:
-                hy = h - 120
-                cv2.putText(frame, "Recent:", (w - 200, hy), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
-                for act in list(action_history)[-4:]:
-                    hy += 20
-                    cv2.putText(frame, "{} ({:.0f}s)".format(act['gesture'][:8], time.time() - act['time']),
-                               (w - 200, hy), cv2.FONT_HERSHEY_SIMPLEX, 0.3, (150, 150, 150), 1)
-            
-            # MPV status
-            st = "MPV: {}/{}".format(mpv.command_count, mpv.failed_commands)
-            cv2.putText(frame, st, (w - 150, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
             
-            # Display
-            cv2.imshow('MPV Gesture Control (Optimized)', frame)
+            # Headless frames skip drawing entirely
+            if display.should_render():
+                frame = cv2.flip(packet['frame'], 1)  # Mirror only frames that are shown
+                if overlay is None:
+                    overlay = build_overlay(frame.shape[1], frame.shape[0])
+                draw_ui(frame, packet, metrics, mpv, mp_drawing, mp_hands, overlay)
+                display.show(frame)
             
-            # Calculate frame time
-            frame_time = time.time() - frame_start
-            metrics.update_frame_time(frame_time)
+            render_end = time.time()
+            metrics.update_stage('render', render_end - render_start)
+            trace = packet.get('trace')
+            if trace is not None:
+                trace.add('render', render_start, render_end)
+                metrics.finish_trace(trace, render_end)
+            pipeline.sample_queue_depths()
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if display.quit_pressed():
                 print("\n\n[*] Shutting down...")
                 break
+        
+        if display.signal_name:
+            print("\n\n[*] {} received, shutting down...".format(display.signal_name))
+        
+        error = pipeline.get_error()
+        if error:
+            print("[-] Stage '{}' failed: {}".format(error[0], error[1]))
     
     except KeyboardInterrupt:
         print("\n\n[*] Interrupted...")
     
     finally:
-        cap.release()
-        cv2.destroyAllWindows()
+        if metrics_server is not None:
+            metrics_server.stop()
+        pipeline.stop()
+        camera.release()
+        display.close()
         hands.close()
+        if roi_tracker is not None:
+            roi_tracker.close()
+        mpv.close()
+        metrics.close()
         
         # Final report
         print("\n" + "=" * 70)
@@ -429,14 +749,32 @@ def main():
         print("=" * 70)
         print("\n[TIMING METRICS]")
         print("  Average FPS: {:.2f}".format(metrics.get_fps()))
-        print("  Total Latency: {:.2f}ms".format(metrics.get_total_latency_ms()))
-        print("    - Hand Detection: {:.2f}ms".format(metrics.get_avg_hand_detection_ms()))
-        print("    - Model Inference: {:.2f}ms".format(metrics.get_avg_inference_ms()))
-        print("    - Command Execution: {:.2f}ms".format(mpv.get_avg_command_time()))
-        print("  Avg Frame Time: {:.2f}ms ({:.1f} FPS potential)".format(
-            metrics.get_avg_frame_time_ms(), 
-            1000.0 / metrics.get_avg_frame_time_ms() if metrics.get_avg_frame_time_ms() > 0 else 0
-        ))
+        
+        print("\n[LATENCY PERCENTILES] (ms, per frame)")
+        print("  {:<9} {:>7} {:>8} {:>8} {:>8} {:>8}".format('span', 'count', 'p50', 'p95', 'p99', 'max'))
+        span_labels = {'frame': 'frame (capture -> display)', 'action': 'action (glass -> MPV command)',
+                       'ipc_rtt': 'ipc_rtt (MPV reply)'}
+        for name, summary in metrics.tracer.summaries():
+            print("  {:<9} {:>7} {:8.2f} {:8.2f} {:8.2f} {:8.2f}  {}".format(
+                name, summary['count'], summary['p50'], summary['p95'], summary['p99'],
+                summary['max'], span_labels.get(name, '')).rstrip())
+        if TRACE_PATH:
+            print("  Trace written to {} ({})".format(TRACE_PATH, TRACE_FORMAT))
+        
+        print("\n[PIPELINE STAGES]")
+        for stage in ('capture', 'detect', 'classify', 'render'):
+            print("  {:<9} {:5.1f} FPS".format(stage, metrics.get_stage_throughput(stage)))
+        for name in ('camera', 'classify', 'render'):
+            depth, dropped = metrics.get_queue_depth(name)
+            print("  queue '{}': depth {} | dropped {}".format(name, depth, dropped))
+        print("  Camera frames grabbed: {} | dropped (stale): {}".format(
+            camera.frames_grabbed, camera.frames_dropped))
+        if roi_tracker is not None:
+            print("  Hand ROI: {:.0f}% of scans cropped | full scans {} | lost in crop {}".format(
+                roi_tracker.roi_ratio() * 100, roi_tracker.full_scans, roi_tracker.roi_misses))
+        if motion_gate is not None:
+            print("  Motion gate: {:.0f}% of frames skipped detection | motion in {}/{} frames".format(
+                motion_gate.skip_ratio('hands') * 100, motion_gate.motion_frames, motion_gate.frames))
         
         print("\n[ACCURACY METRICS]")
         print("  Overall Accuracy: {:.2f}%".format(metrics.get_accuracy()))
@@ -458,12 +796,12 @@ def main():
         
         # Performance analysis
         final_fps = metrics.get_fps()
-        final_latency = metrics.get_total_latency_ms()
+        final_latency = metrics.get_total_latency_ms(95)
         final_accuracy = metrics.get_accuracy()
         
         print("\n[PERFORMANCE vs TARGET]")
         print("  FPS: {:.1f} {}".format(final_fps, "[OK]" if final_fps >= 20 else "[IMPROVE]"))
-        print("  Latency: {:.0f}ms {}".format(final_latency, "[OK]" if final_latency <= 150 else "[IMPROVE]"))
+        print("  Latency (p95): {:.0f}ms {}".format(final_latency, "[OK]" if final_latency <= 150 else "[IMPROVE]"))
         print("  Accuracy: {:.0f}% {}".format(final_accuracy, "[OK]" if final_accuracy >= 80 else "[OK - cooldown limited]"))
         
         print("\n" + "=" * 70)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent MPV IPC connection
+One long-lived AF_UNIX socket shared by all gesture commands.
+Commands are tagged with an mpv request_id and replies are matched
+by a background reader, so sending never blocks the frame loop.
+"""
+
+import socket
+import json
+import time
+import queue
+import threading
+
+# ==================== CONFIGURATION ====================
+REPLY_TIMEOUT = 1.0         # Seconds before an unanswered command counts as failed
+RECONNECT_INTERVAL = 0.5    # Seconds between reconnect attempts
+STALE_COMMAND_AGE = 0.5     # Drop queued commands older than this (gesture is no longer current)
+SEND_QUEUE_SIZE = 32
+
+
+# ==================== MPV CONNECTION ====================
+class MPVConnection:
+    """Long-lived MPV IPC socket with request_id reply matching"""
+
+    def __init__(self, socket_path, on_reply=None,
+                 reply_timeout=REPLY_TIMEOUT, reconnect_interval=RECONNECT_INTERVAL):
+        self.socket_path = socket_path
+        self.on_reply = on_reply   # on_reply(success, response, rtt_ms)
+        self.reply_timeout = reply_timeout
+        self.reconnect_interval = reconnect_interval
+
+        self.sock = None
+        self.connected = False
+        self.reconnects = 0
+        self.last_connect_attempt = 0
+
+        self.next_request_id = 1
+        self.pending = {}          # request_id -> (send_time, waiter or None)
+        self.lock = threading.Lock()
+
+        self.send_queue = queue.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.running = True
+        self.writer = threading.Thread(target=self._writer_loop, name='mpv-writer', daemon=True)
+        self.writer.start()
+
+    # ---------------------------------------------------------- public ----
+    def send(self, command):
+        """
+        Queue a command for sending and return immediately.
+        Returns (queued, request_id).
+        """
+        if not self.connected and \
+           (time.time() - self.last_connect_attempt) < self.reconnect_interval:
+            # Known-down and still backing off - fail fast instead of queueing
+            return False, None
+
+        with self.lock:
+            request_id = self.next_request_id
+            self.next_request_id += 1
+
+        message = dict(command)
+        message['request_id'] = request_id
+        try:
+            self.send_queue.put_nowait((request_id, message, time.time(), None))
+        except queue.Full:
+            return False, None
+        return True, request_id
+
+    def request(self, command, timeout=None):
+        """
+        Send a command and block until its reply arrives.
+        Only meant for startup checks - never call from the frame loop.
+        Returns (success, response, rtt_ms).
+        """
+        timeout = self.reply_timeout if timeout is None else timeout
+        waiter = {'event': threading.Event(), 'reply': None, 'rtt': 0}
+
+        with self.lock:
+            request_id = self.next_request_id
+            self.next_request_id += 1
+
+        message = dict(command)
+        message['request_id'] = request_id
+        self.send_queue.put((request_id, message, time.time(), waiter))
+
+        if not waiter['event'].wait(timeout):
+            with self.lock:
+                self.pending.pop(request_id, None)
+            return False, None, 0
+
+        reply = waiter['reply']
+        if reply is None:
+            return False, None, 0
+        return reply.get('error') == 'success', reply, waiter['rtt']
+
+    def pending_count(self):
+        with self.lock:
+            return len(self.pending)
+
+    def close(self):
+        self.running = False
+        try:
+            self.send_queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.writer.join(timeout=1.0)
+        self._disconnect()
+
+    # -------------------------------------------------------- internal ----
+    def _connect(self):
+        self.last_connect_attempt = time.time()
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+        except (OSError, socket.error):
+            self.connected = False
+            return False
+
+        with self.lock:
+            if self.sock is not None:
+                self.reconnects += 1
+            self.sock = sock
+            self.connected = True
+        reader = threading.Thread(target=self._reader_loop, args=(sock,),
+                                  name='mpv-reader', daemon=True)
+        reader.start()
+        return True
+
+    def _disconnect(self, sock=None):
+        """
+        Tear down sock (default: the current socket). A reader whose socket
+        was already replaced by a reconnect must not close the new one, so
+        the identity check and the teardown happen under one lock hold.
+        """
+        with self.lock:
+            if sock is not None and sock is not self.sock:
+                return
+            sock = self.sock
+            self.connected = False
+            # Nothing in flight on a dead socket will ever be answered
+            pending = self.pending
+            self.pending = {}
+
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except (OSError, socket.error):
+                pass
+            sock.close()
+        for request_id, (send_time, waiter) in pending.items():
+            self._complete(None, send_time, waiter)
+
+    def _writer_loop(self):
+        while self.running:
+            try:
+                item = self.send_queue.get(timeout=self.reply_timeout)
+            except queue.Empty:
+                self._expire_pending()
+                continue
+            if item is None:
+                break
+
+            request_id, message, queued_time, waiter = item
+
+            # A gesture command that waited out a reconnect is no longer wanted
+            if waiter is None and (time.time() - queued_time) > STALE_COMMAND_AGE:
+                self._complete(None, queued_time, None)
+                continue
+
+            if not self.connected:
+                if (time.time() - self.last_connect_attempt) < self.reconnect_interval or \
+                   not self._connect():
+                    self._complete(None, queued_time, waiter)
+                    continue
+
+            sock = self.sock
+            with self.lock:
+                self.pending[request_id] = (time.time(), waiter)
+            try:
+                sock.sendall((json.dumps(message) + '\n').encode('utf-8'))
+            except (OSError, socket.error):
+                self._disconnect(sock)
+
+            self._expire_pending()
+
+    def _reader_loop(self, sock):
+        buffer = b''
+        while self.running:
+            try:
+                chunk = sock.recv(4096)
+            except (OSError, socket.error):
+                chunk = b''
+            if not chunk:
+                break
+
+            buffer += chunk
+            while b'\n' in buffer:
+                line, buffer = buffer.split(b'\n', 1)
+                if not line.strip():
+                    continue
+                try:
+                    reply = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    continue
+
+                # Property-change and playback events carry no request_id
+                request_id = reply.get('request_id')
+                if request_id is None:
+                    continue
+                with self.lock:
+                    entry = self.pending.pop(request_id, None)
+                if entry is not None:
+                    self._complete(reply, entry[0], entry[1])
+
+        self._disconnect(sock)
+
+    def _expire_pending(self):
+        now = time.time()
+        expired = []
+        with self.lock:
+            for request_id, (send_time, waiter) in list(self.pending.items()):
+                if now - send_time > self.reply_timeout:
+                    expired.append(self.pending.pop(request_id))
+        for send_time, waiter in expired:
+            self._complete(None, send_time, waiter)
+
+    def _complete(self, reply, send_time, waiter):
+        rtt = (time.time() - send_time) * 1000
+        success = reply is not None and reply.get('error') == 'success'
+
+        if waiter is not None:
+            waiter['reply'] = reply
+            waiter['rtt'] = rtt
+            waiter['event'].set()
+            return
+
+        if self.on_reply is not None:
+            self.on_reply(success, reply, rtt)
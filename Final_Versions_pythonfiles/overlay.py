@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cached on-screen overlay
+Static parts of the UI (title bar, help table) are rendered once into
+BGR + alpha layers. Dynamic text is re-rendered only when its value
+changes, and only inside its own box. Each frame then gets the whole
+overlay in one vectorised alpha blend over the covered pixels, instead
+of dozens of cv2.putText/rectangle calls and a full-frame addWeighted.
+"""
+
+import cv2
+import numpy as np
+from collections import OrderedDict
+
+# ==================== CONFIGURATION ====================
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+OPAQUE = 255
+
+
+# ==================== OVERLAY LAYER ====================
+class OverlayLayer:
+    """BGR image plus alpha mask; drawing calls write both"""
+
+    def __init__(self, width, height):
+        self.image = np.zeros((height, width, 3), dtype=np.uint8)
+        self.alpha = np.zeros((height, width), dtype=np.uint8)
+
+    def rectangle(self, pt1, pt2, color, thickness=1, alpha=OPAQUE):
+        cv2.rectangle(self.image, pt1, pt2, color, thickness)
+        cv2.rectangle(self.alpha, pt1, pt2, alpha, thickness)
+
+    def line(self, pt1, pt2, color, thickness=1, alpha=OPAQUE):
+        cv2.line(self.image, pt1, pt2, color, thickness)
+        cv2.line(self.alpha, pt1, pt2, alpha, thickness)
+
+    def text(self, text, org, scale, color, thickness=1, alpha=OPAQUE):
+        cv2.putText(self.image, text, org, FONT, scale, color, thickness)
+        cv2.putText(self.alpha, text, org, FONT, scale, alpha, thickness)
+
+    def bounds(self):
+        """(x0, y0, x1, y1) of the drawn pixels, or None if empty"""
+        ys, xs = np.nonzero(self.alpha)
+        if len(ys) == 0:
+            return None
+        return int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
+
+
+def text_box(text, org, scale, thickness=1):
+    """Pixel box cv2.putText will touch for this text"""
+    (tw, th), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+    x, y = org
+    return x - thickness, y - th - thickness, x + tw + thickness, y + baseline + thickness
+
+
+# ==================== COMPOSITOR ====================
+class OverlayCompositor:
+    """
+    Static layers are drawn once by add_layer() and toggled with
+    show_layer(). Dynamic items are (value, box, draw) - set_text() and
+    set_item() only redraw when value differs from last time.
+    blend(frame) applies everything in one pass.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.layers = OrderedDict()   # name -> [OverlayLayer, visible, bounds]
+        self.items = OrderedDict()    # name -> (value, box, draw)
+
+        self.static = OverlayLayer(width, height)
+        self.composite = OverlayLayer(width, height)
+        self.static_dirty = True
+        self.dirty_boxes = []
+
+        # Blend terms: out = (frame * inv_alpha + premult) >> 8, alpha scaled to 0..256
+        self.premult = np.zeros((height * width, 3), dtype=np.uint16)
+        self.inv_alpha = np.full((height * width, 1), 256, dtype=np.uint16)
+        self.covered = np.zeros((height, width), dtype=bool)
+        self.index = np.zeros(0, dtype=np.intp)
+
+    # ------------------------------------------------------ static layers ----
+    def add_layer(self, name, draw, visible=True):
+        layer = OverlayLayer(self.width, self.height)
+        draw(layer)
+        self.layers[name] = [layer, visible, layer.bounds()]
+        self.static_dirty = True
+        return layer
+
+    def show_layer(self, name, visible=True):
+        entry = self.layers[name]
+        if entry[1] != visible:
+            entry[1] = visible
+            self.static_dirty = True
+
+    # ------------------------------------------------------ dynamic items ----
+    def set_item(self, name, value, box, draw):
+        """draw(layer) must stay inside box (x0, y0, x1, y1)"""
+        old = self.items.get(name)
+        if old is not None and old[0] == value:
+            return
+        box = self._clip(box)
+        self.items[name] = (value, box, draw)
+        if old is not None:
+            self.dirty_boxes.append(old[1])
+        self.dirty_boxes.append(box)
+
+    def set_text(self, name, text, org, scale, color, thickness=1):
+        self.set_item(name, (text, org, scale, color, thickness),
+                      text_box(text, org, scale, thickness),
+                      lambda layer: layer.text(text, org, scale, color, thickness))
+
+    def remove_item(self, name):
+        old = self.items.pop(name, None)
+        if old is not None:
+            self.dirty_boxes.append(old[1])
+
+    # ------------------------------------------------------------ render ----
+    def blend(self, frame):
+        """Alpha-blend the overlay onto a BGR frame in place"""
+        if frame.shape[0] != self.height or frame.shape[1] != self.width:
+            raise ValueError("Frame is {}x{}, overlay is {}x{}".format(
+                frame.shape[1], frame.shape[0], self.width, self.height))
+
+        if self.static_dirty:
+            self._rebuild_static()
+        if self.dirty_boxes:
+            self._redraw_boxes()
+        if len(self.index) == 0:
+            return frame
+
+        pixels = frame.reshape(-1, 3)
+        covered = pixels[self.index].astype(np.uint16)
+        covered *= self.inv_alpha[self.index]
+        covered += self.premult[self.index]
+        covered >>= 8
+        pixels[self.index] = covered
+        return frame
+
+    def _clip(self, box):
+        x0, y0, x1, y1 = box
+        return (max(0, x0), max(0, y0), min(self.width, x1), min(self.height, y1))
+
+    def _rebuild_static(self):
+        self.static.image[:] = 0
+        self.static.alpha[:] = 0
+        self.covered[:] = False
+        for layer, visible, bounds in self.layers.values():
+            if not visible or bounds is None:
+                continue
+            x0, y0, x1, y1 = bounds
+            mask = layer.alpha[y0:y1, x0:x1] > 0
+            self.static.image[y0:y1, x0:x1][mask] = layer.image[y0:y1, x0:x1][mask]
+            self.static.alpha[y0:y1, x0:x1][mask] = layer.alpha[y0:y1, x0:x1][mask]
+            self.covered[y0:y1, x0:x1] |= mask
+
+        self.static_dirty = False
+        self.dirty_boxes = [(0, 0, self.width, self.height)]
+        for _, box, _ in self.items.values():
+            self.covered[box[1]:box[3], box[0]:box[2]] = True
+        self.index = np.flatnonzero(self.covered)
+
+    def _redraw_boxes(self):
+        grow = False
+        for x0, y0, x1, y1 in self.dirty_boxes:
+            if x1 <= x0 or y1 <= y0:
+                continue
+            # Restore the static pixels under the box, then redraw every item touching it
+            self.composite.image[y0:y1, x0:x1] = self.static.image[y0:y1, x0:x1]
+            self.composite.alpha[y0:y1, x0:x1] = self.static.alpha[y0:y1, x0:x1]
+            for _, box, draw in self.items.values():
+                if box[0] < x1 and box[2] > x0 and box[1] < y1 and box[3] > y0:
+                    draw(self.composite)
+                    if not self.covered[box[1]:box[3], box[0]:box[2]].all():
+                        self.covered[box[1]:box[3], box[0]:box[2]] = True
+                        grow = True
+            self._update_blend_terms(x0, y0, x1, y1)
+        self.dirty_boxes = []
+
+        if grow:
+            # Coverage only grows between static rebuilds - stale pixels
+            # have alpha 0 and blend back to the frame unchanged
+            self.index = np.flatnonzero(self.covered)
+
+    def _update_blend_terms(self, x0, y0, x1, y1):
+        alpha = self.composite.alpha[y0:y1, x0:x1].astype(np.uint16)
+        alpha += alpha >> 7   # 0..255 -> 0..256 so opaque pixels copy exactly
+        premult = self.composite.image[y0:y1, x0:x1].astype(np.uint16) * alpha[:, :, None]
+        inv = 256 - alpha
+
+        rows = np.arange(y0, y1)[:, None] * self.width + np.arange(x0, x1)[None, :]
+        self.premult[rows.ravel()] = premult.reshape(-1, 3)
+        self.inv_alpha[rows.ravel(), 0] = inv.ravel()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Threaded frame pipeline
+Capture -> detect -> classify -> render stages joined by bounded
+queues that drop the oldest frame, so a slow stage never backs up
+the camera and end-to-end latency stays bounded.
+"""
+
+import time
+import threading
+from collections import deque
+
+# ==================== CONFIGURATION ====================
+QUEUE_SIZE = 2          # Frames buffered between stages
+GET_TIMEOUT = 0.1       # Seconds a stage waits before re-checking for shutdown
+
+
+# ==================== DROP-OLDEST QUEUE ====================
+class DropOldestQueue:
+    """Bounded queue whose put() never blocks - the oldest item is discarded"""
+
+    def __init__(self, maxsize=QUEUE_SIZE):
+        self.items = deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=GET_TIMEOUT):
+        """Return the oldest queued item, or None after timeout"""
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def qsize(self):
+        return len(self.items)
+
+
+# ==================== PIPELINE STAGE ====================
+class PipelineStage:
+    """
+    Worker thread running one stage function.
+    func(item) -> item for the next stage, or None to drop the frame.
+    A stage without input_queue is a source: func() is called in a loop.
+    """
+
+    def __init__(self, name, func, input_queue=None, output_queue=None, metrics=None):
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.metrics = metrics
+        self.error = None
+        self.stop_event = None
+        self.thread = None
+
+    def start(self, stop_event):
+        self.stop_event = stop_event
+        self.thread = threading.Thread(target=self._run, name='stage-' + self.name, daemon=True)
+        self.thread.start()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.input_queue is None:
+                    item = None
+                else:
+                    item = self.input_queue.get()
+                    if item is None:
+                        continue
+
+                start = time.time()
+                result = self.func() if self.input_queue is None else self.func(item)
+                if self.metrics is not None:
+                    self.metrics.update_stage(self.name, time.time() - start)
+
+                if result is not None and self.output_queue is not None:
+                    self.output_queue.put(result)
+        except Exception as e:
+            # Surface the failure to the main thread and bring the pipeline down
+            self.error = e
+            self.stop_event.set()
+
+
+# ==================== PIPELINE ====================
+class Pipeline:
+    """Chain of stages sharing one stop event"""
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.stages = []
+        self.queues = {}
+        self.stop_event = threading.Event()
+
+    def add_queue(self, name, maxsize=QUEUE_SIZE):
+        q = DropOldestQueue(maxsize)
+        self.queues[name] = q
+        return q
+
+    def register_queue(self, name, q):
+        """Track an external queue-like source (e.g. the camera) in the depth samples"""
+        self.queues[name] = q
+        return q
+
+    def add_stage(self, name, func, input_queue=None, output_queue=None):
+        stage = PipelineStage(name, func, input_queue, output_queue, self.metrics)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        for stage in self.stages:
+            stage.start(self.stop_event)
+
+    def stop(self):
+        self.stop_event.set()
+        for stage in self.stages:
+            stage.join(timeout=1.0)
+
+    def is_running(self):
+        return not self.stop_event.is_set()
+
+    def get_error(self):
+        for stage in self.stages:
+            if stage.error is not None:
+                return stage.name, stage.error
+        return None
+
+    def sample_queue_depths(self):
+        """Push current queue depths and drop counts into metrics"""
+        if self.metrics is None:
+            return
+        for name, q in self.queues.items():
+            self.metrics.update_queue_depth(name, q.qsize(), q.dropped)
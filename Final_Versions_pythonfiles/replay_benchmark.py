@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline replay benchmark
+Replays a recorded video (MediaPipe detection included) or a saved
+landmark stream (.npz, detection skipped) through the same
+detect -> classify -> stabilise -> cooldown -> MPV command path as
+mpv_gesture_control.py, against a fake mpv IPC server on a temporary
+Unix socket. No camera, hand or mpv needed.
+
+Gesture decisions (cooldown, motion gate) run on stream time - frame
+index / fps - so the command sequence is identical on every machine
+and every run; only the latencies are wall clock. Frames are processed
+back to back on one thread, so FPS is the pipeline's compute ceiling.
+
+Usage:
+  python replay_benchmark.py session.mp4 --save-landmarks session.npz
+  python replay_benchmark.py session.npz --json results.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import argparse
+import tempfile
+import threading
+import numpy as np
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import cv2
+
+import mpv_gesture_control as control
+from mpv_gesture_control import (MPVController, PerformanceMetrics, HandDetector, GestureEngine,
+                                 load_model, init_hand_tracking, new_hands)
+from hand_roi import HandROITracker
+from motion_gate import MotionGate
+from tracing import LatencyHistogram
+
+# ==================== CONFIGURATION ====================
+DEFAULT_FPS = 30.0           # Stream rate when the source doesn't say
+REPLY_TIMEOUT = 2.0          # Seconds to wait for the last commands to reach the fake mpv
+LANDMARK_STREAM_VERSION = 1
+
+
+# ==================== FAKE MPV ====================
+class FakeMPVServer:
+    """
+    Answers mpv JSON IPC on a Unix socket with {"error": "success"} and
+    logs when each request arrived. reply_delay simulates a slow player.
+    """
+
+    def __init__(self, socket_path, reply_delay=0.0):
+        self.socket_path = socket_path
+        self.reply_delay = reply_delay
+        self.received = {}           # request_id -> (arrival time, command)
+        self.cond = threading.Condition()
+        self.sock = None
+        self.running = False
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.socket_path)
+        self.sock.listen(4)
+        self.running = True
+        threading.Thread(target=self._accept_loop, name='fake-mpv', daemon=True).start()
+        return self
+
+    def wait_for(self, request_ids, timeout=REPLY_TIMEOUT):
+        """Block until every request id has arrived; returns the ones still missing"""
+        deadline = time.time() + timeout
+        with self.cond:
+            while True:
+                missing = [r for r in request_ids if r not in self.received]
+                remaining = deadline - time.time()
+                if not missing or remaining <= 0:
+                    return missing
+                self.cond.wait(remaining)
+
+    def stop(self):
+        self.running = False
+        if self.sock is not None:
+            self.sock.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn,), name='fake-mpv-conn',
+                             daemon=True).start()
+
+    def _serve(self, conn):
+        buffer = b''
+        with conn:
+            while self.running:
+                try:
+                    chunk = conn.recv(4096)
+                except OSError:
+                    break
+                if not chunk:
+                    break
+                buffer += chunk
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    if not line.strip():
+                        continue
+                    arrival = time.time()
+                    message = json.loads(line.decode('utf-8'))
+                    request_id = message.get('request_id')
+                    with self.cond:
+                        self.received[request_id] = (arrival, message.get('command'))
+                        self.cond.notify_all()
+                    if self.reply_delay > 0:
+                        time.sleep(self.reply_delay)
+                    reply = {'request_id': request_id, 'error': 'success', 'data': None}
+                    try:
+                        conn.sendall((json.dumps(reply) + '\n').encode('utf-8'))
+                    except OSError:
+                        return
+
+
+class RecordingMPV(MPVController):
+    """MPVController that remembers every gesture command it queued"""
+
+    def __init__(self, socket_path, metrics=None):
+        MPVController.__init__(self, socket_path, metrics)
+        self.sent = []               # (gesture, request id), in send order
+        self.last_request_id = None
+
+    def send_command(self, command):
+        result = MPVController.send_command(self, command)
+        self.last_request_id = result[1]
+        return result
+
+    def execute_gesture(self, gesture):
+        self.last_request_id = None
+        result = MPVController.execute_gesture(self, gesture)
+        if result[0] and self.last_request_id is not None:
+            self.sent.append((gesture, self.last_request_id))
+        return result
+
+
+# ==================== LANDMARK STREAMS ====================
+def _make_results(hands):
+    """[(label, (21, 3) array)] -> object shaped like MediaPipe Hands results"""
+    if not hands:
+        return HandDetector.NO_HANDS
+    return SimpleNamespace(
+        multi_hand_landmarks=[
+            SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z))
+                                      for x, y, z in points])
+            for _, points in hands],
+        multi_handedness=[
+            SimpleNamespace(classification=[SimpleNamespace(label=label, score=1.0)])
+            for label, _ in hands])
+
+
+def _hands_from_results(results):
+    if not results.multi_hand_landmarks:
+        return []
+    if results.multi_handedness:
+        labels = [h.classification[0].label for h in results.multi_handedness]
+    else:
+        labels = ['Hand'] * len(results.multi_hand_landmarks)
+    return [(label, np.array([(lm.x, lm.y, lm.z) for lm in hand.landmark], dtype=np.float32))
+            for label, hand in zip(labels, results.multi_hand_landmarks)]
+
+
+def save_landmark_stream(path, frames, fps):
+    """
+    frames: per frame, a list of (handedness label, (21, 3) landmarks) in
+    the mirrored coordinates the detect stage produces.
+    Stored flat: one row per hand plus the frame index it belongs to.
+    """
+    rows = [(i, label, points) for i, hands in enumerate(frames) for label, points in hands]
+    np.savez_compressed(
+        path,
+        version=LANDMARK_STREAM_VERSION,
+        fps=float(fps),
+        num_frames=len(frames),
+        frame_index=np.array([r[0] for r in rows], dtype=np.int32),
+        handedness=np.array([r[1] for r in rows], dtype='U8'),
+        landmarks=(np.stack([r[2] for r in rows]) if rows
+                   else np.zeros((0, 21, 3), dtype=np.float32)).astype(np.float32))
+
+
+def load_landmark_stream(path):
+    """Returns (list of per-frame results, fps)"""
+    data = np.load(path)
+    if int(data['version']) != LANDMARK_STREAM_VERSION:
+        raise ValueError("{}: landmark stream version {} (expected {})".format(
+            path, int(data['version']), LANDMARK_STREAM_VERSION))
+    frames = [[] for _ in range(int(data['num_frames']))]
+    for index, label, points in zip(data['frame_index'], data['handedness'], data['landmarks']):
+        frames[index].append((str(label), points))
+    return [_make_results(hands) for hands in frames], float(data['fps'])
+
+
+def iter_video(path):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError("Cannot open video: {}".format(path))
+    try:
+        while True:
+            grab_start = time.time()
+            ret, frame = cap.read()
+            grab_end = time.time()
+            if not ret:
+                break
+            yield frame, (grab_start, grab_end)
+    finally:
+        cap.release()
+
+
+def video_fps(path):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
+    cap.release()
+    return fps if fps and fps > 0 else DEFAULT_FPS
+
+
+# ==================== REPLAY ====================
+class StreamClock:
+    """Stream time of the frame being replayed - drives cooldown and gating"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def replay(source, fps=None, backend=None, save_landmarks=None, reply_delay=0.0,
+           trace_path=None, trace_format='chrome'):
+    """Run the pipeline over `source` and return the benchmark report dict"""
+    is_stream = source.endswith('.npz')
+    if backend:
+        control.INFERENCE_BACKEND = backend
+
+    classifier, feature_config, gestures = load_model()
+
+    if is_stream:
+        stream, stream_fps = load_landmark_stream(source)
+        frames = ((results, None) for results in stream)
+    else:
+        stream_fps = video_fps(source)
+        frames = iter_video(source)
+    fps = fps or stream_fps
+
+    tmp_dir = tempfile.mkdtemp(prefix='gesture_replay_')
+    server = FakeMPVServer(os.path.join(tmp_dir, 'mpvsocket'), reply_delay).start()
+    metrics = PerformanceMetrics(trace_path=trace_path, trace_format=trace_format)
+    mpv = RecordingMPV(server.socket_path, metrics)
+    hands = None
+    roi_tracker = None
+
+    try:
+        if not mpv.check_connection():
+            raise RuntimeError("Fake mpv did not answer")
+
+        clock = StreamClock()
+        detector = None
+        if not is_stream:
+            hands, mp_hands = init_hand_tracking()[:2]
+            if control.ROI_TRACKING:
+                roi_tracker = HandROITracker(hands, new_hands(mp_hands),
+                                             target_size=control.ROI_TARGET_SIZE,
+                                             full_scan_interval=control.ROI_FULL_SCAN_INTERVAL)
+            motion_gate = MotionGate(control.IDLE_DETECTION_FPS) if control.MOTION_GATING else None
+            detector = HandDetector(hands, metrics, roi_tracker, motion_gate, clock)
+        engine = GestureEngine(classifier, gestures, mpv, metrics,
+                               feature_config['normalize'], clock)
+
+        recorded = []
+        actions = []                 # (frame index, gesture, request id, capture time)
+        frame_count = 0
+        start = time.time()
+
+        for index, (item, grab_span) in enumerate(frames):
+            clock.now = index / float(fps)
+            if is_stream:
+                capture_time = time.time()
+                packet = {'frame_id': index + 1, 'capture_time': capture_time, 'frame': None}
+                metrics.begin_trace(packet)
+                packet['results'] = item
+                metrics.record_detection(bool(item.multi_hand_landmarks))
+            else:
+                packet = {'frame_id': index + 1, 'capture_time': grab_span[1],
+                          'grab_span': grab_span, 'frame': item}
+                detector.process(packet)
+                if save_landmarks:
+                    recorded.append(_hands_from_results(packet['results']))
+
+            sent_before = len(mpv.sent)
+            engine.process(packet)
+            for gesture, request_id in mpv.sent[sent_before:]:
+                actions.append((index, gesture, request_id, packet['capture_time']))
+
+            metrics.update_fps()
+            metrics.finish_trace(packet['trace'])
+            frame_count += 1
+
+        elapsed = time.time() - start
+        missing = server.wait_for([a[2] for a in actions])
+    finally:
+        mpv.close()
+        metrics.close()
+        server.stop()
+        os.rmdir(tmp_dir)
+        if hands is not None:
+            hands.close()
+        if roi_tracker is not None:
+            roi_tracker.close()
+
+    if save_landmarks and recorded:
+        save_landmark_stream(save_landmarks, recorded, fps)
+
+    # Glass-to-mpv: frame capture -> command read by the (fake) player
+    end_to_end = LatencyHistogram()
+    for _, _, request_id, capture_time in actions:
+        if request_id in server.received:
+            end_to_end.record(server.received[request_id][0] - capture_time)
+
+    sequence = [(index, gesture) for index, gesture, _, _ in actions]
+    report = OrderedDict()
+    report['source'] = os.path.basename(source)
+    report['mode'] = 'landmarks' if is_stream else 'video'
+    report['backend'] = classifier.name
+    report['frames'] = frame_count
+    report['stream_fps'] = fps
+    report['wall_seconds'] = elapsed
+    report['fps'] = frame_count / elapsed if elapsed > 0 else 0.0
+    report['detection_rate'] = metrics.get_detection_rate()
+    report['predictions'] = metrics.total_predictions
+    report['stages'] = OrderedDict(metrics.tracer.summaries())
+    report['actions'] = len(actions)
+    report['action_latency'] = end_to_end.summary()
+    report['commands_lost'] = len(missing)
+    report['sequence'] = sequence
+    # Same input + same model must give the same fingerprint on any machine
+    report['fingerprint'] = hashlib.sha1(json.dumps(sequence).encode('utf-8')).hexdigest()[:12]
+    return report
+
+
+def print_report(report):
+    print("\n" + "=" * 70)
+    print("REPLAY BENCHMARK - {} ({})".format(report['source'], report['mode']))
+    print("=" * 70)
+    print("  Backend: {} | Frames: {} @ {:.1f} FPS stream".format(
+        report['backend'], report['frames'], report['stream_fps']))
+    print("  Throughput: {:.1f} FPS ({:.2f}s wall)".format(report['fps'], report['wall_seconds']))
+    print("  Detection rate: {:.1f}% | Predictions: {}".format(
+        report['detection_rate'] * 100, report['predictions']))
+
+    print("\n[LATENCY PERCENTILES] (ms, per frame)")
+    print("  {:<9} {:>7} {:>8} {:>8} {:>8} {:>8}".format('span', 'count', 'p50', 'p95', 'p99', 'max'))
+    rows = list(report['stages'].items()) + [('e2e', report['action_latency'])]
+    for name, summary in rows:
+        if summary['count']:
+            print("  {:<9} {:>7} {:8.2f} {:8.2f} {:8.2f} {:8.2f}".format(
+                name, summary['count'], summary['p50'], summary['p95'], summary['p99'], summary['max']))
+    print("  (action = frame capture -> command sent, e2e = -> command received by mpv)")
+
+    print("\n[ACTIONS]")
+    print("  Executed: {} | Lost: {} | Fingerprint: {}".format(
+        report['actions'], report['commands_lost'], report['fingerprint']))
+    counts = {}
+    for _, gesture in report['sequence']:
+        counts[gesture] = counts.get(gesture, 0) + 1
+    for gesture, count in sorted(counts.items()):
+        print("  {}: {}x".format(gesture, count))
+    print("=" * 70)
+
+
+# ==================== MAIN ====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('source', help='Video file, or .npz landmark stream')
+    parser.add_argument('--fps', type=float, help='Stream rate (default: from the source)')
+    parser.add_argument('--backend', choices=('auto', 'numpy', 'tflite_runtime', 'tflite'),
+                        help='Inference backend (default: {})'.format(control.INFERENCE_BACKEND))
+    parser.add_argument('--save-landmarks', metavar='NPZ',
+                        help='Video mode: save detected landmarks for detector-free replays')
+    parser.add_argument('--mpv-delay-ms', type=float, default=0.0,
+                        help='Fake mpv reply delay')
+    parser.add_argument('--json', metavar='PATH', help='Also write the report as JSON')
+    parser.add_argument('--trace', metavar='PATH', help='Dump per-frame spans')
+    parser.add_argument('--trace-format', choices=('chrome', 'jsonl'), default='chrome')
+    args = parser.parse_args(argv)
+
+    report = replay(args.source, args.fps, args.backend, args.save_landmarks,
+                    args.mpv_delay_ms / 1000.0, args.trace, args.trace_format)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print("[+] Report saved to {}".format(args.json))
+    return 0 if report['commands_lost'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
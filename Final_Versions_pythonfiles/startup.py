@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup helpers
+Runs independent initialisation steps (model load, MediaPipe graph,
+camera open) on worker threads and records how long each one took, so
+cold start costs the slowest step instead of the sum of all of them.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ==================== STARTUP TIMER ====================
+class StartupTimer:
+    """Per-step startup durations plus total time since construction"""
+
+    def __init__(self):
+        self.start = time.time()
+        self.timings = []   # (name, offset from start, duration) in seconds
+
+    def elapsed(self):
+        return time.time() - self.start
+
+    def record(self, name, duration, offset=0.0):
+        self.timings.append((name, offset, duration))
+
+    def mark(self, name):
+        """Record a milestone (e.g. first processed frame) as time since start"""
+        self.timings.append((name, 0.0, self.elapsed()))
+
+    def measure(self, name, func, *args):
+        step_start = time.time()
+        try:
+            return func(*args)
+        finally:
+            self.timings.append((name, step_start - self.start, time.time() - step_start))
+
+    def run_parallel(self, tasks):
+        """
+        Run {name: callable} concurrently.
+        Returns (results, errors) - dicts keyed by task name.
+        """
+        with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+            futures = [(name, pool.submit(self.measure, name, func)) for name, func in tasks.items()]
+
+        results, errors = {}, {}
+        for name, future in futures:
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+        return results, errors
+
+    def report(self):
+        print("\n[STARTUP TIMING]")
+        for name, offset, duration in self.timings:
+            if offset > 0:
+                print("  {:12}: {:7.0f}ms (started at +{:.0f}ms)".format(name, duration * 1000, offset * 1000))
+            else:
+                print("  {:12}: {:7.0f}ms".format(name, duration * 1000))
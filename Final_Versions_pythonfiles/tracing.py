@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-frame tracing and latency histograms
+Every frame carries a FrameTrace with one span per pipeline step
+(capture, color, detect, extract, infer, vote, ipc, render). Finished
+traces are folded into fixed-size log-bucketed (HDR-style) histograms,
+so p50/p95/p99/max stay accurate to ~1.5% over any run length in
+constant memory. Traces can also be streamed to disk as JSON lines or
+in Chrome trace format (open in chrome://tracing or ui.perfetto.dev).
+"""
+
+import json
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# ==================== CONFIGURATION ====================
+SPANS = ('capture', 'color', 'detect', 'extract', 'infer', 'vote', 'ipc', 'render')
+SIGNIFICANT_BITS = 7         # 64 buckets per power of two -> <1.6% relative error
+MAX_LATENCY = 60.0           # Seconds; anything slower lands in the top bucket
+PERCENTILES = (50, 95, 99)
+TRACE_FORMATS = ('jsonl', 'chrome')
+
+
+# ==================== HISTOGRAM ====================
+class LatencyHistogram:
+    """
+    Durations are counted in whole microseconds. Values below 2^bits get
+    their own bucket; above that every power-of-two range is split into
+    2^(bits-1) equal buckets, so a bucket is never wider than 1/2^(bits-1)
+    of the values in it. Memory is fixed by max_value (~1.3k counters).
+    """
+
+    def __init__(self, max_value=MAX_LATENCY, significant_bits=SIGNIFICANT_BITS):
+        self.sub_bits = significant_bits
+        self.sub_count = 1 << significant_bits
+        self.half_count = self.sub_count >> 1
+        self.max_us = int(max_value * 1e6)
+        self.counts = np.zeros(self._index(self.max_us) + 1, dtype=np.int64)
+        self.total = 0
+        self.sum_us = 0
+        self.max_seen_us = 0
+
+    def _index(self, value):
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def _upper(self, index):
+        """Largest microsecond value that falls in bucket `index`"""
+        if index < self.sub_count:
+            return index
+        shift, sub = divmod(index - self.sub_count, self.half_count)
+        return ((sub + self.half_count + 1) << (shift + 1)) - 1
+
+    def record(self, duration):
+        """Add one duration (seconds)"""
+        value = min(max(int(duration * 1e6 + 0.5), 0), self.max_us)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum_us += value
+        if value > self.max_seen_us:
+            self.max_seen_us = value
+
+    def percentiles(self, qs=PERCENTILES):
+        """Seconds at each percentile in qs (upper edge of the bucket, capped at max)"""
+        if self.total == 0:
+            return [0.0 for _ in qs]
+        cumulative = np.cumsum(self.counts)
+        total = cumulative[-1]
+        values = []
+        for q in qs:
+            rank = max(1, int(np.ceil(q / 100.0 * total)))
+            index = int(np.searchsorted(cumulative, rank))
+            values.append(min(self._upper(index), self.max_seen_us) / 1e6)
+        return values
+
+    def percentile(self, q):
+        return self.percentiles((q,))[0]
+
+    def cumulative_counts(self, bounds):
+        """Number of values <= each bound (seconds), e.g. for Prometheus buckets"""
+        cumulative = np.cumsum(self.counts)
+        return [int(cumulative[self._index(min(max(int(bound * 1e6), 0), self.max_us))])
+                for bound in bounds]
+
+    def mean(self):
+        return self.sum_us / 1e6 / self.total if self.total else 0.0
+
+    def max(self):
+        return self.max_seen_us / 1e6
+
+    def summary(self, qs=PERCENTILES):
+        """count / mean / pXX / max, durations in ms"""
+        result = OrderedDict([('count', self.total), ('mean', self.mean() * 1000)])
+        for q, value in zip(qs, self.percentiles(qs)):
+            result['p{}'.format(q)] = value * 1000
+        result['max'] = self.max() * 1000
+        return result
+
+    def reset(self):
+        self.counts[:] = 0
+        self.total = 0
+        self.sum_us = 0
+        self.max_seen_us = 0
+
+
+# ==================== FRAME TRACE ====================
+class _Span:
+    __slots__ = ('trace', 'name', 'start')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, self.start, time.time())
+        return False
+
+
+class FrameTrace:
+    """Spans of one frame: (name, start, end, thread name), wall-clock seconds"""
+
+    __slots__ = ('frame_id', 'capture_time', 'spans')
+
+    def __init__(self, frame_id, capture_time):
+        self.frame_id = frame_id
+        self.capture_time = capture_time
+        self.spans = []
+
+    def add(self, name, start, end, thread=None):
+        """thread defaults to the caller - pass it for spans timed elsewhere"""
+        self.spans.append((name, start, end, thread or threading.current_thread().name))
+
+    def span(self, name):
+        """with trace.span('detect'): ..."""
+        return _Span(self, name)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullTrace:
+    """Stand-in when a caller has no trace - spans cost nothing"""
+
+    _span = _NullSpan()
+
+    def add(self, name, start, end, thread=None):
+        pass
+
+    def span(self, name):
+        return self._span
+
+
+NULL_TRACE = NullTrace()
+
+
+# ==================== TRACE WRITER ====================
+class TraceWriter:
+    """
+    Streams finished frames to disk.
+    jsonl:  one {"frame_id", "capture_time", "spans": [...]} object per line
+    chrome: Trace Event Format array of complete ('X') events, one track per thread
+    """
+
+    def __init__(self, path, fmt='jsonl'):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError("Unknown trace format '{}' (expected one of {})".format(
+                fmt, ', '.join(TRACE_FORMATS)))
+        self.path = path
+        self.format = fmt
+        self.file = open(path, 'w')
+        self.thread_ids = {}
+        self.origin = None
+        self.first_event = True
+        if fmt == 'chrome':
+            self.file.write('[\n')
+
+    def write(self, trace):
+        if self.format == 'jsonl':
+            self.file.write(json.dumps({
+                'frame_id': trace.frame_id,
+                'capture_time': trace.capture_time,
+                'spans': [{'name': name, 'start': start, 'ms': (end - start) * 1000,
+                           'thread': thread}
+                          for name, start, end, thread in trace.spans]
+            }) + '\n')
+            return
+
+        if self.origin is None:
+            self.origin = min([span[1] for span in trace.spans] + [trace.capture_time])
+        for name, start, end, thread in trace.spans:
+            self._event({'name': name, 'ph': 'X', 'pid': 1, 'tid': self._thread_id(thread),
+                         'ts': round((start - self.origin) * 1e6, 1),
+                         'dur': round((end - start) * 1e6, 1),
+                         'args': {'frame': trace.frame_id}})
+
+    def _thread_id(self, thread):
+        tid = self.thread_ids.get(thread)
+        if tid is None:
+            tid = self.thread_ids[thread] = len(self.thread_ids) + 1
+            self._event({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid,
+                         'args': {'name': thread}})
+        return tid
+
+    def _event(self, event):
+        if not self.first_event:
+            self.file.write(',\n')
+        self.file.write(json.dumps(event))
+        self.first_event = False
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.format == 'chrome':
+            self.file.write('\n]\n')
+        self.file.close()
+
+
+# ==================== TRACER ====================
+class Tracer:
+    """
+    begin() a FrameTrace per frame, let each stage add spans, then
+    finish() it once the frame is done. A span that runs twice in one
+    frame (e.g. an ROI miss forcing a rescan) is summed, so histograms
+    hold per-frame cost. Other durations can go straight in with record().
+    """
+
+    def __init__(self, spans=SPANS, dump_path=None, dump_format='jsonl',
+                 max_value=MAX_LATENCY, significant_bits=SIGNIFICANT_BITS):
+        self.max_value = max_value
+        self.significant_bits = significant_bits
+        self.histograms = OrderedDict(
+            (name, LatencyHistogram(max_value, significant_bits)) for name in spans)
+        self.writer = TraceWriter(dump_path, dump_format) if dump_path else None
+        self.frames = 0
+
+    def begin(self, frame_id, capture_time):
+        return FrameTrace(frame_id, capture_time)
+
+    def histogram(self, name):
+        # Unknown names are added on first use; names recorded from other
+        # threads should be passed in spans so the dict never changes live
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms.setdefault(
+                name, LatencyHistogram(self.max_value, self.significant_bits))
+        return hist
+
+    def record(self, name, duration):
+        self.histogram(name).record(duration)
+
+    def finish(self, trace, end=None, total_name='frame'):
+        """Fold a finished frame into the histograms; total_name gets capture -> end"""
+        durations = {}
+        for name, start, stop, _ in trace.spans:
+            durations[name] = durations.get(name, 0.0) + (stop - start)
+        for name, duration in durations.items():
+            self.record(name, duration)
+        if total_name:
+            end = time.time() if end is None else end
+            self.record(total_name, end - trace.capture_time)
+        self.frames += 1
+
+        if self.writer is not None:
+            self.writer.write(trace)
+
+    def percentile_ms(self, name, q):
+        hist = self.histograms.get(name)
+        return hist.percentile(q) * 1000 if hist is not None else 0.0
+
+    def summaries(self, qs=PERCENTILES):
+        """[(name, summary dict)] for every histogram with data"""
+        return [(name, hist.summary(qs)) for name, hist in list(self.histograms.items())
+                if hist.total]
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()